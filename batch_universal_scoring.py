@@ -1,354 +1,11 @@
-# УНИВЕРСАЛЬНАЯ БАТЧ-СИСТЕМА ДЛЯ ЛЮБОГО КОЛИЧЕСТВА ПОЛЬЗОВАТЕЛЕЙ
-# Обрабатывает по 180 в каждом запросе (можно менять размер батча)
-# Установка: pip install google-generativeai pandas openpyxl
+# БАТЧ ОЦЕНКА ЛИДОВ ПО РУБРИКЕ ДМ ЛИДС
+# Логика - в pipeline.py, настройки - пресет [presets.batch] в pipeline.toml
+# (модель, батч 180, рубрика score_dmleads, Excel/JSON/CSV выгрузка). То же,
+# что `python cli.py --preset batch run`
 
-import pandas as pd
-import json
-import time
-import google.generativeai as genai
-from datetime import datetime
-import re
-
-# ============ НАСТРОЙКИ ============
-import os
-from dotenv import load_dotenv
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY_1")  # Загружаем из .env
-MODEL = "gemini-2.5-flash-lite"
-BATCH_SIZE = 180  # Пользователей в одном батче
-MAX_USERS = None   # Максимум пользователей всего (можешь увеличить)
-
-genai.configure(api_key=GEMINI_API_KEY)
-
-print(f"🤖 Модель: {MODEL}")
-print(f"📊 Батч-размер: {BATCH_SIZE} пользователей в запросе")
-print(f"📈 Максимум пользователей: {MAX_USERS}\n")
-
-# ============ ФУНКЦИЯ БАТЧ ОЦЕНКИ ============
-def score_batch_users(batch_data, batch_number):
-    """
-    Отправляет батч пользователей в один запрос к Gemini.
-    Возвращает словарь {index: score}
-    """
-    
-    batch_size = len(batch_data)
-    
-    # Форматируем данные
-    users_text = ""
-    for i, user in enumerate(batch_data, 1):
-        name = str(user.get('Имя', '')).strip()
-        surname = str(user.get('Фамилия', '')).strip()
-        description = str(user.get('Суммарное описание', '')).strip()
-        
-        if not description or description.lower() in ['nan', 'none', '']:
-            description = "Нет описания"
-        
-        users_text += f"{i}. {name} {surname}\n   {description}\n\n"
-    
-    # Промпт для батча
-    prompt = f"""Проанализируй этих {batch_size} пользователей Telegram и присуди каждому скор интереса для веб-агентства ДМ Лидс (разработка сайтов, маркетинг, лид-генерация) от 1 до 100.
-
-Твоя задача — присвоить каждому пользователю скор интереса для веб‑агентства (разработка сайтов, лендинги, лидогенерация, маркетинг) от 1 до 100.
-
-Оценивай по 5 факторам:
-
-1) Тип бизнеса и ниша (0–30)
-- 25–30: цифровой бизнес, сильно завязанный на онлайне (IT, SaaS, маркетинг/реклама, продюсирование, e‑commerce, онлайн‑курсы, студии дизайна).
-- 15–24: эксперты и услуги B2B/B2C (юристы, бухгалтера, коучи, консалтинг, репетиторы, мед/образование и т.п.).
-- 5–14: локальные офлайн‑услуги, где сайт — второстепенный канал.
-- 0–4: хобби, личные блоги, мемы, политика, серые/нелегальные темы.
-
-2) Роль человека (0–25)
-- 20–25: владелец, сооснователь, директор, ИП, самозанятый, руководитель агентства/студии/бизнеса.
-- 10–19: маркетолог, продукт, менеджер, руководитель направления.
-- 5–9: рядовой специалист (дизайнер, разработчик, таргетолог и т.п.).
-- 0–4: студент, личный аккаунт без явной связи с бизнесом.
-
-3) Цифровая зрелость и явная нужда (0–25)
-- 20–25: в описании есть упоминания сайта, лендингов, заявок, трафика, рекламы, воронок, масштабирования онлайн‑продаж.
-- 12–19: активные онлайн‑каналы (Telegram‑канал бизнеса, онлайн‑курсы, вебинары, регулярный контент).
-- 5–11: просто сухое описание деятельности, без акцента на онлайне.
-- 0–4: описание пустое или вообще не связано с деятельностью.
-
-4) Потенциал бюджета / размера (0–15)
-- 12–15: заметно, что бизнес с деньгами (агентство с командой, e‑commerce, b2b‑услуги с высоким чеком).
-- 7–11: нормальный малый бизнес/эксперт, который реалистично может заплатить за сайт/лидген.
-- 3–6: очень маленький или совсем начинающий проект.
-- 0–2: хобби, некоммерческая активность.
-
-5) Гео и язык (0–5)
-- 4–5: видно, что это RU / СНГ (русский язык, города РФ/СНГ, рубли).
-- 2–3: язык русский, но гео неочевидно.
-- 0–1: другой рынок и язык, с которым агентство, скорее всего, не работает.
-
-Штрафы:
-- Если профиль про политику, ставки, казино, откровенный скам или нет осмысленного описания — вычти 20 баллов.
-- Если это чисто развлекательный/личный блог без связи с бизнесом — вычти 10 баллов.
-
-Сложи все факторы, примени штрафы. Если итог <1 — сделай 1. Если >100 — сделай 100.
-
-ОТВЕТ: верни ТОЛЬКО одно число от 1 до 100 без текста и комментариев.
-Пример: 87
-
-СПИСОК ПОЛЬЗОВАТЕЛЕЙ:
-{users_text}
-
-ОТВЕТ: Выдай JSON массив ТОЛЬКО с index и score, без объяснений:
-[
-  {{"index": 1, "score": 85}},
-  {{"index": 2, "score": 72}},
-  ...
-  {{"index": {batch_size}, "score": 65}}
-]"""
-
-    print(f"📤 Батч #{batch_number}: отправляю {batch_size} пользователей...")
-    print(f"   Время: {datetime.now().strftime('%H:%M:%S')}")
-    
-    try:
-        model = genai.GenerativeModel(MODEL)
-        response = model.generate_content(prompt)
-        
-        if hasattr(response, 'text'):
-            text = response.text.strip()
-        else:
-            print("   ❌ Пустой ответ")
-            return None
-        
-        # Парсим JSON из ответа
-        json_match = re.search(r'\[.*\]', text, re.DOTALL)
-        
-        if not json_match:
-            print(f"   ❌ JSON не найден в ответе")
-            return None
-        
-        json_str = json_match.group(0)
-        scores_array = json.loads(json_str)
-        
-        # Преобразуем в словарь {index: score}
-        scores_dict = {}
-        for item in scores_array:
-            idx = item.get('index')
-            score = item.get('score')
-            if idx and score:
-                scores_dict[idx - 1] = int(score)  # Переводим в 0-based индекс
-        
-        print(f"   ✅ Получено {len(scores_dict)} оценок\n")
-        
-        return scores_dict
-        
-    except json.JSONDecodeError as e:
-        print(f"   ❌ Ошибка парсинга JSON: {e}\n")
-        return None
-    except Exception as e:
-        print(f"   ❌ Ошибка: {str(e)}\n")
-        return None
-
-
-# ============ ОСНОВНАЯ ЛОГИКА ============
-def main():
-    print("=" * 75)
-    print("БАТЧ СИСТЕМА ОЦЕНКИ ЛИДОВ")
-    print("По 180 пользователей в каждом запросе")
-    print("=" * 75 + "\n")
-    
-    # Загружаем данные
-    print("📂 Загрузка данных...")
-    file_path = 'users_copy.xlsx'
-    df = pd.read_excel(file_path)
-    print(f"✅ Загружено {len(df)} пользователей\n")
-    
-    # Ограничиваем, только если MAX_USERS задан
-    if MAX_USERS is not None:
-        df = df.head(MAX_USERS).copy()
-    
-    print(f"📌 Обрабатываем {len(df)} пользователей")
-    print(f"📊 Батчей: {(len(df) + BATCH_SIZE - 1) // BATCH_SIZE}\n")
-    
-    if 'Интерес' not in df.columns:
-        df['Интерес'] = None
-    
-    # Разбиваем на батчи
-    # 2. Берём только НЕоценённые строки
-    work_df = df[df['Интерес'].isna()].reset_index().rename(columns={'index': 'orig_idx'})
-
-    print(f"📌 Неоценённых пользователей: {len(work_df)}")
-    total_batches = (len(work_df) + BATCH_SIZE - 1) // BATCH_SIZE
-    all_scores = {}
-    api_requests = 0
-
-    print("=" * 75)
-    print("ЗАПРОСЫ К API")
-    print("=" * 75 + "\n")
-
-    start_time = datetime.now()
-
-    for batch_num in range(total_batches):
-        start_idx = batch_num * BATCH_SIZE
-        end_idx = min(start_idx + BATCH_SIZE, len(work_df))
-
-        batch_df = work_df.iloc[start_idx:end_idx]
-        batch_data = batch_df[['Имя', 'Фамилия', 'Суммарное описание']].to_dict('records')
-
-        # Отправляем батч
-        scores = score_batch_users(batch_data, batch_num + 1)
-        api_requests += 1
-
-        if scores is None:
-            print(f"❌ Ошибка при обработке батча {batch_num + 1}")
-            continue
-
-        # Применяем оценки: раскладываем в исходный df по orig_idx
-        for rel_idx, score in scores.items():
-            if rel_idx >= len(batch_df):
-                continue
-            orig_idx = int(batch_df.iloc[rel_idx]['orig_idx'])
-            df.at[orig_idx, 'Интерес'] = score
-            all_scores[orig_idx] = score
-
-        if batch_num < total_batches - 1:
-            time.sleep(1)
-
-    elapsed = (datetime.now() - start_time).total_seconds()
-    
-    # Сортируем по интересу
-    df = df.sort_values('Интерес', ascending=False, na_position='last').reset_index(drop=True)
-    
-    # Статистика
-    print("\n" + "=" * 75)
-    print("СТАТИСТИКА")
-    print("=" * 75 + "\n")
-    
-    scored = df[df['Интерес'].notna()]
-    not_scored = df[df['Интерес'].isna()]
-    
-    print(f"⏱️  Время обработки: {elapsed:.1f} сек ({elapsed/60:.2f} мин)")
-    print(f"📡 API запросов: {api_requests}")
-    print(f"👥 Обработано: {len(scored)}")
-    print(f"❌ Ошибок: {len(not_scored)}\n")
-    
-    if len(scored) > 0:
-        hot = len(scored[scored['Интерес'] >= 80])
-        warm = len(scored[(scored['Интерес'] >= 50) & (scored['Интерес'] < 80)])
-        cold = len(scored[(scored['Интерес'] >= 20) & (scored['Интерес'] < 50)])
-        not_interested = len(scored[scored['Интерес'] < 20])
-        
-        total = len(scored)
-        print(f"🔥 ГОРЯЧИЕ (80-100):      {hot:3d} ({hot*100//total:2d}%)")
-        print(f"🟡 ТЕПЛЫЕ (50-79):       {warm:3d} ({warm*100//total:2d}%)")
-        print(f"❄️  ХОЛОДНЫЕ (20-49):     {cold:3d} ({cold*100//total:2d}%)")
-        print(f"❌ НЕИНТЕРЕСНЫЕ (1-19):  {not_interested:3d} ({not_interested*100//total:2d}%)")
-        print(f"\n{'─' * 75}")
-        print(f"📈 ВСЕГО: {total}\n")
-    
-    # ТОП лидов
-    print("=" * 75)
-    print("🔥 ТОП-20 ГОРЯЧИХ ЛИДОВ")
-    print("=" * 75 + "\n")
-    
-    top_leads = df[df['Интерес'] >= 80].head(20)
-    
-    if len(top_leads) > 0:
-        for i, (idx, row) in enumerate(top_leads.iterrows(), 1):
-            # безопасно приводим к строке и обрабатываем NaN
-            name = str(row['Имя']) if pd.notna(row['Имя']) else ''
-            surname = str(row['Фамилия']) if pd.notna(row['Фамилия']) else ''
-            username = str(row['Юзернейм']) if pd.notna(row['Юзернейм']) else ''
-
-            print(
-                f"{i:2d}. "
-                f"[{row['Интерес']:3.0f}] "
-                f"{name:15} "
-                f"{surname:15} "
-                f"@{username.replace('@', '')}"
-            )
-    else:
-        print("Горячих лидов не найдено")
-
-    
-    # СОХРАНЕНИЕ
-    print("\n" + "=" * 75)
-    print("💾 СОХРАНЕНИЕ РЕЗУЛЬТАТОВ")
-    print("=" * 75 + "\n")
-    
-    # 1. Excel
-    output_excel = 'batch_results_scored.xlsx'
-    df.to_excel(output_excel, index=False)
-    print(f"✅ Excel: {output_excel}")
-    
-    # 2. JSON
-    json_data = {
-        "metadata": {
-            "total_users": len(scored),
-            "generated_at": datetime.now().isoformat(),
-            "model": MODEL,
-            "processing_time_seconds": elapsed,
-            "api_requests": api_requests,
-            "batch_mode": True,
-            "batch_size": BATCH_SIZE,
-            "distribution": {
-                "hot": len(scored[scored['Интерес'] >= 80]) if len(scored) > 0 else 0,
-                "warm": len(scored[(scored['Интерес'] >= 50) & (scored['Интерес'] < 80)]) if len(scored) > 0 else 0,
-                "cold": len(scored[(scored['Интерес'] >= 20) & (scored['Интерес'] < 50)]) if len(scored) > 0 else 0,
-                "not_interested": len(scored[scored['Интерес'] < 20]) if len(scored) > 0 else 0,
-            }
-        },
-        "users": []
-    }
-    
-    for i, row in scored.iterrows():
-        json_data["users"].append({
-            "rank": len(json_data["users"]) + 1,
-            "score": int(row['Интерес']),
-            "id": str(row['ID']),
-            "name": str(row['Имя']).strip(),
-            "surname": str(row['Фамилия']).strip(),
-            "username": str(row['Юзернейм']).strip(),
-            "description": str(row['Суммарное описание']).strip()[:150],
-            "is_premium": str(row['Премиум']).strip() == 'Да',
-            "collection_date": str(row['Дата сбора']).strip()
-        })
-    
-    output_json = 'batch_hot_leads.json'
-    with open(output_json, 'w', encoding='utf-8') as f:
-        json.dump(json_data, f, ensure_ascii=False, indent=2)
-    print(f"✅ JSON: {output_json}")
-    
-    # 3. CSV
-    csv_output = 'batch_hot_leads_export.csv'
-    df_export = df[['Имя', 'Фамилия', 'Юзернейм', 'Интерес', 'Суммарное описание', 'Премиум']]
-    df_export.to_csv(csv_output, index=False, encoding='utf-8-sig')
-    print(f"✅ CSV: {csv_output}\n")
-    
-    # Финальное сообщение
-    print("=" * 75)
-    print("✨ ГОТОВО!")
-    print("=" * 75)
-    print(f"""
-📊 РЕЗУЛЬТАТЫ:
-   • Обработано пользователей: {len(scored)}
-   • API запросов: {api_requests}
-   • Время: {elapsed/60:.2f} минут
-   • Модель: {MODEL}
-
-🎯 СЛЕДУЮЩИЕ ШАГИ:
-   1. Открой {output_json}
-   2. Начни писать горячим лидам (скор >= 80)
-   3. Используй {output_excel} для фильтрации в Excel
-
-💡 ПРИМЕРЫ ИСПОЛЬЗОВАНИЯ:
-
-   # Python
-   import json
-   with open('{output_json}') as f:
-       leads = json.load(f)
-   
-   # Все горячие
-   hot = [u for u in leads['users'] if u['score'] >= 80]
-   print(f"Горячих лидов: {{len(hot)}}")
-
-🚀 API эффективность: {api_requests} запросов на {len(scored)} пользователей!
-""")
+import sys
 
+from cli import main
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main(["--preset", "batch", "run"] + sys.argv[1:]))
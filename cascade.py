@@ -0,0 +1,132 @@
+# КАСКАДНАЯ МАРШРУТИЗАЦИЯ МОДЕЛЕЙ
+# get_model_with_fallback меняет модель только при исчерпании квоты. В режиме
+# каскада первый проход всегда делает дешёвая модель с большим RPM, а сильная
+# получает только неуверенные случаи: скор рядом с порогом, слишком короткий
+# или пустой суммарайз, строки, которые не удалось распарсить. Если у сильной
+# модели нет квоты - остаётся ответ дешёвой. Отчёт показывает, сколько
+# строк эскалировано, как часто это меняло решение и во что обошлось.
+
+import threading
+
+from postprocess import UNDEFINED, API_ERROR
+
+# Пороги эскалации по умолчанию; в пайплайне - score.cascade_margin и
+# summarize.cascade_min_length из pipeline.toml
+THRESHOLDS = (50, 80)  # Скор рядом с порогом решает судьбу лида (сообщения / горячий)
+SCORE_MARGIN = 5  # Скор ближе N к порогу - перепроверить сильной моделью
+MIN_SUMMARY_LENGTH = 60  # Суммарайз короче - перепроверить
+FAILED_SUMMARIES = (UNDEFINED, API_ERROR, "Ошибка обработки")
+
+
+def near_threshold(score, margin=SCORE_MARGIN):
+    return any(abs(score - threshold) < margin for threshold in THRESHOLDS)
+
+
+def scores_to_escalate(scores, batch_size, margin=SCORE_MARGIN):
+    """Относительные индексы батча для сильной модели: без скора (ответ не
+    распарсился целиком или частично) и со скором рядом с порогом"""
+    scores = scores or {}
+    return [i for i in range(batch_size) if i not in scores or near_threshold(scores[i], margin)]
+
+
+def summary_needs_escalation(text, min_length=MIN_SUMMARY_LENGTH):
+    """Пустой, неопределённый или слишком короткий суммарайз"""
+    return not text or text in FAILED_SUMMARIES or len(text) < min_length
+
+
+def _side(score):
+    return tuple(score >= threshold for threshold in THRESHOLDS)
+
+
+class Cascade:
+    """Дешёвая модель первой, сильная - для неуверенных строк.
+    first_model() -> модель первого прохода со слотом (дешёвая, пока у неё есть квота);
+    has_quota(model) -> bool резервирует слот сильной модели, если он есть прямо
+    сейчас (иначе эскалация пропускается)"""
+    def __init__(self, first_model, strong_model, has_quota,
+                 score_margin=SCORE_MARGIN, min_summary_length=MIN_SUMMARY_LENGTH):
+        self.first_model = first_model
+        self.strong_model = strong_model
+        self.has_quota = has_quota
+        self.score_margin = score_margin
+        self.min_summary_length = min_summary_length
+        self.lock = threading.Lock()
+        # {stage: {rows, escalated, changed, no_quota, calls: {model: n}}}
+        self.stats = {}
+
+    def _count(self, stage, rows=0, escalated=0, changed=0, no_quota=0, model=None):
+        with self.lock:
+            entry = self.stats.setdefault(stage, {"rows": 0, "escalated": 0, "changed": 0,
+                                                  "no_quota": 0, "calls": {}})
+            entry["rows"] += rows
+            entry["escalated"] += escalated
+            entry["changed"] += changed
+            entry["no_quota"] += no_quota
+            if model is not None:
+                entry["calls"][model] = entry["calls"].get(model, 0) + 1
+
+    def summarize(self, record, api_key, summarize_fn):
+        """summarize_fn(record, api_key, model) -> текст"""
+        model = self.first_model()
+        result = summarize_fn(record, api_key, model)
+        self._count("summarize", rows=1, model=model)
+        if model == self.strong_model or not summary_needs_escalation(result, self.min_summary_length):
+            return result
+        if not self.has_quota(self.strong_model):
+            self._count("summarize", no_quota=1)
+            return result
+
+        strong = summarize_fn(record, api_key, self.strong_model)
+        # Берём ответ сильной модели, только если он лучше ("изменил решение")
+        better = not summary_needs_escalation(strong, self.min_summary_length)
+        self._count("summarize", escalated=1, changed=int(better), model=self.strong_model)
+        return strong if better else result
+
+    def score(self, batch_data, api_key, batch_num, score_fn, model=None):
+        """score_fn(batch_data, api_key, batch_num, model) -> {отн. индекс: скор} | None.
+        model - модель первого прохода с уже зарезервированным слотом (None - first_model()).
+        Возвращает (скоры, {отн. индекс: модель})"""
+        model = model or self.first_model()
+        scores = dict(score_fn(batch_data, api_key, batch_num, model) or {})
+        self._count("score", rows=len(batch_data), model=model)
+        models = {i: model for i in scores}
+
+        escalate = scores_to_escalate(scores, len(batch_data), self.score_margin)
+        if model == self.strong_model or not escalate:
+            return scores, models
+        if not self.has_quota(self.strong_model):
+            self._count("score", no_quota=len(escalate))
+            return scores, models
+
+        strong = score_fn([batch_data[i] for i in escalate], api_key, batch_num, self.strong_model) or {}
+        self._count("score", model=self.strong_model)
+        changed = 0
+        for sub_idx, score in strong.items():
+            if not 0 <= sub_idx < len(escalate):
+                continue
+            idx = escalate[sub_idx]
+            # Решение изменилось: строка перешла порог (или скора не было вовсе)
+            if idx not in scores or _side(scores[idx]) != _side(score):
+                changed += 1
+            scores[idx] = score
+            models[idx] = self.strong_model
+        self._count("score", escalated=len(escalate), changed=changed)
+        return scores, models
+
+    def summary(self):
+        with self.lock:
+            return {stage: {**entry, "calls": dict(entry["calls"])} for stage, entry in self.stats.items()}
+
+
+def print_cascade_report(cascade):
+    """Качество/стоимость каскада по этапам"""
+    for stage, entry in sorted(cascade.summary().items()):
+        rows = entry["rows"]
+        escalated = entry["escalated"]
+        calls = ", ".join(f"{model}: {count}" for model, count in entry["calls"].items())
+        print(f"{stage}: строк {rows} | эскалировано {escalated} ({escalated * 100 // rows if rows else 0}%) | "
+              f"решение изменилось {entry['changed']} | без квоты на эскалацию {entry['no_quota']}")
+        print(f"  Вызовы: {calls}")
+        # Без каскада все строки шли бы в сильную модель
+        print(f"  Сильной модели досталось {escalated} строк из {rows} - "
+              f"экономия {100 - (escalated * 100 // rows if rows else 0)}% её квоты")
@@ -0,0 +1,101 @@
+# КОМАНДНАЯ СТРОКА ПАЙПЛАЙНА ЛИДОВ
+# Одна точка входа для всех сценариев; настройки - pipeline.toml (config.py),
+# отличия бывших скриптов - пресеты. Без сети и ключей до запуска команды;
+# pandas и google.generativeai грузятся только командами, которым они нужны,
+# поэтому --help и check отвечают за доли секунды.
+#
+#   python cli.py run                          # суммарайз + оценка + сообщения + выгрузка
+#   python cli.py --preset batch run           # бывший batch_universal_scoring.py
+#   python cli.py --preset ai summarize        # бывший ai.py (без выгрузки)
+#   python cli.py score --rescore incremental --k 3 --cascade
+#   python cli.py export                       # Excel/JSON/NDJSON/CSV из хранилища
+#   python cli.py check                        # проверить конфиг и выйти
+#   python cli.py run --profile                # + разбор времени (profiling.py)
+
+import argparse
+import json
+import sys
+
+from config import CONFIG_FILE, STAGES, ConfigError, load_config, presets
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Пайплайн лидов: суммарайз, оценка, сообщения")
+    parser.add_argument("--config", default=CONFIG_FILE, help=f"Файл конфигурации (по умолчанию {CONFIG_FILE})")
+    parser.add_argument("--preset", help="Пресет из [presets.*] конфигурации (ai, batch, ...)")
+
+    # Общие флаги: --profile - всем командам с работой, --workers - только с обращением к API
+    profiled = argparse.ArgumentParser(add_help=False)
+    profiled.add_argument("--profile", action="store_true",
+                          help="Разложить время по категориям и этапам (profiling.py)")
+    common = argparse.ArgumentParser(add_help=False, parents=[profiled])
+    common.add_argument("--workers", type=int, help="Параллельных потоков (api.max_workers)")
+
+    commands = parser.add_subparsers(dest="command", required=True, metavar="команда")
+    commands.add_parser("summarize", parents=[common], help="Суммарайз профилей без описания")
+    score = commands.add_parser("score", parents=[common], help="Оценка лидов батчами")
+    score.add_argument("--rescore", choices=["missing", "incremental"], help="Что переоценивать (score.rescore_mode)")
+    score.add_argument("--k", type=int, help="Оценок на лида с якорями, итог - медиана (score.k)")
+    score.add_argument("--cascade", action="store_true", help="Неуверенные строки - fallback модели")
+    score.add_argument("--batch-size", type=int, help="Пользователей в батче (score.batch_size)")
+    commands.add_parser("messages", parents=[common], help="Сообщения для лидов со скором >= messages.min_score")
+    run = commands.add_parser("run", parents=[common], help="Этапы run.stages по очереди, затем выгрузка")
+    run.add_argument("--stages", help=f"Этапы через запятую из {', '.join(STAGES)}")
+    commands.add_parser("export", parents=[profiled], help="Выгрузка Excel/JSON/NDJSON/CSV из хранилища без API")
+    commands.add_parser("check", help="Проверить конфигурацию и показать итоговые настройки")
+    return parser
+
+
+def overrides(args):
+    """Флаги командной строки -> {секция: {ключ: значение}} поверх конфига"""
+    result = {}
+
+    def put(section, key, value):
+        if value is not None:
+            result.setdefault(section, {})[key] = value
+
+    put("api", "max_workers", getattr(args, "workers", None))
+    put("score", "rescore_mode", getattr(args, "rescore", None))
+    put("score", "k", getattr(args, "k", None))
+    put("score", "batch_size", getattr(args, "batch_size", None))
+    if getattr(args, "cascade", False):
+        put("score", "cascade", True)
+    if getattr(args, "stages", None):
+        put("run", "stages", [stage.strip() for stage in args.stages.split(",") if stage.strip()])
+    return result
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        config = load_config(args.config, args.preset, overrides=overrides(args))
+    except ConfigError as e:
+        print(f"❌ {e}")
+        return 2
+
+    if args.command == "check":
+        print(json.dumps(config.settings, ensure_ascii=False, indent=2))
+        print(f"✅ Конфигурация в порядке ({args.config}" + (f", пресет {args.preset}" if args.preset else "")
+              + f"). Пресеты: {', '.join(presets(args.config)) or 'нет'}")
+        return 0
+
+    import pipeline
+
+    if args.command == "export":
+        command = lambda: pipeline.export_only(config)
+    elif args.command == "run":
+        command = lambda: pipeline.run(config)
+    else:
+        command = lambda: pipeline.run(config, [args.command], export=False)
+
+    if args.profile:
+        # Время по категориям (квота, паузы, сеть, разбор, DataFrame, файлы) + cProfile
+        from profiling import profile_call
+        profile_call(command, f"{args.preset or 'pipeline'}_{args.command}")
+    else:
+        command()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+# РЕЕСТР КЛИЕНТОВ GENAI
+# Один сервисный клиент (и одно соединение с keep-alive) на API ключ и одна
+# GenerativeModel на (ключ, модель, generation_config, шаблон) - объекты
+# создаются один раз и переиспользуются всеми потоками.
+#
+# genai.configure() глобален, поэтому раньше все потоки фактически ходили
+# с одним ключом. Здесь каждая модель привязывается к клиенту своего ключа.
+#
+# google.generativeai импортируется при создании первого клиента, а не при
+# импорте модуля (~0.8 с): CLI и тесты, не ходящие в API, его не грузят.
+
+import json
+import threading
+
+from prompts import supports_system_instruction
+
+# "grpc" - один HTTP/2 канал на ключ, запросы всех потоков мультиплексируются
+# "rest" - пул HTTP-соединений requests внутри клиента
+TRANSPORT = "grpc"
+
+_lock = threading.Lock()
+_service_clients = {}  # {api_key: GenerativeServiceClient}
+_models = {}  # {(api_key, model, config, template): GenerativeModel}
+
+
+def _client_kwargs(api_key):
+    import google.generativeai as genai
+    from google.api_core import client_options as client_options_lib
+    from google.api_core import gapic_v1
+
+    return {
+        "client_options": client_options_lib.ClientOptions(api_key=api_key),
+        "client_info": gapic_v1.client_info.ClientInfo(user_agent=f"genai-py/{genai.__version__}"),
+        "transport": TRANSPORT,
+    }
+
+
+def service_client(api_key):
+    """GenerativeServiceClient для ключа (создаётся один раз)"""
+    with _lock:
+        client = _service_clients.get(api_key)
+        if client is None:
+            from google.ai import generativelanguage as glm
+            client = glm.GenerativeServiceClient(**_client_kwargs(api_key))
+            _service_clients[api_key] = client
+        return client
+
+
+def get_model(model_name, api_key=None, generation_config=None, template=None):
+    """GenerativeModel для (ключ, модель, конфиг, шаблон) из реестра.
+    template - шаблон из prompts.py: инструкция уходит в system_instruction
+    (gemma его не принимает - тогда инструкцию добавляет template.contents_for())"""
+    cache_key = (
+        api_key,
+        model_name,
+        json.dumps(generation_config, sort_keys=True),
+        template.key if template is not None else None,
+    )
+    with _lock:
+        model = _models.get(cache_key)
+    if model is not None:
+        return model
+
+    import google.generativeai as genai
+
+    client = service_client(api_key) if api_key else None
+    with _lock:
+        model = _models.get(cache_key)
+        if model is not None:
+            return model
+
+        if template is None or not supports_system_instruction(model_name):
+            model = genai.GenerativeModel(model_name, generation_config=generation_config)
+        else:
+            model = genai.GenerativeModel(
+                model_name,
+                system_instruction=template.system,
+                generation_config=generation_config,
+            )
+        if client is not None:
+            # Без ключа модель лениво возьмёт клиент из genai.configure()
+            model._client = client
+        _models[cache_key] = model
+        return model
+
+
+def stats():
+    """Сколько объектов создано (для отладки)"""
+    with _lock:
+        return {"service_clients": len(_service_clients), "models": len(_models)}
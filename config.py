@@ -0,0 +1,258 @@
+# КОНФИГУРАЦИЯ ПАЙПЛАЙНА
+# Все настройки (модели и лимиты, размеры батчей, рубрики, файлы, метрики,
+# логи) живут в одном файле pipeline.toml. Бывшие скрипты отличались
+# моделями, батчами и рубриками - эти отличия теперь пресеты в том же файле
+# ([presets.ai], [presets.batch]), а не копии кода. Переменные окружения
+# (RESCORE_MODE, CASCADE, SCORE_K, TRAFFIC_MODE, ...) по-прежнему
+# переопределяют файл. Загрузка конфига не трогает сеть и ключи.
+
+import copy
+import os
+import tomllib
+from types import SimpleNamespace
+
+from replay import TRAFFIC_MODES
+
+CONFIG_FILE = 'pipeline.toml'
+
+# Значения по умолчанию (= прежний lead_processor.py); файл переопределяет любые из них
+DEFAULTS = {
+    "keys": {
+        "env_prefix": "GOOGLE_API_KEY_",  # Ключи GOOGLE_API_KEY_1 ... _N из .env
+        "count": 8,
+        "probe": True,  # Проверить ключи при старте (отсеять 403 leaked)
+        "probe_model": "gemini-2.5-flash-lite",
+    },
+    "models": {
+        "primary": "gemma-3-27b-it",
+        "primary_rpm": 30,
+        "primary_rpd": 15000,  # 0 - без дневного лимита
+        "fallback": "gemini-2.5-flash-lite",  # "" - без запасной модели
+        "fallback_rpm": 10,
+        "fallback_rpd": 20,
+    },
+    "api": {
+        "max_workers": 8,  # Параллельных потоков (не больше числа ключей)
+        "request_timeout": 60,  # Дедлайн одного запроса, сек
+        "hedge": True,  # Дубликат с другого ключа для медленных ответов (hedging.py)
+        "hedge_quantile": 0.95,  # ...когда ответа нет дольше этого квантиля латентности этапа
+        "hedge_min_delay": 2.0,  # ...но не раньше, сек
+        "hedge_min_samples": 20,  # Замеров до первого дубликата
+    },
+    "summarize": {
+        "prompt": "summarize_short",  # summarize_short (2-3 предложения) / summarize_detailed (3-5)
+        "temperature": 0.7,
+        "max_output_tokens": 500,
+        "start_index": 0,  # Строки раньше этой позиции не суммаризуются
+        "local_max_length": 30,  # Описание короче N символов - суммарайз локально (local_summary.py)
+        "local_min_words": 3,  # ...или в нём меньше N значимых слов
+        "cascade_min_length": 60,  # Суммарайз короче - перепроверить сильной моделью (score.cascade)
+    },
+    "score": {
+        "prompt": "score_codexai",  # Рубрика: score_codexai / score_dmleads
+        "variant": "full",  # "full" - рубрика как в исходных скриптах; "compact" - короче промпт (по выбору)
+        "batch_size": 150,
+        "rescore_mode": "missing",  # "incremental" - ещё и устаревшие оценки
+        "rescore_band": [40, 90],  # [] - переоценивать устаревшие во всём диапазоне
+        "rescore_model": "",  # Модель, чьи оценки считаются актуальными ("" - любая)
+        "local_scoring": True,  # Уверенные строки - локальной моделью (local_scorer.py)
+        "local_min_spearman": 0.6,  # Порог качества локальной модели на отложенной части
+        "local_min_agreement": 0.9,  # ...и согласия с LLM по сторонам порогов 50/80 у уверенных
+        "cascade": False,  # Неуверенные строки - fallback модели (cascade.py)
+        "cascade_margin": 5,  # Скор ближе N к порогам 50/80 - перепроверить сильной моделью
+        "local_margin": 0.0,  # Зона неуверенности локальной модели у порогов (0 - как при обучении)
+        "k": 1,  # >1 - самосогласование: k оценок с якорями, медиана (consistency.py)
+        "seed": 0,  # Зерно перемешивания батчей при k > 1: те же батчи - те же промпты (replay)
+    },
+    "messages": {
+        "min_score": 50,  # Сообщения только для лидов со скором не ниже
+        "temperature": 0.8,
+        "max_output_tokens": 300,
+    },
+    "run": {
+        "stages": ["summarize", "score", "messages"],  # Этапы команды run (после них - export)
+    },
+    "report": {
+        "top": 10,  # Сколько лучших лидов печатать в конце прогона
+        "min_score": 50,  # ...со скором не ниже
+    },
+    "store": {
+        "file": "leads.db",  # Хранилище лидов (SQLite) - источник истины
+        "seed_files": ["leads_processed.xlsx", "users_copy.xlsx"],  # Чем заполнить пустое хранилище
+    },
+    "export": {
+        "excel": "leads_processed.xlsx",  # "" - не писать
+        "json": "",
+        "ndjson": "",  # Один оценённый лид - одна строка JSON
+        "csv": "",
+        "csv_columns": ["Имя", "Фамилия", "Юзернейм", "Интерес", "Суммарное описание", "Премиум"],
+        "chunk_size": 5000,
+        "parallel": False,
+    },
+    "metrics": {
+        "jsonl": "api_metrics.jsonl",  # "" - не писать
+        "prometheus_file": "api_metrics.prom",
+        "port": 0,  # Например 9108 - отдавать /metrics по HTTP
+        "status_file": "pipeline_status.json",
+    },
+    "logging": {
+        "level": "INFO",
+        "json": False,  # JSON в stderr вместо текста
+        "file": "pipeline.log",  # Всегда JSON; "" - не писать
+    },
+    "traffic": {
+        "mode": "",  # "record" / "replay" (replay.py)
+        "log": "api_traffic.jsonl.gz",
+    },
+}
+
+# Переменные окружения поверх файла: {имя: (секция, ключ, преобразование)}
+ENV_OVERRIDES = {
+    "RESCORE_MODE": ("score", "rescore_mode", str),
+    "CASCADE": ("score", "cascade", lambda value: value == "1"),
+    "SCORE_K": ("score", "k", int),
+    "TRAFFIC_MODE": ("traffic", "mode", str),
+    "TRAFFIC_LOG": ("traffic", "log", str),
+    "LOG_LEVEL": ("logging", "level", str),
+    "LOG_JSON": ("logging", "json", lambda value: value == "1"),
+}
+
+STAGES = ("summarize", "score", "messages")
+RESCORE_MODES = ("missing", "incremental")
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+
+class ConfigError(ValueError):
+    """Ошибка в pipeline.toml (неизвестный ключ, неверный тип или значение)"""
+
+
+def _merge(base, override, path=""):
+    """Наложить override на base; неизвестные секции и ключи - ошибка (опечатки)"""
+    for key, value in override.items():
+        where = f"{path}{key}"
+        if key not in base:
+            raise ConfigError(f"Неизвестный параметр: {where}")
+        if isinstance(base[key], dict):
+            if not isinstance(value, dict):
+                raise ConfigError(f"{where} должен быть секцией")
+            _merge(base[key], value, where + ".")
+            continue
+        expected = type(base[key])
+        if expected is float and isinstance(value, int) and not isinstance(value, bool):
+            value = float(value)
+        if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            raise ConfigError(f"{where}: ожидается {expected.__name__}, получено {value!r}")
+        base[key] = value
+
+
+def read_file(path=CONFIG_FILE):
+    """Содержимое pipeline.toml ({} если файла нет)"""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'rb') as f:
+        try:
+            return tomllib.load(f)
+        except tomllib.TOMLDecodeError as e:
+            raise ConfigError(f"{path}: {e}")
+
+
+def validate(settings):
+    """Проверить значения; ConfigError со списком всех проблем"""
+    problems = []
+    models = settings["models"]
+    if not models["primary"]:
+        problems.append("models.primary не задана")
+    for name in ("primary_rpm", "fallback_rpm"):
+        if models[name] <= 0:
+            problems.append(f"models.{name} должен быть > 0")
+    for name in ("primary_rpd", "fallback_rpd"):
+        if models[name] < 0:
+            problems.append(f"models.{name} должен быть >= 0 (0 - без лимита)")
+    if settings["api"]["max_workers"] < 1:
+        problems.append("api.max_workers должен быть >= 1")
+    if settings["api"]["request_timeout"] <= 0:
+        problems.append("api.request_timeout должен быть > 0")
+    if not 0 < settings["api"]["hedge_quantile"] < 1:
+        problems.append("api.hedge_quantile должен быть в (0, 1)")
+    for section, name in (("api", "hedge_min_delay"), ("api", "hedge_min_samples"),
+                          ("summarize", "local_max_length"), ("summarize", "local_min_words"),
+                          ("summarize", "cascade_min_length"), ("score", "cascade_margin"),
+                          ("score", "local_margin")):
+        if settings[section][name] < 0:
+            problems.append(f"{section}.{name} должен быть >= 0")
+    score = settings["score"]
+    if score["batch_size"] < 1:
+        problems.append("score.batch_size должен быть >= 1")
+    if not isinstance(score["seed"], int) or score["seed"] < 0:
+        problems.append("score.seed должен быть целым >= 0")
+    if score["k"] < 1:
+        problems.append("score.k должен быть >= 1")
+    elif score["k"] > 1:
+        from consistency import has_anchors
+        if not has_anchors(score["prompt"]):
+            problems.append(f"score.k > 1: для рубрики {score['prompt']} нет якорей калибровки "
+                            f"(consistency.ANCHOR_SETS)")
+    if score["rescore_mode"] not in RESCORE_MODES:
+        problems.append(f"score.rescore_mode: одно из {RESCORE_MODES}")
+    if score["rescore_band"] and len(score["rescore_band"]) != 2:
+        problems.append("score.rescore_band: [нижняя, верхняя] или []")
+    for name in ("local_min_spearman", "local_min_agreement"):
+        if not -1 <= score[name] <= 1:
+            problems.append(f"score.{name} должен быть в [-1, 1]")
+    if score["cascade"] and not models["fallback"]:
+        problems.append("score.cascade требует models.fallback")
+    unknown = [stage for stage in settings["run"]["stages"] if stage not in STAGES]
+    if unknown:
+        problems.append(f"run.stages: неизвестные этапы {unknown}, доступны {STAGES}")
+    if settings["traffic"]["mode"] not in TRAFFIC_MODES:
+        problems.append(f"traffic.mode: одно из {TRAFFIC_MODES}")
+    if settings["logging"]["level"].upper() not in LOG_LEVELS:
+        problems.append(f"logging.level: одно из {LOG_LEVELS}")
+    if settings["report"]["top"] < 0:
+        problems.append("report.top должен быть >= 0")
+    if not settings["store"]["file"]:
+        problems.append("store.file не задан")
+    if problems:
+        raise ConfigError("Ошибки конфигурации:\n  - " + "\n  - ".join(problems))
+
+
+def _namespace(settings):
+    return SimpleNamespace(**{key: _namespace(value) if isinstance(value, dict) else value
+                              for key, value in settings.items()})
+
+
+def load_config(path=CONFIG_FILE, preset=None, overrides=None, env=None):
+    """DEFAULTS <- файл <- пресет из файла <- переменные окружения <- overrides
+    ({секция: {ключ: значение}}, флаги командной строки).
+    Возвращает пространство имён: config.score.batch_size, config.models.primary, ...
+    (исходный словарь - в config.settings)"""
+    if env is None:
+        from dotenv import load_dotenv
+        load_dotenv()  # RESCORE_MODE, CASCADE, ... можно держать и в .env
+        env = os.environ
+    data = read_file(path)
+    presets = data.pop("presets", {})
+    settings = copy.deepcopy(DEFAULTS)
+    _merge(settings, data)
+    if preset:
+        if preset not in presets:
+            available = ", ".join(sorted(presets)) or "нет"
+            raise ConfigError(f"Пресет '{preset}' не найден в {path} (доступны: {available})")
+        _merge(settings, presets[preset], f"presets.{preset}.")
+    for name, (section, key, convert) in ENV_OVERRIDES.items():
+        if env.get(name):
+            try:
+                settings[section][key] = convert(env[name])
+            except ValueError:
+                raise ConfigError(f"{name}={env[name]!r}: неверное значение")
+    _merge(settings, overrides or {})
+    validate(settings)
+    config = _namespace(settings)
+    config.settings = settings
+    config.preset = preset
+    return config
+
+
+def presets(path=CONFIG_FILE):
+    """Имена пресетов из файла"""
+    return sorted(read_file(path).get("presets", {}))
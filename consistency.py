@@ -0,0 +1,153 @@
+# САМОСОГЛАСОВАННАЯ ОЦЕНКА С КАЛИБРОВКОЙ ПО ЯКОРЯМ
+# Скор из score_batch зависит от соседей по батчу и случайности сэмплинга:
+# один и тот же профиль получает 60 в одном батче и 85 в другом - а от порога
+# 50 зависит, будут ли для него сообщения. В этом режиме каждый лид
+# оценивается в k перемешанных батчах, итог - медиана. В каждый батч
+# подмешиваются якорные профили с известным скором: их сдвиг (медиана
+# "получено - ожидалось") вычитается из скоров этого батча. Каждый вызов
+# учитывается, чтобы было видно, сколько квоты стоит стабильность.
+
+import time
+
+import numpy as np
+
+SCORE_K = 3  # Сколько раз оценивать каждого лида
+MAX_CALIBRATION_SHIFT = 20  # Сдвиг батча по якорям больше N - считаем выбросом и обрезаем
+THRESHOLDS = (50, 80)  # Для отчёта: сколько лидов "прыгают" через порог между прогонами
+
+# Якоря по рубрикам (имя промпта оценки): (Имя, Фамилия, Суммарное описание,
+# ожидаемый скор). Ожидаемые скоры - середины диапазонов своей рубрики: рубрики
+# расходятся (разработчик - 10 у CodexAI и заметно выше у ДМ Лидс), поэтому
+# якоря одной нельзя использовать для другой. Нет якорей - нет калибровки, и
+# config.validate не пускает score.k > 1
+CODEXAI_ANCHORS = [
+    ("Ирина", "Смирнова", "Ирина Смирнова - владелица салона красоты «Лаванда» в Казани. "
+     "Сайта у салона нет, запись ведётся через директ.", 90),
+    ("Олег", "Петров", "Олег Петров - маркетолог в строительной компании, ведёт рекламу "
+     "и соцсети компании.", 50),
+    ("Анна", "Волкова", "Анна Волкова - студентка, личный аккаунт, пишет о путешествиях.", 15),
+    ("Дмитрий", "Козлов", "Дмитрий Козлов - frontend-разработчик, делает сайты на React на заказ.", 10),
+]
+ANCHOR_SETS = {
+    "score_codexai": CODEXAI_ANCHORS,
+}
+
+
+class AnchorRecord:
+    """Якорный профиль в батче (интерфейс .get как у LeadRecord)"""
+    __slots__ = ("name", "surname", "summary", "expected")
+
+    def __init__(self, name, surname, summary, expected):
+        self.name = name
+        self.surname = surname
+        self.summary = summary
+        self.expected = expected
+
+    def get(self, column, default=None):
+        return {'Имя': self.name, 'Фамилия': self.surname, 'Суммарное описание': self.summary}.get(column, default)
+
+
+def has_anchors(rubric):
+    return bool(ANCHOR_SETS.get(rubric))
+
+
+def anchor_records(rubric):
+    """Якоря рубрики (имя промпта оценки, например score_codexai)"""
+    if not has_anchors(rubric):
+        raise KeyError(f"Для рубрики '{rubric}' нет якорей (consistency.ANCHOR_SETS)")
+    return [AnchorRecord(*profile) for profile in ANCHOR_SETS[rubric]]
+
+
+def calibration_shift(batch, scores, anchor_slots):
+    """Сдвиг батча: медиана (получено - ожидалось) по оценённым якорям; 0 - якорей нет"""
+    deltas = [scores[slot] - batch[slot].expected for slot in anchor_slots if slot in scores]
+    if not deltas:
+        return 0.0
+    return float(np.clip(np.median(deltas), -MAX_CALIBRATION_SHIFT, MAX_CALIBRATION_SHIFT))
+
+
+def score_consistent(records, score_fn, batch_size, anchors, k=SCORE_K, seed=None):
+    """Оценить records k раз в перемешанных батчах с якорями рубрики (anchor_records).
+    score_fn(batch_data, batch_num) -> ({отн. индекс: скор} | None, модель);
+    модель None - батч не отправлялся и в стоимость не входит.
+    Возвращает {"scores": медианы (NaN - ни одной оценки), "models": модель на
+    лида, "samples": списки скоров, "stats": стоимость и стабильность}"""
+    rng = np.random.default_rng(seed)
+    leads_per_batch = max(batch_size - len(anchors), 1)
+    samples = [[] for _ in records]
+    models = [None] * len(records)
+    calls = []
+
+    batch_num = 0
+    for round_num in range(k):
+        order = rng.permutation(len(records))
+        for start in range(0, len(order), leads_per_batch):
+            slots = order[start:start + leads_per_batch].tolist()
+            # Якоря - в случайных местах батча, чтобы модель не научилась их позиции
+            batch = [records[slot] for slot in slots] + anchors
+            shuffle = rng.permutation(len(batch))
+            batch = [batch[i] for i in shuffle]
+            owner = [slots[i] if i < len(slots) else None for i in shuffle]
+            anchor_slots = [pos for pos, slot in enumerate(owner) if slot is None]
+
+            batch_num += 1
+            started = time.perf_counter()
+            scores, model = score_fn(batch, batch_num)
+            if model is None:
+                continue  # Батч не отправлялся (например, кончилась квота)
+            scores = scores or {}
+            shift = calibration_shift(batch, scores, anchor_slots)
+
+            scored = 0
+            for pos, score in scores.items():
+                if 0 <= pos < len(owner) and owner[pos] is not None:
+                    slot = owner[pos]
+                    samples[slot].append(float(np.clip(score - shift, 0, 100)))
+                    models[slot] = models[slot] or model
+                    scored += 1
+            calls.append({"round": round_num + 1, "batch": batch_num, "model": model,
+                          "rows": len(batch), "anchors": len(anchor_slots), "scored": scored,
+                          "shift": round(shift, 1), "seconds": round(time.perf_counter() - started, 2)})
+
+    medians = np.array([np.median(s) if s else np.nan for s in samples])
+    return {"scores": medians, "models": models, "samples": samples,
+            "stats": consistency_stats(samples, calls, batch_size, k)}
+
+
+def consistency_stats(samples, calls, batch_size, k):
+    """Стоимость (вызовы, строки, доля якорей) и стабильность (разброс, прыжки через порог)"""
+    scored = [s for s in samples if s]
+    spreads = [max(s) - min(s) for s in scored if len(s) > 1]
+    crossing = sum(1 for s in scored if any(min(s) < t <= max(s) for t in THRESHOLDS))
+    rows_sent = sum(call["rows"] for call in calls)
+    anchor_rows = sum(call["anchors"] for call in calls)
+    single_pass_calls = (len(samples) + batch_size - 1) // batch_size
+    shifts = [abs(call["shift"]) for call in calls if call["anchors"]]
+    return {
+        "k": k,
+        "leads": len(samples),
+        "scored": len(scored),
+        "calls": len(calls),
+        "single_pass_calls": single_pass_calls,
+        "calls_per_lead": round(len(calls) / len(samples), 3) if samples else 0.0,
+        "rows_sent": rows_sent,
+        "anchor_share": round(anchor_rows / rows_sent, 3) if rows_sent else 0.0,
+        "mean_shift": round(float(np.mean(shifts)), 1) if shifts else 0.0,
+        "mean_spread": round(float(np.mean(spreads)), 1) if spreads else 0.0,
+        "threshold_crossing": crossing,
+        "seconds": round(sum(call["seconds"] for call in calls), 1),
+        "per_call": calls,
+    }
+
+
+def print_consistency_report(stats):
+    """Во что обошлась стабильность и что она дала"""
+    extra = max(stats["calls"] - stats["single_pass_calls"], 0)
+    print(f"Самосогласование (k={stats['k']}): оценено {stats['scored']} из {stats['leads']}")
+    print(f"  Вызовов: {stats['calls']} (одиночный проход - {stats['single_pass_calls']}, "
+          f"доплата {extra}) | {stats['calls_per_lead']} на лида | {stats['seconds']} с")
+    print(f"  Строк отправлено: {stats['rows_sent']}, из них якорей {stats['anchor_share']:.1%}")
+    print(f"  Средний сдвиг батча по якорям: {stats['mean_shift']}")
+    print(f"  Средний разброс скора между прогонами: {stats['mean_spread']} | "
+          f"прыгали через порог {'/'.join(map(str, THRESHOLDS))}: {stats['threshold_crossing']} "
+          f"(для них решает медиана)")
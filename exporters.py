@@ -0,0 +1,178 @@
+# ПОТОКОВЫЕ ВЫГРУЗКИ (JSON / NDJSON / CSV / XLSX)
+# Данные идут кусками (DataFrame) за один проход: каждый кусок получают все
+# писатели, в памяти держится только текущий кусок. JSON пишется построчно без
+# indent, CSV - модулем csv, XLSX - openpyxl в режиме write-only.
+# При parallel=True каждый писатель работает в своём потоке с очередью кусков.
+
+import csv
+import json
+import queue
+import threading
+
+import pandas as pd
+
+PARALLEL_QUEUE_SIZE = 4  # Кусков в очереди писателя (ограничивает память)
+DESCRIPTION_LIMIT = 150  # Символов суммарайза в JSON-выгрузке
+
+
+def _text(chunk, column):
+    if column not in chunk.columns:
+        return pd.Series("", index=chunk.index)
+    return chunk[column].fillna("").astype(str).str.strip()
+
+
+def lead_records(chunk, start_rank=1):
+    """Записи лидов для JSON: колонки готовятся целиком, без iterrows"""
+    ids = pd.to_numeric(chunk['ID'], errors='coerce')
+    records = pd.DataFrame({
+        "rank": range(start_rank, start_rank + len(chunk)),
+        "score": pd.to_numeric(chunk['Интерес'], errors='coerce').round().astype('Int64'),
+        "id": ids.map(lambda v: str(int(v)) if pd.notna(v) else ""),
+        "name": _text(chunk, 'Имя'),
+        "surname": _text(chunk, 'Фамилия'),
+        "username": _text(chunk, 'Юзернейм'),
+        "description": _text(chunk, 'Суммарное описание').str.slice(0, DESCRIPTION_LIMIT),
+        "is_premium": _text(chunk, 'Премиум').eq('Да'),
+        "collection_date": _text(chunk, 'Дата сбора'),
+    })
+    return [
+        {**record, "score": int(record["score"]) if pd.notna(record["score"]) else None}
+        for record in records.to_dict('records')
+    ]
+
+
+def _scored(chunk):
+    return chunk[pd.to_numeric(chunk['Интерес'], errors='coerce').notna()]
+
+
+# ============ ПИСАТЕЛИ ============
+class JsonWriter:
+    """{"metadata": ..., "users": [...]} - по одному пользователю на строку.
+    В файл попадают только оценённые лиды"""
+    def __init__(self, path, metadata):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+        self.file.write('{"metadata": ' + json.dumps(metadata, ensure_ascii=False) + ',\n"users": [\n')
+        self.count = 0
+
+    def write(self, chunk):
+        for record in lead_records(_scored(chunk), self.count + 1):
+            if self.count:
+                self.file.write(",\n")
+            self.file.write(json.dumps(record, ensure_ascii=False))
+            self.count += 1
+
+    def close(self):
+        self.file.write("\n]}\n")
+        self.file.close()
+
+
+class NdjsonWriter:
+    """Один оценённый лид - одна строка JSON (удобно для jq и дозагрузки)"""
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+        self.count = 0
+
+    def write(self, chunk):
+        records = lead_records(_scored(chunk), self.count + 1)
+        self.file.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        self.count += len(records)
+
+    def close(self):
+        self.file.close()
+
+
+class CsvWriter:
+    """CSV выбранных колонок (utf-8-sig - чтобы Excel открыл кириллицу)"""
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.file = open(path, 'w', encoding='utf-8-sig', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+        self.count = 0
+
+    def write(self, chunk):
+        values = chunk.reindex(columns=self.columns).astype(object)
+        values = values.where(values.notna(), "")
+        self.writer.writerows(values.itertuples(index=False, name=None))
+        self.count += len(values)
+
+    def close(self):
+        self.file.close()
+
+
+class XlsxWriter:
+    """XLSX в режиме write-only openpyxl: строки не держатся в памяти листа"""
+    def __init__(self, path, columns=None):
+        self.path = path
+        self.columns = columns
+        import openpyxl  # ~0.1 с на импорт - только когда Excel действительно пишется
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet()
+        if columns is not None:
+            self.sheet.append(columns)
+        self.count = 0
+
+    def write(self, chunk):
+        if self.columns is None:
+            # Колонки не заданы - берём из первого куска
+            self.columns = list(chunk.columns)
+            self.sheet.append(self.columns)
+        values = chunk.reindex(columns=self.columns).astype(object)
+        values = values.where(values.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            self.sheet.append(row)
+        self.count += len(values)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+# ============ ОДИН ПРОХОД ============
+def _writer_thread(writer, chunks, errors):
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            writer.write(chunk)
+    except Exception as e:
+        errors.append(e)
+        # Дочитываем очередь, чтобы не заблокировать поставщика кусков
+        while chunks.get() is not None:
+            pass
+
+
+def export(frames, writers, parallel=False):
+    """Прогнать куски frames через всех писателей за один проход"""
+    if not parallel:
+        try:
+            for chunk in frames:
+                for writer in writers:
+                    writer.write(chunk)
+        finally:
+            for writer in writers:
+                writer.close()
+        return
+
+    errors = []
+    queues = [queue.Queue(maxsize=PARALLEL_QUEUE_SIZE) for _ in writers]
+    threads = [threading.Thread(target=_writer_thread, args=(w, q, errors), daemon=True)
+               for w, q in zip(writers, queues)]
+    for thread in threads:
+        thread.start()
+    try:
+        for chunk in frames:
+            for q in queues:
+                q.put(chunk)
+    finally:
+        for q in queues:
+            q.put(None)
+        for thread in threads:
+            thread.join()
+        for writer in writers:
+            writer.close()
+    if errors:
+        raise errors[0]
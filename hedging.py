@@ -0,0 +1,131 @@
+# ДЕДЛАЙНЫ И ХЕДЖИРОВАНИЕ ЗАПРОСОВ
+# Каждый вызов generate_content получает дедлайн. Если ответа нет дольше p95
+# латентности этапа, дубликат уходит с другого ключа (только если есть запас
+# квоты) - используется тот ответ, что пришёл первым.
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Дедлайн одного запроса (секунды) - передаётся в request_options и ограничивает ожидание
+REQUEST_TIMEOUT = 60
+
+# Значения по умолчанию; в пайплайне - api.hedge* из pipeline.toml
+HEDGE_ENABLED = True
+HEDGE_QUANTILE = 0.95
+HEDGE_MIN_SAMPLES = 20  # Пока замеров меньше, p95 неизвестен и хеджирования нет
+HEDGE_MIN_DELAY = 2.0  # Не хеджировать раньше этого времени, даже если p95 меньше
+HEDGE_WINDOW = 200  # Сколько последних латентностей хранить на этап
+
+
+class LatencyWindow:
+    """Последние латентности по этапам для оценки квантилей"""
+    def __init__(self, size=HEDGE_WINDOW, min_samples=HEDGE_MIN_SAMPLES):
+        self.size = size
+        self.min_samples = min_samples
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def add(self, stage, latency):
+        with self.lock:
+            window = self.samples.get(stage)
+            if window is None:
+                window = self.samples[stage] = deque(maxlen=self.size)
+            window.append(latency)
+
+    def quantile(self, stage, q):
+        with self.lock:
+            window = list(self.samples.get(stage, ()))
+        if len(window) < self.min_samples:
+            return None
+        window.sort()
+        return window[min(int(len(window) * q), len(window) - 1)]
+
+
+class Hedger:
+    """Выполняет вызовы с дедлайном и, при необходимости, с дубликатом"""
+    def __init__(self, max_workers=16, timeout=REQUEST_TIMEOUT, enabled=HEDGE_ENABLED,
+                 quantile=HEDGE_QUANTILE, min_delay=HEDGE_MIN_DELAY, min_samples=HEDGE_MIN_SAMPLES):
+        self.timeout = timeout
+        self.enabled = enabled
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.latencies = LatencyWindow(min_samples=min_samples)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self.lock = threading.Lock()
+        self.stats = {"calls": 0, "hedged": 0, "hedge_won": 0, "hedge_skipped": 0, "timeouts": 0}
+
+    def _count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def _timed(self, stage, fn):
+        def run():
+            started = time.perf_counter()
+            result = fn()
+            self.latencies.add(stage, time.perf_counter() - started)
+            return result
+        return run
+
+    def hedge_delay(self, stage):
+        """Через сколько секунд отправлять дубликат (None - не хеджировать)"""
+        if not self.enabled:
+            return None
+        p95 = self.latencies.quantile(stage, self.quantile)
+        if p95 is None:
+            return None
+        return max(p95, self.min_delay)
+
+    def run(self, stage, primary, backup_factory=None):
+        """primary() -> ответ. backup_factory() -> функция-дубликат или None,
+        если запаса квоты нет (фабрика сама резервирует слот в лимитере)"""
+        self._count("calls")
+        primary_future = self.executor.submit(self._timed(stage, primary))
+        delay = self.hedge_delay(stage) if backup_factory is not None else None
+
+        if delay is None or delay >= self.timeout:
+            return self._result(primary_future, self.timeout)
+
+        done, _ = wait([primary_future], timeout=delay)
+        if done:
+            return primary_future.result()
+
+        backup = backup_factory()
+        if backup is None:
+            self._count("hedge_skipped")
+            return self._result(primary_future, self.timeout - delay)
+
+        self._count("hedged")
+        backup_future = self.executor.submit(self._timed(stage, backup))
+        pending = {primary_future, backup_future}
+        deadline = time.monotonic() + self.timeout - delay
+        first_error = None
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is backup_future:
+                        self._count("hedge_won")
+                    return future.result()
+                first_error = first_error or future.exception()
+        if first_error is not None and not pending:
+            raise first_error
+        self._count("timeouts")
+        raise TimeoutError(f"Дедлайн {self.timeout}с истёк ({stage})")
+
+    def _result(self, future, timeout):
+        done, _ = wait([future], timeout=timeout)
+        if not done:
+            self._count("timeouts")
+            raise TimeoutError(f"Дедлайн {self.timeout}с истёк")
+        return future.result()
+
+    def summary(self):
+        with self.lock:
+            return dict(self.stats)
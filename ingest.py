@@ -0,0 +1,175 @@
+# ИНКРЕМЕНТАЛЬНЫЙ ИМПОРТ ВЫГРУЗОК ЧАТОВ
+# Новые chat_users_*.xlsx вливаются в хранилище лидов по ID (или Юзернейм,
+# если ID нет, или имени, если нет и его). Профиль, у которого изменилось
+# имя/фамилия/описание (по хэшу), теряет суммарайз, скор и сообщения - и
+# снова попадает в очередь пайплайна.
+# Новые профили добавляются пустыми, у неизменённых только обновляются поля
+# профиля (Премиум, Дата сбора...) без повторной обработки: стоимость
+# ежедневного импорта зависит от числа изменений, а не от размера выгрузки.
+#
+# Хранилище и seed-файлы - store.file / store.seed_files из pipeline.toml
+# (с учётом пресета), как у пайплайна.
+#
+# Запуск: python ingest.py chat_users_20251211.xlsx [ещё выгрузки...] [--preset NAME] [--store FILE]
+
+import argparse
+import glob
+import hashlib
+import os
+
+import pandas as pd
+
+from config import CONFIG_FILE, ConfigError, load_config
+from leadstore import open_store, lead_keys
+
+# ============ НАСТРОЙКИ ============
+EXPORT_PATTERN = 'chat_users_*.xlsx'  # Если выгрузки не указаны явно
+
+HASH_COLUMN = 'Хэш профиля'
+SOURCE_COLUMN = 'Источник'  # Файл выгрузки, из которого лид пришёл впервые
+# Поля профиля из выгрузки (обновляются у всех совпавших лидов)
+PROFILE_COLUMNS = ['ID', 'Имя', 'Фамилия', 'Полное имя', 'Юзернейм', 'Премиум', 'Бот',
+                   'Дата сбора', 'Описание профиля', 'Номер телефона']
+# Поля, от которых зависит результат пайплайна (их изменение ставит профиль в очередь)
+HASHED_COLUMNS = ['Имя', 'Фамилия', 'Описание профиля']
+# Производные поля - очищаются у изменившихся профилей
+DERIVED_COLUMNS = ['Суммарное описание', 'Интерес', 'Сообщение 1', 'Сообщение 2']
+
+
+# ============ КЛЮЧИ И ХЭШИ ============
+def _text(df, column):
+    if column not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[column].fillna("").astype(str).str.strip()
+
+
+def profile_hashes(df):
+    """Хэш полей профиля, влияющих на суммарайз и оценку"""
+    columns = [_text(df, c) for c in HASHED_COLUMNS]
+    return pd.Series(
+        [hashlib.sha1("\x1f".join(values).encode('utf-8')).hexdigest()[:16]
+         for values in zip(*columns)],
+        index=df.index, dtype=object,
+    )
+
+
+# ============ СЛИЯНИЕ ============
+def merge_export(master, export, source=None):
+    """Влить выгрузку в мастер (source - имя выгрузки для новых лидов).
+    Возвращает (новый мастер, статистика)"""
+    stats = {"rows": len(export), "new": 0, "changed": 0, "unchanged": 0, "no_key": 0}
+
+    export = export.reset_index(drop=True)
+    export_keys = lead_keys(export)
+    stats["no_key"] = int(export_keys.isna().sum())
+    # В одной выгрузке пользователь может встретиться несколько раз - берём последнюю запись
+    keep = export_keys.notna() & ~export_keys.duplicated(keep='last')
+    export = export[keep].reset_index(drop=True)
+    export_keys = export_keys[keep].reset_index(drop=True)
+    export_hashes = profile_hashes(export)
+
+    master_keys = lead_keys(master)
+    first = master_keys.notna() & ~master_keys.duplicated(keep='first')
+    master_pos = pd.Series(master.index[first], index=master_keys[first])
+
+    positions = export_keys.map(master_pos)
+    is_new = positions.isna()
+    matched = ~is_new
+    matched_pos = positions[matched].astype('int64').to_numpy()
+
+    changed = pd.Series(False, index=export.index)
+    changed[matched] = master[HASH_COLUMN].iloc[matched_pos].fillna("").to_numpy() != export_hashes[matched].to_numpy()
+
+    columns = [c for c in PROFILE_COLUMNS if c in export.columns]
+    for column in columns:
+        if column not in master.columns:
+            master[column] = None
+    if matched.any():
+        labels = master.index[matched_pos]
+        # ID совпал по определению; остальные поля профиля берём из свежей выгрузки
+        for column in columns:
+            if column == 'ID':
+                continue
+            values = export.loc[matched, column].to_numpy()
+            if master[column].dtype != values.dtype:
+                master[column] = master[column].astype(object)
+            master.loc[labels, column] = values
+        master.loc[labels, HASH_COLUMN] = export_hashes[matched].to_numpy()
+    if changed.any():
+        changed_labels = master.index[positions[changed].astype('int64').to_numpy()]
+        for column in DERIVED_COLUMNS:
+            if column in master.columns:
+                master.loc[changed_labels, column] = None
+
+    if is_new.any():
+        new_rows = export.loc[is_new, columns].copy()
+        new_rows[HASH_COLUMN] = export_hashes[is_new]
+        new_rows[SOURCE_COLUMN] = source
+        master = pd.concat([master, new_rows], ignore_index=True)
+
+    stats["new"] = int(is_new.sum())
+    stats["changed"] = int(changed.sum())
+    stats["unchanged"] = int(matched.sum()) - stats["changed"]
+    return master, stats
+
+
+def prepare_master(master):
+    """Колонки пайплайна и хэши профилей у мастер-таблицы"""
+    for column in DERIVED_COLUMNS + [HASH_COLUMN]:
+        if column not in master.columns:
+            master[column] = None
+    master = master.reset_index(drop=True)
+    # Строки старых запусков без хэша: считаем их актуальными на момент импорта
+    missing = master[HASH_COLUMN].isna()
+    if missing.any():
+        master[HASH_COLUMN] = master[HASH_COLUMN].astype(object)
+        master.loc[missing, HASH_COLUMN] = profile_hashes(master[missing])
+    return master
+
+
+def ingest(exports, store_file, seed_files=()):
+    """Влить выгрузки по очереди (seed_files - чем заполнить пустое хранилище);
+    возвращает суммарную статистику"""
+    store = open_store(store_file, seed_files)
+    master = prepare_master(store.load_frame())
+    total = {"rows": 0, "new": 0, "changed": 0, "unchanged": 0, "no_key": 0}
+    for path in exports:
+        master, stats = merge_export(master, pd.read_excel(path), os.path.basename(path))
+        print(f"📥 {path}: строк {stats['rows']} | новых {stats['new']} | изменённых {stats['changed']} | "
+              f"без изменений {stats['unchanged']} | пустых (без ключа) {stats['no_key']}")
+        for name, value in stats.items():
+            total[name] += value
+    # Одна транзакция: изменённые профили получают статус new, новые добавляются
+    store.upsert_frame(master)
+    store.close()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Влить выгрузки чатов в хранилище лидов")
+    parser.add_argument("exports", nargs="*", help=f"Файлы выгрузок (по умолчанию {EXPORT_PATTERN})")
+    parser.add_argument("--config", default=CONFIG_FILE, help=f"Файл конфигурации (по умолчанию {CONFIG_FILE})")
+    parser.add_argument("--preset", help="Пресет из [presets.*] конфигурации (ai, batch, ...)")
+    parser.add_argument("--store", help="Хранилище (по умолчанию store.file из конфигурации)")
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config, args.preset,
+                             overrides={"store": {"file": args.store}} if args.store else None)
+    except ConfigError as e:
+        print(f"❌ {e}")
+        return
+
+    exports = args.exports or sorted(glob.glob(EXPORT_PATTERN))
+    if not exports:
+        print(f"❌ Нет выгрузок ({EXPORT_PATTERN})")
+        return
+
+    total = ingest(exports, config.store.file, config.store.seed_files)
+    print(f"\n✅ Хранилище: {config.store.file}")
+    print(f"В очередь пайплайна: {total['new'] + total['changed']} "
+          f"(новых {total['new']}, изменённых {total['changed']}), без изменений: {total['unchanged']}")
+
+
+if __name__ == "__main__":
+    main()
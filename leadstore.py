@@ -0,0 +1,302 @@
+# ХРАНИЛИЩЕ ЛИДОВ (SQLite)
+# Профиль, суммарайз, скор, сообщения, провенанс и статус обработки в одной
+# таблице с индексами по ID, скору и статусу. Пайплайны читают и пишут через
+# него: сохраняются только изменённые строки, а не весь xlsx целиком;
+# "горячие лиды без сообщений" - выборка по индексу (status, score).
+# Excel остаётся форматом импорта (seed) и экспорта для людей.
+
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Статусы обработки (по самому продвинутому заполненному полю)
+STATUS_NEW = 'new'
+STATUS_SUMMARIZED = 'summarized'
+STATUS_SCORED = 'scored'
+STATUS_MESSAGED = 'messaged'
+
+# (колонка DataFrame, колонка SQL, тип)
+FIELDS = [
+    ('ID', 'tg_id', 'INTEGER'),
+    ('Имя', 'first_name', 'TEXT'),
+    ('Фамилия', 'last_name', 'TEXT'),
+    ('Полное имя', 'full_name', 'TEXT'),
+    ('Юзернейм', 'username', 'TEXT'),
+    ('Премиум', 'premium', 'TEXT'),
+    ('Бот', 'bot', 'TEXT'),
+    ('Дата сбора', 'collected_at', 'TEXT'),
+    ('Описание профиля', 'description', 'TEXT'),
+    ('Номер телефона', 'phone', 'TEXT'),
+    ('Суммарное описание', 'summary', 'TEXT'),
+    ('Интерес', 'score', 'REAL'),
+    ('Сообщение 1', 'message_1', 'TEXT'),
+    ('Сообщение 2', 'message_2', 'TEXT'),
+    ('Хэш профиля', 'profile_hash', 'TEXT'),
+    ('Промпт оценки', 'score_prompt', 'TEXT'),
+    ('Модель оценки', 'score_model', 'TEXT'),
+    ('Хэш оценки', 'score_hash', 'TEXT'),
+    ('Источник', 'source', 'TEXT'),
+]
+SQL_NAMES = {column: sql for column, sql, _ in FIELDS}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS leads (
+    lead_key TEXT PRIMARY KEY,
+    {", ".join(f"{sql} {kind}" for _, sql, kind in FIELDS)},
+    status TEXT NOT NULL DEFAULT '{STATUS_NEW}',
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_leads_tg_id ON leads (tg_id);
+CREATE INDEX IF NOT EXISTS idx_leads_score ON leads (score);
+CREATE INDEX IF NOT EXISTS idx_leads_status_score ON leads (status, score);
+CREATE INDEX IF NOT EXISTS idx_leads_premium_score ON leads (premium, score);
+
+-- Полнотекстовый индекс по суммарайзу и описанию (unicode61 сворачивает регистр кириллицы)
+CREATE VIRTUAL TABLE IF NOT EXISTS leads_fts USING fts5(
+    summary, description, content='leads', content_rowid='rowid', tokenize='unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS leads_fts_insert AFTER INSERT ON leads BEGIN
+    INSERT INTO leads_fts (rowid, summary, description) VALUES (new.rowid, new.summary, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS leads_fts_delete AFTER DELETE ON leads BEGIN
+    INSERT INTO leads_fts (leads_fts, rowid, summary, description)
+    VALUES ('delete', old.rowid, old.summary, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS leads_fts_update AFTER UPDATE OF summary, description ON leads BEGIN
+    INSERT INTO leads_fts (leads_fts, rowid, summary, description)
+    VALUES ('delete', old.rowid, old.summary, old.description);
+    INSERT INTO leads_fts (rowid, summary, description) VALUES (new.rowid, new.summary, new.description);
+END;
+"""
+
+
+# ============ КЛЮЧИ И СТАТУСЫ ============
+def _text(df, column):
+    if column not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[column].fillna("").astype(str).str.strip()
+
+
+# Поля профиля для ключа лида без ID и юзернейма: только имя - описание
+# меняется между выгрузками, и это изменение ловит хэш профиля (ingest.py)
+NAME_KEY_COLUMNS = ['Имя', 'Фамилия', 'Полное имя']
+
+
+def lead_keys(df):
+    """Ключ лида: 'id:<ID>', иначе 'u:<юзернейм>', иначе 'p:<хэш имени>';
+    None - если нет и имени (такую строку не с чем сопоставить)"""
+    names = [_text(df, c).mask(lambda s: s.str.lower().isin(["nan", "none", "null"]), "")
+             for c in NAME_KEY_COLUMNS]
+    name_keys = pd.Series(
+        [("p:" + hashlib.sha1("\x1f".join(values).encode('utf-8')).hexdigest()[:16]) if any(values) else None
+         for values in zip(*names)],
+        index=df.index, dtype=object,
+    )
+    if 'ID' in df.columns:
+        ids = pd.to_numeric(df['ID'], errors='coerce')
+    else:
+        ids = pd.Series(float('nan'), index=df.index)
+    usernames = _text(df, 'Юзернейм').str.lower().str.lstrip('@')
+
+    keys = name_keys
+    has_username = usernames.ne("") & usernames.ne("nan")
+    keys[has_username] = "u:" + usernames[has_username]
+    has_id = ids.notna()
+    keys[has_id] = "id:" + ids[has_id].astype('int64').astype(str)
+    return keys
+
+
+def _filled(df, column):
+    text = _text(df, column)
+    return (text.ne("") & ~text.str.lower().isin(["nan", "none", "null"])).to_numpy()
+
+
+def lead_statuses(df):
+    """Статус каждой строки df по заполненным полям"""
+    if 'Интерес' in df.columns:
+        scored = pd.to_numeric(df['Интерес'], errors='coerce').notna().to_numpy()
+    else:
+        scored = np.zeros(len(df), dtype=bool)
+    return np.select(
+        [_filled(df, 'Сообщение 1'), scored, _filled(df, 'Суммарное описание')],
+        [STATUS_MESSAGED, STATUS_SCORED, STATUS_SUMMARIZED],
+        default=STATUS_NEW,
+    )
+
+
+def _sql_value(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, pd.Timestamp):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+
+# ============ ХРАНИЛИЩЕ ============
+class LeadStore:
+    """Потокобезопасная обёртка над SQLite-файлом лидов"""
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL: читатели (query CLI, дашборды) не блокируют запись пайплайна
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        has_fts = self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'leads_fts'").fetchone()
+        self.conn.executescript(SCHEMA)
+        self._add_missing_columns()
+        if not has_fts:
+            # Хранилище создано до появления полнотекстового индекса - заполняем его
+            with self.conn:
+                self.conn.execute("INSERT INTO leads_fts (leads_fts) VALUES ('rebuild')")
+
+    def _add_missing_columns(self):
+        # Хранилище создано старой версией FIELDS - добавляем новые колонки
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(leads)")}
+        with self.conn:
+            for _, sql, kind in FIELDS:
+                if sql not in existing:
+                    self.conn.execute(f"ALTER TABLE leads ADD COLUMN {sql} {kind}")
+
+    def count(self, where=None, params=()):
+        sql = "SELECT COUNT(*) FROM leads" + (f" WHERE {where}" if where else "")
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()[0]
+
+    def count_by_status(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM leads GROUP BY status").fetchall()
+        return dict(rows)
+
+    def upsert_frame(self, df):
+        """Вставить/обновить строки df по ключу лида. Обновляются только колонки,
+        которые есть в df. Возвращает число записанных строк"""
+        if df.empty:
+            return 0
+        keys = lead_keys(df)
+        valid = keys.notna().to_numpy()
+        if not valid.all():
+            print(f"⚠️  Пропущено строк без ID, юзернейма и имени: {int((~valid).sum())}")
+        if not valid.any():
+            return 0
+        df = df[valid]
+        columns = [c for c, _, _ in FIELDS if c in df.columns]
+        names = ["lead_key"] + [SQL_NAMES[c] for c in columns] + ["status", "updated_at"]
+        sql = (
+            f"INSERT INTO leads ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+            f"ON CONFLICT(lead_key) DO UPDATE SET "
+            + ", ".join(f"{name} = excluded.{name}" for name in names[1:])
+        )
+
+        values = df[columns].astype(object).to_numpy()
+        statuses = lead_statuses(df)
+        updated_at = datetime.now().isoformat(timespec='seconds')
+        id_pos = columns.index('ID') if 'ID' in columns else None
+        rows = []
+        for key, row, status in zip(keys[valid], values, statuses):
+            row = [_sql_value(v) for v in row]
+            if id_pos is not None and row[id_pos] is not None:
+                row[id_pos] = int(row[id_pos])
+            rows.append([key] + row + [str(status), updated_at])
+
+        with self.lock, self.conn:
+            self.conn.executemany(sql, rows)
+        return len(rows)
+
+    @staticmethod
+    def _select_sql(where=None, order_by=None):
+        select = ", ".join(f'{sql} AS "{column}"' for column, sql, _ in FIELDS)
+        sql = f"SELECT {select} FROM leads"
+        if where:
+            sql += f" WHERE {where}"
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+        return sql
+
+    def load_frame(self, where=None, params=(), order_by="rowid", limit=None, offset=0):
+        """Строки как DataFrame с колонками как в xlsx (по умолчанию - все, в порядке вставки)"""
+        sql = self._select_sql(where, order_by)
+        if limit is not None:
+            sql += f" LIMIT {int(limit)} OFFSET {int(offset)}"
+        with self.lock:
+            return pd.read_sql_query(sql, self.conn, params=params)
+
+    def iter_frames(self, where=None, params=(), order_by="rowid", chunk_size=5000):
+        """Строки кусками по chunk_size (DataFrame) - для потоковых выгрузок.
+        Читает через отдельное соединение: в WAL запись пайплайна не блокируется"""
+        sql = self._select_sql(where, order_by)
+        conn = sqlite3.connect(self.path)
+        try:
+            yield from pd.read_sql_query(sql, conn, params=params, chunksize=chunk_size)
+        finally:
+            conn.close()
+
+    def hot_without_messages(self, min_score=80, limit=None):
+        """Оценённые лиды со скором >= min_score без сообщений (по индексу status, score)"""
+        return self.load_frame("status = ? AND score >= ?", (STATUS_SCORED, min_score),
+                               order_by="score DESC", limit=limit)
+
+    @staticmethod
+    def filters(min_score=None, premium=False, keyword=None, not_messaged=False, status=None):
+        """WHERE и параметры для фильтров query(). keyword - слова (префиксы)
+        в суммарайзе или описании, все должны встретиться"""
+        conditions, params = [], []
+        if min_score is not None:
+            conditions.append("score >= ?")
+            params.append(min_score)
+        if premium:
+            conditions.append("premium = 'Да'")
+        if not_messaged:
+            # IN вместо != - так SQLite использует индекс (status, score)
+            conditions.append("status IN (?, ?, ?)")
+            params.extend([STATUS_NEW, STATUS_SUMMARIZED, STATUS_SCORED])
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if keyword:
+            words = [w.replace('"', '') for w in keyword.split()]
+            conditions.append("rowid IN (SELECT rowid FROM leads_fts WHERE leads_fts MATCH ?)")
+            params.append(" ".join(f'"{w}"*' for w in words if w))
+        return " AND ".join(conditions) or None, tuple(params)
+
+    def query(self, limit=20, offset=0, **filters):
+        """Лиды по фильтрам (см. filters), от высокого скора к низкому
+        (NULL в SQLite меньше любого числа - неоценённые идут в конце)"""
+        where, params = self.filters(**filters)
+        return self.load_frame(where, params, order_by="score DESC",
+                               limit=limit, offset=offset)
+
+    def import_excel(self, path):
+        """Залить xlsx в хранилище (миграция со старых файлов)"""
+        return self.upsert_frame(pd.read_excel(path))
+
+    def export_excel(self, path, order_by="score DESC"):
+        """Выгрузить всё хранилище в xlsx"""
+        df = self.load_frame(order_by=order_by)
+        df.to_excel(path, index=False)
+        return len(df)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def open_store(path, seed_files=()):
+    """Открыть хранилище; если оно пустое - залить первый существующий xlsx из seed_files"""
+    store = LeadStore(path)
+    if store.count() == 0:
+        for seed in seed_files:
+            if seed and os.path.exists(seed):
+                imported = store.import_excel(seed)
+                print(f"🗄️  Хранилище {path} создано из {seed}: {imported} лидов")
+                break
+    return store
@@ -0,0 +1,307 @@
+# ЛОКАЛЬНАЯ МОДЕЛЬ ОЦЕНКИ, ОБУЧЕННАЯ НА СКОРАХ LLM
+# Тысячи уже выставленных моделью 'Интерес' - готовая обучающая выборка.
+# TF-IDF (символьные n-граммы - устойчивы к падежам) + линейная регрессия
+# оценивают новые строки пачкой за доли секунды на CPU. В score_batch уходят
+# только неуверенные строки - прогноз рядом с порогами 50 / 80.
+# scikit-learn - необязательная зависимость: импортируется только здесь и
+# только при обучении/прогнозе; без него всё идёт в LLM, как раньше.
+#
+# Обучение + отчёт о качестве (сравнение с оценками LLM на отложенной части):
+#   python local_scorer.py --prompt score_codexai@v2/full
+#   python local_scorer.py --prompt score_dmleads@v2/full --margin 10
+# Только отчёт по уже сохранённой модели:
+#   python local_scorer.py --prompt score_codexai@v2/full --eval-only
+# Модель привязана к рубрике (ключ из 'Промпт оценки'): рубрики расходятся
+# (IT-разработчики - 25-30 у ДМ Лидс и 5-15 у CodexAI), поэтому обучение
+# только на оценках этой рубрикой, а route() не применяет модель к другой
+# рубрике и к модели, не прошедшей порог качества на отложенной части.
+
+import argparse
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from provenance import MODEL_COLUMN, PROMPT_COLUMN
+from reporting import BUCKET_EDGES, BUCKETS
+
+# ============ НАСТРОЙКИ ============
+MODEL_FILE = 'local_scorer.pkl'
+LOCAL_MODEL_NAME = 'local-tfidf'  # Пишется в 'Модель оценки' для локальных скоров
+# Откуда брать оценки LLM: хранилища и выгрузки (отсутствующие пропускаются)
+TRAIN_SOURCES = ['batch_results.db', 'leads.db', 'batch_results_scored.xlsx', 'leads_processed.xlsx']
+# Рубрика строк без провенанса (оценены до user-034) - по источнику; строки
+# без провенанса из других источников в обучение не попадают
+LEGACY_RUBRICS = {
+    'batch_results.db': 'score_dmleads',
+    'batch_results_scored.xlsx': 'score_dmleads',
+    'leads.db': 'score_codexai',
+    'leads_processed.xlsx': 'score_codexai',
+}
+TEXT_COLUMNS = ['Имя', 'Фамилия', 'Суммарное описание']  # То же, что видит LLM в score_batch
+THRESHOLDS = (50, 80)  # Пороги, где ошибка дорога: сообщения (50) и горячие (80)
+UNCERTAIN_MARGIN = 12  # Прогноз ближе N к любому порогу - строка уходит в LLM
+MIN_TRAIN_ROWS = 300  # Меньше оценённых строк - модель не обучаем
+TEST_SHARE = 0.2  # Доля отложенных строк для отчёта о качестве
+RANDOM_STATE = 42
+# Порог качества на отложенной части: хуже - route() отдаёт всё в LLM
+MIN_SPEARMAN = 0.6
+MIN_THRESHOLD_AGREEMENT = 0.9  # Та же сторона порогов 50/80 среди уверенных строк
+
+
+def _sklearn():
+    """Ленивый импорт scikit-learn (нужен только для обучения и прогноза)"""
+    try:
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import Ridge
+        from sklearn.pipeline import make_pipeline
+    except ImportError as e:
+        raise RuntimeError("Для локальной модели нужен scikit-learn: pip install scikit-learn") from e
+    return TfidfVectorizer, Ridge, make_pipeline
+
+
+def _texts(df):
+    parts = [df[c].fillna("").astype(str).str.strip() if c in df.columns else pd.Series("", index=df.index)
+             for c in TEXT_COLUMNS]
+    text = parts[0]
+    for part in parts[1:]:
+        text = text + " | " + part
+    return text.str.lower()
+
+
+# ============ ОБУЧАЮЩАЯ ВЫБОРКА ============
+def rubric_name(prompt_key):
+    """score_codexai@v2/full -> score_codexai"""
+    return str(prompt_key or "").split("@", 1)[0].split("/", 1)[0]
+
+
+def load_training_rows(prompt_key, sources=None):
+    """Строки с оценкой LLM рубрикой prompt_key из всех источников (без
+    локальных скоров и дублей). Строки без провенанса - только если рубрика
+    их источника в LEGACY_RUBRICS совпадает с рубрикой prompt_key"""
+    from leadstore import LeadStore
+
+    if not prompt_key:
+        raise ValueError("Нужен ключ рубрики (например score_codexai@v2/full)")
+    frames = []
+    for source in sources or TRAIN_SOURCES:
+        if not os.path.exists(source):
+            continue
+        if source.endswith('.db'):
+            store = LeadStore(source)
+            frame = store.load_frame()
+            store.close()
+        else:
+            frame = pd.read_excel(source)
+        legacy = LEGACY_RUBRICS.get(os.path.basename(source)) == rubric_name(prompt_key)
+        frames.append(frame.assign(_legacy=legacy))
+    if not frames:
+        return pd.DataFrame(columns=TEXT_COLUMNS + ['Интерес'])
+
+    df = pd.concat(frames, ignore_index=True)
+    scores = pd.to_numeric(df['Интерес'], errors='coerce')
+    keep = scores.between(0, 100) & df['Суммарное описание'].notna()
+    if MODEL_COLUMN in df.columns:
+        keep &= ~df[MODEL_COLUMN].fillna("").astype(str).str.startswith(LOCAL_MODEL_NAME)
+    prompts = (df[PROMPT_COLUMN] if PROMPT_COLUMN in df.columns else pd.Series(None, index=df.index))
+    prompts = prompts.fillna("").astype(str)
+    keep &= prompts.eq(prompt_key) | (prompts.eq("") & df['_legacy'].astype(bool))
+    df = df.loc[keep].assign(**{'Интерес': scores[keep]})
+    # Одна и та же строка из хранилища и его выгрузки - один пример
+    df = df.assign(_text=_texts(df)).drop_duplicates('_text', keep='first')
+    return df.drop(columns=['_text', '_legacy']).reset_index(drop=True)
+
+
+def _pipeline():
+    TfidfVectorizer, Ridge, make_pipeline = _sklearn()
+    return make_pipeline(
+        TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 5), min_df=3,
+                        max_features=200000, sublinear_tf=True),
+        Ridge(alpha=1.0),
+    )
+
+
+def train(df, prompt_key, margin=UNCERTAIN_MARGIN):
+    """Обучить модель; отчёт - по отложенной части, сохраняемая модель - на всех строках"""
+    if not prompt_key:
+        raise ValueError("Модель обучается под одну рубрику: нужен ключ промпта")
+    if len(df) < MIN_TRAIN_ROWS:
+        raise ValueError(f"Мало оценённых строк для обучения: {len(df)} < {MIN_TRAIN_ROWS}")
+    texts = _texts(df).to_numpy()
+    scores = df['Интерес'].to_numpy(dtype=float)
+
+    order = np.random.default_rng(RANDOM_STATE).permutation(len(df))
+    test_size = max(int(len(df) * TEST_SHARE), 1)
+    test, fit = order[:test_size], order[test_size:]
+
+    model = _pipeline().fit(texts[fit], scores[fit])
+    report = evaluate(scores[test], np.clip(model.predict(texts[test]), 0, 100), margin)
+
+    started = time.perf_counter()
+    model = _pipeline().fit(texts, scores)
+    report["train_seconds"] = round(time.perf_counter() - started, 2)
+    report["train_rows"] = len(df)
+
+    bundle = {"model": model, "prompt": prompt_key, "margin": margin,
+              "trained_at": time.strftime('%Y-%m-%d %H:%M:%S'), "report": report}
+    return bundle, report
+
+
+# ============ КАЧЕСТВО ============
+def uncertain_mask(predictions, margin=UNCERTAIN_MARGIN):
+    """True - прогноз ближе margin к одному из порогов (решать должна LLM)"""
+    predictions = np.asarray(predictions, dtype=float)
+    near = np.zeros(len(predictions), dtype=bool)
+    for threshold in THRESHOLDS:
+        near |= np.abs(predictions - threshold) < margin
+    return near
+
+
+def _buckets(values):
+    return pd.cut(pd.Series(values).clip(0, 100), bins=BUCKET_EDGES, labels=BUCKETS, right=False)
+
+
+def evaluate(llm_scores, predictions, margin=UNCERTAIN_MARGIN):
+    """Сравнение прогноза с оценками LLM: ошибки, совпадение бакетов и сторон
+    порогов - на всех строках и на уверенных (тех, что не уйдут в LLM)"""
+    llm_scores = np.asarray(llm_scores, dtype=float)
+    predictions = np.asarray(predictions, dtype=float)
+    confident = ~uncertain_mask(predictions, margin)
+    same_bucket = (_buckets(llm_scores).to_numpy() == _buckets(predictions).to_numpy())
+
+    report = {
+        "rows": len(llm_scores),
+        "mae": round(float(np.mean(np.abs(predictions - llm_scores))), 1),
+        "rmse": round(float(np.sqrt(np.mean((predictions - llm_scores) ** 2))), 1),
+        "spearman": round(float(pd.Series(predictions).corr(pd.Series(llm_scores), method='spearman')), 3),
+        "bucket_agreement": round(float(same_bucket.mean()), 3),
+        "confident_share": round(float(confident.mean()), 3),
+        "confident_bucket_agreement": round(float(same_bucket[confident].mean()), 3) if confident.any() else None,
+        "thresholds": {},
+    }
+    for threshold in THRESHOLDS:
+        same_side = (predictions >= threshold) == (llm_scores >= threshold)
+        report["thresholds"][threshold] = {
+            "agreement": round(float(same_side.mean()), 3),
+            "confident_agreement": round(float(same_side[confident].mean()), 3) if confident.any() else None,
+        }
+    return report
+
+
+def print_evaluation(report):
+    """Отчёт о качестве локальной модели относительно LLM"""
+    print(f"Строк в проверке: {report['rows']}")
+    print(f"MAE: {report['mae']} | RMSE: {report['rmse']} | Спирмен: {report['spearman']}")
+    print(f"Совпадение бакетов: {report['bucket_agreement']:.1%}")
+    for threshold, entry in report["thresholds"].items():
+        confident = entry["confident_agreement"]
+        confident_text = f"{confident:.1%}" if confident is not None else "-"
+        print(f"  Порог {threshold}: та же сторона {entry['agreement']:.1%}, среди уверенных {confident_text}")
+    print(f"Уверенных (оцениваются локально): {report['confident_share']:.1%}, "
+          f"в LLM уйдёт {1 - report['confident_share']:.1%}")
+    if report["confident_bucket_agreement"] is not None:
+        print(f"Совпадение бакетов среди уверенных: {report['confident_bucket_agreement']:.1%}")
+
+
+# ============ ПРОГНОЗ И МАРШРУТИЗАЦИЯ ============
+def save_model(bundle, path=MODEL_FILE):
+    with open(path, 'wb') as f:
+        pickle.dump(bundle, f)
+
+
+def load_model(path=MODEL_FILE):
+    """Сохранённая модель или None (нет файла / не установлен scikit-learn)"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except ImportError:
+        return None
+
+
+def predict(bundle, df):
+    """Скоры 0-100 для всех строк df"""
+    if df.empty:
+        return np.array([], dtype=float)
+    return np.clip(bundle["model"].predict(_texts(df).to_numpy()), 0, 100)
+
+
+def rejection_reason(bundle, prompt_key, min_spearman=MIN_SPEARMAN, min_agreement=MIN_THRESHOLD_AGREEMENT):
+    """Почему модель нельзя применять к рубрике prompt_key (None - можно)"""
+    if not bundle.get("prompt"):
+        return "модель обучена без ключа рубрики - переобучите с --prompt"
+    if bundle["prompt"] != prompt_key:
+        return f"модель обучена на {bundle['prompt']}, а оценка идёт по {prompt_key}"
+    report = bundle.get("report") or {}
+    spearman = report.get("spearman")
+    if spearman is None or not spearman >= min_spearman:
+        return f"Спирмен {spearman} < {min_spearman} на отложенной части"
+    for threshold, entry in (report.get("thresholds") or {}).items():
+        agreement = entry.get("confident_agreement")
+        if agreement is None or agreement < min_agreement:
+            return f"порог {threshold}: согласие уверенных {agreement} < {min_agreement}"
+    return None
+
+
+def route(df, positions, prompt_key, min_spearman=MIN_SPEARMAN, min_agreement=MIN_THRESHOLD_AGREEMENT,
+          margin=None, path=MODEL_FILE):
+    """Разделить строки на оценённые локально и на те, что нужны LLM.
+    Возвращает (позиции, скоры, позиции_для_llm); без модели, с моделью другой
+    рубрики или не прошедшей порог качества - всё в LLM. margin - зона
+    неуверенности (None - как при обучении)"""
+    positions = list(positions)
+    bundle = load_model(path)
+    if bundle is None or not positions:
+        return [], [], positions
+    reason = rejection_reason(bundle, prompt_key, min_spearman, min_agreement)
+    if reason:
+        print(f"⚠️  Локальная модель {path} не используется: {reason}")
+        return [], [], positions
+
+    predictions = predict(bundle, df.iloc[positions])
+    uncertain = uncertain_mask(predictions, margin or bundle.get("margin", UNCERTAIN_MARGIN))
+    positions = np.asarray(positions)
+    return (positions[~uncertain].tolist(), np.round(predictions[~uncertain]).tolist(),
+            positions[uncertain].tolist())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальная модель оценки лидов по скорам LLM")
+    parser.add_argument("sources", nargs="*", help=f"Хранилища / xlsx с оценками (по умолчанию {', '.join(TRAIN_SOURCES)})")
+    parser.add_argument("--prompt", required=True,
+                        help="Рубрика модели - ключ из 'Промпт оценки', например score_codexai@v2/full")
+    parser.add_argument("--margin", type=float, default=UNCERTAIN_MARGIN,
+                        help=f"Зона неуверенности вокруг порогов {THRESHOLDS} (по умолчанию {UNCERTAIN_MARGIN})")
+    parser.add_argument("--model", default=MODEL_FILE, help=f"Файл модели (по умолчанию {MODEL_FILE})")
+    parser.add_argument("--eval-only", action="store_true", help="Не обучать, оценить сохранённую модель")
+    args = parser.parse_args()
+
+    df = load_training_rows(args.prompt, args.sources)
+    print(f"📂 Оценённых LLM строк рубрикой {args.prompt}: {len(df)}")
+
+    if args.eval_only:
+        bundle = load_model(args.model)
+        if bundle is None:
+            print(f"❌ Нет модели {args.model} (или не установлен scikit-learn)")
+            return
+        print(f"🤖 Модель от {bundle['trained_at']}, промпт: {bundle.get('prompt') or 'не задан'}\n")
+        print_evaluation(evaluate(df['Интерес'], predict(bundle, df), args.margin))
+        reason = rejection_reason(bundle, args.prompt)
+        print(f"\n{'⚠️  Не будет использоваться: ' + reason if reason else '✅ Проходит порог качества'}")
+        return
+
+    print("🧠 Обучение...\n")
+    bundle, report = train(df, args.prompt, args.margin)
+    print_evaluation(report)
+    save_model(bundle, args.model)
+    print(f"\n💾 Модель: {args.model} (обучение {report['train_seconds']} с на {report['train_rows']} строках)")
+    reason = rejection_reason(bundle, args.prompt)
+    if reason:
+        print(f"⚠️  Пайплайн не будет её использовать: {reason}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# ЛОКАЛЬНЫЙ СУММАРАЙЗ ДЛЯ ПРОФИЛЕЙ С МАЛЫМ КОЛИЧЕСТВОМ ДАННЫХ
+# Профиль с одним именем или коротким описанием ("Логистика", "Founder MRNET",
+# "🚜") всё равно стоил полного запроса к модели, а ответ часто был
+# "Деятельность не определена" или "Пожалуйста, предоставьте информацию...".
+# Такие профили суммаризуются здесь детерминированно: сфера деятельности по
+# корням ключевых слов + само описание. В API уходят только содержательные.
+
+import re
+
+from postprocess import UNDEFINED, NOT_SPECIFIED
+
+LOCAL_SUMMARY_ENABLED = True
+
+# Пороги "мало данных" (описание без ссылок) по умолчанию; в пайплайне -
+# summarize.local_max_length / local_min_words из pipeline.toml
+LOCAL_MAX_LENGTH = 30  # Описание короче N символов - суммаризуем локально
+LOCAL_MIN_WORDS = 3  # ...или в нём меньше N значимых слов
+MAX_ACTIVITIES = 3  # Сколько сфер деятельности перечислять
+
+# Корень слова (регулярка по тексту в нижнем регистре) -> сфера деятельности.
+# Порядок важен: более конкретные правила раньше общих
+ACTIVITY_RULES = [
+    (r"маркетплейс|wildberries|\bozon\b|\bвб\b|\bwb\b", "торговля на маркетплейсах"),
+    (r"\bsmm\b|смм", "SMM-продвижение"),
+    (r"таргет", "таргетированная реклама"),
+    (r"маркетинг|маркетолог|marketing", "маркетинг"),
+    (r"сайт|лендинг|landing|website", "создание сайтов"),
+    (r"чат-бот|\bбот(ы|ов)?\b|\bbots?\b", "разработка чат-ботов"),
+    (r"разработ|программист|developer|\bdev\b|backend|frontend", "разработка ПО"),
+    (r"дизайн|design", "дизайн"),
+    (r"нейросет|\bии\b|\bai\b", "искусственный интеллект"),
+    (r"аналитик|analyst|analytics", "аналитика"),
+    (r"юрист|юридическ|адвокат|lawyer", "юридические услуги"),
+    (r"бухгалт|accountant", "бухгалтерия"),
+    (r"психолог", "психология"),
+    (r"коуч|наставни|ментор|coach|mentor", "наставничество и коучинг"),
+    (r"консалт|консульт|consult", "консалтинг"),
+    (r"основател|сооснов|founder|\bceo\b|владел|собственник|owner", "собственник бизнеса"),
+    (r"предпринимател|бизнесмен|entrepreneur|кәсіпкер", "предпринимательство"),
+    (r"инвест", "инвестиции"),
+    (r"трейд|trading|крипт|crypto", "трейдинг и криптовалюты"),
+    (r"финанс", "финансы"),
+    (r"недвижимост|риелтор|риэлтор|realtor", "недвижимость"),
+    (r"строит|стройк", "строительство"),
+    (r"ремонт", "ремонт"),
+    (r"мебел", "производство мебели"),
+    (r"логист|грузоперевоз|доставк", "логистика"),
+    (r"оптов|оптом", "оптовая торговля"),
+    (r"магазин|\bshop\b|\bstore\b", "розничная торговля"),
+    (r"аренд", "аренда"),
+    (r"продаж|sales", "продажи"),
+    (r"\bhr\b|рекрут|подбор персонала", "подбор персонала"),
+    (r"фотограф|photograph", "фотография"),
+    (r"видеограф|видеомонтаж|монтаж", "видеопроизводство"),
+    (r"продюсер", "продюсирование"),
+    (r"ведущ", "ведение мероприятий"),
+    (r"организатор|ивент|\bevent", "организация мероприятий"),
+    (r"салон|визаж|маникюр|бров|косметолог|красот", "индустрия красоты"),
+    (r"фитнес|fitness|персональный тренер", "фитнес"),
+    (r"врач|доктор|стоматолог|медицин", "медицина"),
+    (r"репетитор|преподава|учител|обучени|школ|курс", "обучение"),
+    (r"туризм|туроператор|турагент|путешеств", "туризм"),
+    (r"ресторан|кафе|\bcafe\b|кофейн|кондитер", "общепит"),
+    (r"копирайт", "копирайтинг"),
+    (r"блогер|блог\b|blogger", "ведение блога"),
+    (r"астролог|нумеролог|таро", "эзотерика"),
+    (r"музык|музыкант|\bdj\b", "музыка"),
+    (r"агентств|agency", "агентство услуг"),
+]
+ACTIVITY_PATTERNS = [(re.compile(pattern), activity) for pattern, activity in ACTIVITY_RULES]
+
+LINK_RE = re.compile(r"(?:https?://|www\.|t\.me/)\S+|\S+\.(?:ru|com|pro|io|me|net|org|рф)\S*|@\w+", re.IGNORECASE)
+WORD_RE = re.compile(r"[^\W\d_]{3,}")  # Значимое слово - от 3 букв
+SPACES_RE = re.compile(r"\s+")
+
+
+def _clean(text):
+    text = SPACES_RE.sub(" ", str(text or "")).strip()
+    return "" if text.lower() in ("nan", "none", "null") else text
+
+
+def signal_words(description):
+    """Значимые слова описания (без ссылок, @юзернеймов, цифр и эмодзи)"""
+    return WORD_RE.findall(LINK_RE.sub(" ", _clean(description)))
+
+
+def is_low_signal(description, max_length=LOCAL_MAX_LENGTH, min_words=LOCAL_MIN_WORDS):
+    """True - описание слишком короткое/бедное, запрос к модели не окупится"""
+    if not LOCAL_SUMMARY_ENABLED:
+        return False
+    description = _clean(description)
+    text = LINK_RE.sub(" ", description).strip()
+    return len(text) < max_length or len(signal_words(description)) < min_words
+
+
+def activities(text):
+    """Сферы деятельности по ключевым словам (без повторов, не больше MAX_ACTIVITIES)"""
+    text = _clean(text).lower()
+    found = []
+    for pattern, activity in ACTIVITY_PATTERNS:
+        if activity not in found and pattern.search(text):
+            found.append(activity)
+            if len(found) == MAX_ACTIVITIES:
+                break
+    return found
+
+
+def summarize_locally(name, surname, description):
+    """Суммарайз по шаблону: "<Имя Фамилия>: <сферы>. В профиле: «...»".
+    Без сфер и без значимых слов (эмодзи, только имя) - UNDEFINED"""
+    description = _clean(description)
+    if not (_clean(name) or _clean(surname) or description):
+        return NOT_SPECIFIED
+    who = " ".join(part for part in (_clean(name), _clean(surname)) if part) or "Пользователь"
+    # Род занятий часто пишут прямо в имени: "Дарья | HR | Собираю команды"
+    found = activities(f"{who} {description}")
+    quote = f"В профиле: «{description}»." if description else ""
+
+    if found:
+        return f"{who}: {', '.join(found)}. {quote}".strip()
+    if signal_words(description) or LINK_RE.search(description):
+        return f"{who}. {quote} Сфера деятельности не определена."
+    return UNDEFINED
@@ -0,0 +1,155 @@
+# СТРУКТУРИРОВАННОЕ ЛОГИРОВАНИЕ ДЛЯ ГОРЯЧИХ ЦИКЛОВ
+# Неблокирующая очередь (QueueHandler + QueueListener), JSON или текст,
+# сэмплирование построчных сообщений и агрегация ошибок по категориям
+
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+
+ROOT_LOGGER = "leads"
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись = одна строка JSON (поля из extra={'fields': {...}})"""
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Человекочитаемый формат: время, уровень, сообщение, key=value"""
+    def format(self, record):
+        line = (f"{datetime.fromtimestamp(record.created).strftime('%H:%M:%S')} "
+                f"{record.levelname:<7} {record.getMessage()}")
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += " | " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def setup_logging(level="INFO", json_format=False, log_file=None):
+    """Настроить логгер 'leads': запись в очередь, вывод в отдельном потоке"""
+    global _listener
+    if _listener is not None:
+        return logging.getLogger(ROOT_LOGGER)
+
+    formatter = JsonFormatter() if json_format else TextFormatter()
+    handlers = []
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(formatter)
+    handlers.append(stream_handler)
+    if log_file:
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter())  # В файл всегда JSON
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(level)
+    logger.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return logger
+
+
+def shutdown_logging():
+    """Дописать очередь и остановить поток вывода"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name):
+    """Дочерний логгер: leads.<name>"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+class RowSampler:
+    """Пропускает построчные сообщения: первые first_n, затем каждое every_n-е
+    и не чаще одного раза в min_interval секунд на ключ"""
+    def __init__(self, first_n=3, every_n=100, min_interval=10.0):
+        self.first_n = first_n
+        self.every_n = every_n
+        self.min_interval = min_interval
+        self.counts = {}
+        self.last_logged = {}
+        self.lock = threading.Lock()
+
+    def should_log(self, key):
+        now = time.monotonic()
+        with self.lock:
+            count = self.counts.get(key, 0) + 1
+            self.counts[key] = count
+            if count <= self.first_n:
+                self.last_logged[key] = now
+                return True
+            if self.every_n and count % self.every_n == 0:
+                self.last_logged[key] = now
+                return True
+            if self.min_interval and now - self.last_logged.get(key, 0) >= self.min_interval:
+                self.last_logged[key] = now
+                return True
+            return False
+
+    def log(self, logger, key, msg, level=logging.INFO, **fields):
+        """Залогировать построчное сообщение, если ключ прошёл сэмплирование"""
+        if logger.isEnabledFor(level) and self.should_log(key):
+            fields.setdefault("seen", self.counts[key])
+            logger.log(level, msg, extra={"fields": fields})
+
+
+class ErrorAggregator:
+    """Считает ошибки по категориям; в лог пишет только первые first_n каждой категории"""
+    def __init__(self, logger, first_n=3):
+        self.logger = logger
+        self.first_n = first_n
+        self.counts = {}
+        self.examples = {}
+        self.lock = threading.Lock()
+
+    def record(self, category, detail="", **fields):
+        with self.lock:
+            count = self.counts.get(category, 0) + 1
+            self.counts[category] = count
+            if category not in self.examples:
+                self.examples[category] = str(detail)[:200]
+        if count <= self.first_n:
+            fields.update({"category": category, "count": count})
+            self.logger.warning(f"{category}: {str(detail)[:200]}", extra={"fields": fields})
+
+    def summary(self):
+        with self.lock:
+            return {
+                category: {"count": count, "example": self.examples.get(category, "")}
+                for category, count in sorted(self.counts.items(), key=lambda x: -x[1])
+            }
+
+    def log_summary(self):
+        """Итог по категориям одной записью"""
+        summary = self.summary()
+        if summary:
+            self.logger.warning("Сводка ошибок", extra={"fields": {"errors": summary}})
+        return summary
@@ -0,0 +1,244 @@
+# МЕТРИКИ ВЫЗОВОВ API
+# Латентность, токены, модель, ключ, исход и ретраи для каждого generate_content.
+# Дубликаты хеджирования (hedging.py) - отдельные вызовы с retries=1 и hedged:
+# это реальный трафик и квота, иначе вызовы и латентность недосчитываются
+# Экспорт: текст Prometheus (файл или HTTP-эндпоинт) и JSONL по каждому вызову
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Границы бакетов гистограммы латентности (секунды)
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+
+# Возможные исходы вызова
+OUTCOMES = ("ok", "429", "403", "parse_fail", "empty", "timeout", "error")
+
+
+def classify_error(error):
+    """Определить исход вызова по тексту исключения"""
+    error_str = str(error)
+    if isinstance(error, TimeoutError) or "DEADLINE_EXCEEDED" in error_str or "Deadline" in error_str:
+        return "timeout"
+    if "429" in error_str or "RESOURCE_EXHAUSTED" in error_str or "quota" in error_str.lower():
+        return "429"
+    if "403" in error_str:
+        return "403"
+    return "error"
+
+
+class CallRecord:
+    """Один вызов generate_content"""
+    __slots__ = ("stage", "model", "key_index", "retries", "hedged", "started", "latency",
+                 "prompt_tokens", "output_tokens", "outcome")
+
+    def __init__(self, stage, model, key_index=None, retries=0, hedged=False):
+        self.stage = stage
+        self.model = model
+        self.key_index = key_index
+        self.retries = retries
+        self.hedged = hedged
+        self.started = time.perf_counter()
+        self.latency = None
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.outcome = None
+
+    def set_response(self, response):
+        """Зафиксировать конец сетевой части вызова и токены из usage_metadata"""
+        self.latency = time.perf_counter() - self.started
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is not None:
+            self.prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+            self.output_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+
+    def to_dict(self):
+        return {
+            "ts": datetime.now().isoformat(),
+            "stage": self.stage,
+            "model": self.model,
+            "key_index": self.key_index,
+            "latency": round(self.latency or 0.0, 4),
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "outcome": self.outcome,
+            "retries": self.retries,
+            "hedged": self.hedged,
+        }
+
+
+class ApiMetrics:
+    """Потокобезопасный сборщик метрик вызовов API"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}  # {(stage, model): [counts по бакетам + inf, sum, count]}
+        self.outcomes = {}  # {(stage, model, key_index, outcome): count}
+        self.tokens = {}  # {(stage, model): [prompt, output]}
+        self.retries = {}  # {(stage, model): count}
+        self.hedged = {}  # {(stage, model): count} - дубликаты хеджирования
+        self.jsonl_file = None
+        self.server = None
+
+    @contextmanager
+    def track(self, stage, model, key_index=None, retries=0, hedged=False):
+        """Обернуть вызов generate_content: with metrics.track(...) as call
+        (retries - номер повторной попытки, hedged - дубликат хеджирования)"""
+        call = CallRecord(stage, model, key_index, retries, hedged)
+        try:
+            yield call
+        except Exception as e:
+            call.outcome = classify_error(e)
+            raise
+        finally:
+            if call.latency is None:
+                call.latency = time.perf_counter() - call.started
+            if call.outcome is None:
+                call.outcome = "ok"
+            self.record(call)
+
+    def record(self, call):
+        """Учесть завершённый вызов"""
+        key = (call.stage, call.model)
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if call.latency <= bound:
+                    hist[i] += 1
+            hist[len(LATENCY_BUCKETS)] += 1  # +Inf
+            hist[-2] += call.latency
+            hist[-1] += 1
+
+            outcome_key = (call.stage, call.model, call.key_index, call.outcome)
+            self.outcomes[outcome_key] = self.outcomes.get(outcome_key, 0) + 1
+
+            tokens = self.tokens.setdefault(key, [0, 0])
+            tokens[0] += call.prompt_tokens
+            tokens[1] += call.output_tokens
+
+            if call.retries:
+                self.retries[key] = self.retries.get(key, 0) + call.retries
+            if call.hedged:
+                self.hedged[key] = self.hedged.get(key, 0) + 1
+
+            if self.jsonl_file is not None:
+                self.jsonl_file.write(json.dumps(call.to_dict(), ensure_ascii=False) + "\n")
+                self.jsonl_file.flush()
+
+    # ============ ЭКСПОРТ ============
+    def open_jsonl(self, path):
+        """Писать каждый вызов отдельной строкой JSON в файл (дозапись)"""
+        with self.lock:
+            self.jsonl_file = open(path, 'a', encoding='utf-8')
+
+    def to_prometheus(self):
+        """Текстовый формат экспозиции Prometheus"""
+        lines = [
+            "# HELP genai_request_latency_seconds Латентность generate_content",
+            "# TYPE genai_request_latency_seconds histogram",
+        ]
+        with self.lock:
+            for (stage, model), hist in sorted(self.histograms.items()):
+                labels = f'stage="{stage}",model="{model}"'
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    lines.append(f'genai_request_latency_seconds_bucket{{{labels},le="{bound}"}} {hist[i]}')
+                lines.append(f'genai_request_latency_seconds_bucket{{{labels},le="+Inf"}} {hist[len(LATENCY_BUCKETS)]}')
+                lines.append(f'genai_request_latency_seconds_sum{{{labels}}} {hist[-2]:.4f}')
+                lines.append(f'genai_request_latency_seconds_count{{{labels}}} {hist[-1]}')
+
+            lines.append("# HELP genai_requests_total Вызовы generate_content по исходу")
+            lines.append("# TYPE genai_requests_total counter")
+            for (stage, model, key_index, outcome), count in sorted(self.outcomes.items(), key=str):
+                lines.append(
+                    f'genai_requests_total{{stage="{stage}",model="{model}",'
+                    f'key="{key_index if key_index is not None else ""}",outcome="{outcome}"}} {count}'
+                )
+
+            lines.append("# HELP genai_tokens_total Токены промпта и ответа")
+            lines.append("# TYPE genai_tokens_total counter")
+            for (stage, model), (prompt_tokens, output_tokens) in sorted(self.tokens.items()):
+                lines.append(f'genai_tokens_total{{stage="{stage}",model="{model}",kind="prompt"}} {prompt_tokens}')
+                lines.append(f'genai_tokens_total{{stage="{stage}",model="{model}",kind="output"}} {output_tokens}')
+
+            lines.append("# HELP genai_retries_total Повторные попытки")
+            lines.append("# TYPE genai_retries_total counter")
+            for (stage, model), count in sorted(self.retries.items()):
+                lines.append(f'genai_retries_total{{stage="{stage}",model="{model}"}} {count}')
+
+            lines.append("# HELP genai_hedged_requests_total Дубликаты хеджирования (входят и в genai_requests_total)")
+            lines.append("# TYPE genai_hedged_requests_total counter")
+            for (stage, model), count in sorted(self.hedged.items()):
+                lines.append(f'genai_hedged_requests_total{{stage="{stage}",model="{model}"}} {count}')
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Сохранить снимок метрик в файл (для node_exporter textfile collector)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+
+    def serve(self, port):
+        """Поднять HTTP-эндпоинт /metrics в фоновом потоке"""
+        metrics = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("0.0.0.0", port), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server
+
+    def summary(self):
+        """Сводка по этапам: вызовы, средняя латентность, токены, исходы"""
+        result = {}
+        with self.lock:
+            for (stage, model), hist in self.histograms.items():
+                entry = result.setdefault(stage, {"calls": 0, "latency_sum": 0.0,
+                                                  "prompt_tokens": 0, "output_tokens": 0,
+                                                  "outcomes": {}})
+                entry["calls"] += hist[-1]
+                entry["latency_sum"] += hist[-2]
+                prompt_tokens, output_tokens = self.tokens.get((stage, model), (0, 0))
+                entry["prompt_tokens"] += prompt_tokens
+                entry["output_tokens"] += output_tokens
+            for (stage, _model, _key, outcome), count in self.outcomes.items():
+                outcomes = result[stage]["outcomes"]
+                outcomes[outcome] = outcomes.get(outcome, 0) + count
+        for entry in result.values():
+            entry["avg_latency"] = entry["latency_sum"] / entry["calls"] if entry["calls"] else 0.0
+        return result
+
+    def close(self):
+        """Закрыть JSONL и остановить HTTP-эндпоинт"""
+        with self.lock:
+            if self.jsonl_file is not None:
+                self.jsonl_file.close()
+                self.jsonl_file = None
+        if self.server is not None:
+            self.server.shutdown()
+            self.server = None
+
+
+def print_summary(metrics):
+    """Напечатать сводку метрик по этапам"""
+    for stage, entry in sorted(metrics.summary().items()):
+        outcomes = ", ".join(f"{k}: {v}" for k, v in sorted(entry["outcomes"].items()))
+        print(f"{stage}: {entry['calls']} вызовов | средняя латентность {entry['avg_latency']:.2f}с | "
+              f"токены {entry['prompt_tokens']}→{entry['output_tokens']} | {outcomes}")
+
+
+# Глобальный сборщик, общий для всех скриптов
+metrics = ApiMetrics()
@@ -0,0 +1,136 @@
+# ОБЩИЙ ПЕЙСИНГ ЗАПРОСОВ К API
+# Вместо фиксированных пауз (0.3 с после каждого вызова, 0.5 / 1 с между
+# батчами, опрос квоты раз в 6 с, ожидание конца минутного окна) вызывающий
+# резервирует слот у лимитера и ждёт ровно до момента, когда он освободится:
+# окно RPM скользящее, поэтому свободный слот выдаётся сразу, а при
+# исчерпании - в момент, когда из окна выпадает самый старый запрос.
+# Один Pacer на процесс, общий для всех потоков.
+
+import threading
+import time
+from collections import deque
+
+MINUTE = 60.0
+DAY = 86400.0
+COOLDOWN_429 = 5.0  # Пауза модели после ответа 429 от самого API (секунды)
+
+
+class QuotaExhausted(RuntimeError):
+    """Дневной лимит всех подходящих моделей исчерпан - ждать бессмысленно"""
+
+
+class Pacer:
+    """Скользящие окна RPM/RPD по моделям: limits = {model: (rpm, rpd)}.
+    rpd=None - без дневного лимита; enabled=False - без ограничений (replay)"""
+    def __init__(self, limits, enabled=True):
+        self.limits = dict(limits)
+        self.enabled = enabled
+        self.condition = threading.Condition()
+        self.minute = {model: deque() for model in self.limits}  # время запросов за минуту
+        self.today = {model: 0 for model in self.limits}
+        self.total = {model: 0 for model in self.limits}
+        self.cooldown_until = {}  # {model: monotonic}
+        self.day_start = time.monotonic()
+        self.waited = 0.0  # Суммарное время ожидания слотов (все потоки)
+
+    def _prune(self, model, now):
+        if now - self.day_start >= DAY:
+            self.today = {m: 0 for m in self.limits}
+            self.day_start = now
+        window = self.minute[model]
+        while window and now - window[0] >= MINUTE:
+            window.popleft()
+
+    def _wait_time(self, model, now):
+        """Через сколько секунд у модели будет слот (None - не сегодня)"""
+        if not self.enabled:
+            return 0.0
+        rpm, rpd = self.limits[model]
+        self._prune(model, now)
+        if rpd is not None and self.today[model] >= rpd:
+            return None
+        wait = max(self.cooldown_until.get(model, 0.0) - now, 0.0)
+        window = self.minute[model]
+        if len(window) >= rpm:
+            wait = max(wait, window[len(window) - rpm] + MINUTE - now)
+        return wait
+
+    def _reserve(self, model, now):
+        self.minute[model].append(now)
+        self.today[model] += 1
+        self.total[model] += 1
+
+    def acquire(self, models, timeout=None):
+        """Зарезервировать слот у первой модели из models, у которой он есть
+        (порядок - предпочтение). Ждёт, пока слот не освободится; возвращает модель"""
+        started = time.monotonic()
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                waits = {model: self._wait_time(model, now) for model in models}
+                for model in models:
+                    if waits[model] == 0.0:
+                        self._reserve(model, now)
+                        self.waited += now - started
+                        return model
+                pending = [w for w in waits.values() if w is not None]
+                if not pending:
+                    raise QuotaExhausted(f"Дневной лимит исчерпан: {', '.join(models)}")
+                delay = min(pending)
+                if timeout is not None:
+                    remaining = timeout - (now - started)
+                    if remaining <= 0:
+                        raise TimeoutError(f"Нет слота за {timeout} с: {', '.join(models)}")
+                    delay = min(delay, remaining)
+                # Проснёмся к освобождению слота (или раньше - по notify)
+                self.condition.wait(delay)
+
+    def try_acquire(self, model):
+        """Зарезервировать слот, только если он есть прямо сейчас"""
+        with self.condition:
+            now = time.monotonic()
+            if self._wait_time(model, now) == 0.0:
+                self._reserve(model, now)
+                return True
+            return False
+
+    def can_use(self, model):
+        """(есть ли слот сейчас, причина) - без резервирования"""
+        with self.condition:
+            wait = self._wait_time(model, time.monotonic())
+        if wait is None:
+            return False, f"Превышен лимит RPD ({self.limits[model][1]})"
+        if wait > 0:
+            return False, f"Превышен лимит RPM ({self.limits[model][0]}), слот через {wait:.1f} с"
+        return True, "OK"
+
+    def penalize(self, model, seconds=COOLDOWN_429):
+        """API ответил 429 - не выдавать слоты модели seconds секунд"""
+        with self.condition:
+            self.cooldown_until[model] = max(self.cooldown_until.get(model, 0.0), time.monotonic() + seconds)
+            self.condition.notify_all()
+
+    def headroom(self):
+        """Оставшийся запас квоты по моделям"""
+        with self.condition:
+            now = time.monotonic()
+            result = {}
+            for model, (rpm, rpd) in self.limits.items():
+                self._prune(model, now)
+                result[model] = {"rpm_left": max(rpm - len(self.minute[model]), 0)}
+                if rpd is not None:
+                    result[model]["rpd_left"] = max(rpd - self.today[model], 0)
+            return result
+
+    def status(self):
+        """Запросы по моделям (за сегодня, за минуту, всего) и время ожидания слотов"""
+        with self.condition:
+            now = time.monotonic()
+            models = {}
+            for model in self.limits:
+                self._prune(model, now)
+                if self.total[model]:
+                    models[model] = {"requests_today": self.today[model],
+                                     "minute_requests": len(self.minute[model]),
+                                     "requests_total": self.total[model]}
+            return {"models": models, "waited_seconds": round(self.waited, 1)}
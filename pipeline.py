@@ -0,0 +1,927 @@
+# ПАЙПЛАЙН ЛИДОВ: СУММАРАЙЗ -> ОЦЕНКА -> СООБЩЕНИЯ -> ВЫГРУЗКА
+# Общая библиотека вместо трёх расходившихся скриптов (lead_processor.py,
+# ai.py, batch_universal_scoring.py): пул ключей, пейсинг, хеджирование,
+# каскад, самосогласование, запись трафика, промпты и разбор ответов - одни
+# на все сценарии. Этапы - функции над (Pipeline, df, store) из STAGES,
+# команды cli.py собирают их в нужном порядке, настройки - из pipeline.toml
+# (config.py). Импорт модуля ничего не делает: ключи проверяются, логи и
+# клиенты создаются в Pipeline.start(), google.generativeai грузится там же.
+
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+import local_scorer
+from cascade import Cascade, print_cascade_report
+from clients import get_model
+from consistency import anchor_records, score_consistent, print_consistency_report
+from exporters import export, XlsxWriter, JsonWriter, NdjsonWriter, CsvWriter
+from hedging import Hedger
+from leadstore import open_store, lead_keys
+from local_summary import is_low_signal, summarize_locally
+from log_utils import setup_logging, shutdown_logging, get_logger, RowSampler, ErrorAggregator
+from metrics import metrics, print_summary
+from pacing import Pacer, QuotaExhausted
+from postprocess import clean_summary, UNDEFINED as UNDEFINED_SUMMARY
+from priority import rank_indices
+from progress import ProgressTracker
+from prompts import get_prompt, format_users
+from provenance import rows_to_score, stamp as stamp_provenance, ensure_columns as ensure_provenance_columns
+from query import print_leads
+from records import extract_records, result_slots, write_back
+from replay import TrafficLog
+from reporting import build_report, print_report, distribution, BUCKETS
+
+log = get_logger("pipeline")
+
+OUTPUT_COLUMNS = ['Суммарное описание', 'Интерес', 'Сообщение 1', 'Сообщение 2']
+NOT_SPECIFIED = "Деятельность не указана"
+API_ERROR = "Ошибка API"
+FALLBACK_MESSAGE = ("Посмотрите наши кейсы и примеры работ на codexai.pro. "
+                    "Мы помогаем компаниям создавать современные сайты и веб-приложения.")
+MESSAGE_MAX_LENGTH = 500
+
+
+# ============ API КЛЮЧИ ============
+def load_keys(prefix, count):
+    """[(номер, ключ)] из переменных окружения prefix1 ... prefixN (.env читается здесь)"""
+    load_dotenv()
+    return [(i, os.getenv(f"{prefix}{i}")) for i in range(1, count + 1) if os.getenv(f"{prefix}{i}")]
+
+
+def probe_key(api_key, key_num, model_name):
+    """Проверить, работает ли API ключ (не в статусе 403 leaked)"""
+    try:
+        with metrics.track("probe", model_name, key_num) as call:
+            call.set_response(get_model(model_name, api_key).generate_content("test"))
+        return True
+    except Exception as e:
+        if "403" in str(e) and "leaked" in str(e).lower():
+            return False
+        # Если это другая ошибка, считаем ключ валидным (может быть квота или сеть)
+        return True
+
+
+# ============ ВСПОМОГАТЕЛЬНОЕ ============
+def is_empty_value(value):
+    """Проверка, является ли значение пустым"""
+    if value is None:
+        return True
+    if pd.isna(value):
+        return True
+    str_val = str(value).strip()
+    if str_val == '':
+        return True
+    # Проверяем только строковые представления NaN, но не буквальное "nan" в данных
+    try:
+        if pd.isna(float(str_val)):
+            return True
+    except (ValueError, TypeError):
+        pass
+    return str_val.lower() in ['none', 'null']
+
+
+# ============ СЛОВАРЬ РУСИФИКАЦИИ ИМЁН ============
+NAMES_TO_CYRILLIC = {
+    # Мужские имена
+    'artem': 'Артём', 'artemiy': 'Артемий', 'alexander': 'Александр', 'alex': 'Алекс',
+    'alexey': 'Алексей', 'aleksey': 'Алексей', 'andrey': 'Андрей', 'andrei': 'Андрей',
+    'andrew': 'Андрей', 'anton': 'Антон', 'boris': 'Борис', 'denis': 'Денис',
+    'dmitry': 'Дмитрий', 'dmitri': 'Дмитрий', 'dima': 'Дима', 'eugene': 'Евгений',
+    'evgeny': 'Евгений', 'evgeniy': 'Евгений', 'fedor': 'Фёдор', 'fyodor': 'Фёдор',
+    'grigory': 'Григорий', 'igor': 'Игорь', 'ilya': 'Илья', 'ivan': 'Иван',
+    'kirill': 'Кирилл', 'konstantin': 'Константин', 'leonid': 'Леонид', 'maxim': 'Максим',
+    'max': 'Макс', 'maksim': 'Максим', 'mikhail': 'Михаил', 'michael': 'Михаил',
+    'misha': 'Миша', 'nikita': 'Никита', 'nikolay': 'Николай', 'nikolai': 'Николай',
+    'nick': 'Николай', 'oleg': 'Олег', 'pavel': 'Павел', 'paul': 'Павел',
+    'peter': 'Пётр', 'petr': 'Пётр', 'roman': 'Роман', 'ruslan': 'Руслан',
+    'sergey': 'Сергей', 'sergei': 'Сергей', 'stanislav': 'Станислав', 'stas': 'Стас',
+    'timur': 'Тимур', 'vadim': 'Вадим', 'valery': 'Валерий', 'viktor': 'Виктор',
+    'victor': 'Виктор', 'vitaly': 'Виталий', 'vladimir': 'Владимир', 'vlad': 'Влад',
+    'vladislav': 'Владислав', 'yaroslav': 'Ярослав', 'yuri': 'Юрий', 'yury': 'Юрий',
+    'george': 'Георгий', 'gena': 'Гена', 'gleb': 'Глеб', 'egor': 'Егор',
+    'arseny': 'Арсений', 'arseniy': 'Арсений', 'daniil': 'Даниил', 'daniel': 'Даниил',
+    'timofey': 'Тимофей', 'semyon': 'Семён', 'simon': 'Симон', 'matvey': 'Матвей',
+    'stepan': 'Степан', 'steven': 'Степан', 'vasily': 'Василий',
+    # Женские имена
+    'anna': 'Анна', 'anastasia': 'Анастасия', 'nastya': 'Настя', 'alexandra': 'Александра',
+    'alina': 'Алина', 'daria': 'Дарья', 'darya': 'Дарья', 'dasha': 'Даша',
+    'ekaterina': 'Екатерина', 'kate': 'Катя', 'katya': 'Катя', 'elena': 'Елена',
+    'helen': 'Елена', 'lena': 'Лена', 'eva': 'Ева', 'evgenia': 'Евгения',
+    'irina': 'Ирина', 'julia': 'Юлия', 'yulia': 'Юлия', 'kristina': 'Кристина',
+    'ksenia': 'Ксения', 'kseniya': 'Ксения', 'larisa': 'Лариса', 'lyudmila': 'Людмила',
+    'maria': 'Мария', 'masha': 'Маша', 'marina': 'Марина', 'natalya': 'Наталья',
+    'natalia': 'Наталья', 'natasha': 'Наташа', 'nina': 'Нина', 'olga': 'Ольга',
+    'polina': 'Полина', 'svetlana': 'Светлана', 'sveta': 'Света', 'tatiana': 'Татьяна',
+    'tanya': 'Таня', 'valentina': 'Валентина', 'valeria': 'Валерия', 'vera': 'Вера',
+    'victoria': 'Виктория', 'vika': 'Вика', 'yana': 'Яна', 'alena': 'Алёна',
+    'alyona': 'Алёна', 'diana': 'Диана', 'elizaveta': 'Елизавета', 'liza': 'Лиза',
+    'galina': 'Галина', 'karina': 'Карина', 'lyubov': 'Любовь', 'margarita': 'Маргарита',
+    'nadezhda': 'Надежда', 'sofia': 'София', 'sonya': 'Соня', 'tamara': 'Тамара',
+    'veronika': 'Вероника', 'zhanna': 'Жанна', 'zoya': 'Зоя',
+}
+
+
+def russify_name(name):
+    """Русифицирует латинское имя в кириллицу (Artem → Артём)"""
+    if not name:
+        return name
+
+    name = str(name).strip()
+    if not name:
+        return ""
+
+    # Если уже на кириллице - возвращаем как есть
+    if any('\u0400' <= c <= '\u04FF' for c in name):
+        return name
+
+    # Ищем в словаре (регистронезависимо)
+    name_lower = name.lower()
+    if name_lower in NAMES_TO_CYRILLIC:
+        return NAMES_TO_CYRILLIC[name_lower]
+
+    # Проверяем составные имена (типа "Artem Ignatev" - берём только имя)
+    parts = name.split()
+    if len(parts) > 1 and parts[0].lower() in NAMES_TO_CYRILLIC:
+        return NAMES_TO_CYRILLIC[parts[0].lower()]
+
+    # Если не нашли в словаре - возвращаем оригинал
+    return name
+
+
+MESSAGE_PROMPT = """Напиши ВТОРОЕ сообщение для Telegram (2-3 предложения). Первое сообщение уже отправлено с приветствием.
+
+КОНТЕКСТ ЛИДА:
+{summary}
+
+МЫ: веб-агентство CodexAI, делаем сайты, лендинги, веб-приложения.
+НАШИ КЕЙСЫ: codexai.pro
+
+ЗАДАЧА: Напиши персонализированное сообщение, которое:
+1) Показывает, что мы понимаем их сферу деятельности
+2) Предлагает конкретную пользу (сайт поможет привлечь клиентов / увеличить продажи / показать экспертность)
+3) Приглашает посмотреть релевантные кейсы на codexai.pro
+4) НЕ используй "Добрый день" - это уже было в первом сообщении
+
+СТИЛЬ: дружелюбный, без пустых фраз, конкретно про их бизнес
+
+Ответ (только текст сообщения, без кавычек):"""
+
+
+# ============ ПАЙПЛАЙН ============
+class Pipeline:
+    """Общее состояние прогона: ключи, пейсер, хеджер, каскад, трафик, прогресс.
+    Вызовы к модели (summarize_profile, score_batch, generate_messages) -
+    строительные блоки этапов"""
+    def __init__(self, config):
+        self.config = config
+        self.models = [config.models.primary] + ([config.models.fallback] if config.models.fallback else [])
+        self.keys = []
+        self.key_counter = 0
+        self.workers = 1
+        self.lock = threading.Lock()
+        self.row_log = RowSampler()
+        self.errors = ErrorAggregator(log)
+        self.pacer = None
+        self.traffic = None
+        self.hedger = None
+        self.cascade = None
+        self.progress = None
+
+    # ============ ЗАПУСК ============
+    def start(self, api=True):
+        """Логи; при api=True ещё ключи (с проверкой), пейсер, трафик, метрики"""
+        cfg = self.config
+        setup_logging(cfg.logging.level, json_format=cfg.logging.json, log_file=cfg.logging.file or None)
+        if not api:
+            return self
+
+        replay = cfg.traffic.mode == "replay"
+        if cfg.traffic.mode:
+            self.traffic = TrafficLog(cfg.traffic.log, cfg.traffic.mode)
+        self.keys = self._working_keys(probe=cfg.keys.probe and not replay)
+        if replay:
+            # Сети нет - ключи не проверяются и нужны только для ротации
+            self.keys = self.keys or ["replay"]
+            print(f"⏪ Воспроизведение трафика из {cfg.traffic.log}")
+        if not self.keys:
+            raise ValueError("❌ Нет рабочих API ключей! Все ключи скомпрометированы или отсутствуют. "
+                             "Добавьте новые ключи в .env файл.")
+        try:
+            import google.generativeai as genai
+            genai.configure(api_key=self.keys[0])
+        except Exception as e:
+            print(f"⚠️  Ошибка при инициализации genai: {str(e)[:50]}")
+
+        self.workers = min(cfg.api.max_workers, len(self.keys))
+        # Слот резервируется до запроса, ожидание - ровно до его освобождения (pacing.py)
+        self.pacer = Pacer(self.model_limits(), enabled=not replay)
+        # Дедлайн на каждый запрос + дубликат с другого ключа для медленных ответов
+        self.hedger = Hedger(max_workers=2 * self.workers, timeout=cfg.api.request_timeout,
+                             enabled=cfg.api.hedge, quantile=cfg.api.hedge_quantile,
+                             min_delay=cfg.api.hedge_min_delay, min_samples=cfg.api.hedge_min_samples)
+        if cfg.score.cascade:
+            # Первый проход - основная модель, неуверенные строки - fallback (cascade.py)
+            self.cascade = Cascade(self.get_model_with_fallback, cfg.models.fallback, self.has_quota,
+                                   score_margin=cfg.score.cascade_margin,
+                                   min_summary_length=cfg.summarize.cascade_min_length)
+        self.progress = ProgressTracker(status_file=cfg.metrics.status_file or None,
+                                        headroom_fn=self.pacer.headroom)
+        if cfg.metrics.jsonl:
+            metrics.open_jsonl(cfg.metrics.jsonl)
+        if cfg.metrics.port:
+            metrics.serve(cfg.metrics.port)
+            print(f"📈 Метрики: http://localhost:{cfg.metrics.port}/metrics\n")
+        return self
+
+    def _working_keys(self, probe):
+        keys = load_keys(self.config.keys.env_prefix, self.config.keys.count)
+        if not probe:
+            return [key for _, key in keys]
+        working = []
+        print("🔍 Проверка API ключей...")
+        for key_num, key in keys:
+            if probe_key(key, key_num, self.config.keys.probe_model):
+                working.append(key)
+                print(f"  ✅ Ключ #{key_num}: OK")
+            else:
+                print(f"  ❌ Ключ #{key_num}: СКОМПРОМЕТИРОВАН (403 leaked)")
+        return working
+
+    def model_limits(self):
+        """{model: (rpm, rpd)} для пейсера; rpd=0 в конфиге - без дневного лимита"""
+        models = self.config.models
+        limits = {models.primary: (models.primary_rpm, models.primary_rpd or None)}
+        if models.fallback:
+            limits[models.fallback] = (models.fallback_rpm, models.fallback_rpd or None)
+        return limits
+
+    def close(self):
+        """Метрики, лог трафика и логи - после отчёта"""
+        if self.progress is not None:
+            self.progress.close()
+        if self.config.metrics.prometheus_file and self.pacer is not None:
+            metrics.write_prometheus(self.config.metrics.prometheus_file)
+        metrics.close()
+        if self.traffic is not None:
+            self.traffic.close()
+        shutdown_logging()
+
+    # ============ КЛЮЧИ И КВОТА ============
+    def next_key(self):
+        """Следующий API ключ по кругу"""
+        with self.lock:
+            if not self.keys:
+                raise ValueError("API ключи не инициализированы!")
+            key = self.keys[self.key_counter % len(self.keys)]
+            self.key_counter += 1
+            return key
+
+    def key_index(self, api_key):
+        """Номер API ключа (с 1) для метрик"""
+        try:
+            return self.keys.index(api_key) + 1
+        except ValueError:
+            return None
+
+    def get_model_with_fallback(self):
+        """Зарезервировать слот: основная модель, а если у неё нет слота - fallback.
+        Если слотов нет ни у одной - ждёт до освобождения ближайшего (без опроса)"""
+        primary = self.models[0]
+        _, reason = self.pacer.can_use(primary)
+        try:
+            model = self.pacer.acquire(self.models)
+        except QuotaExhausted:
+            log.error("Лимиты API исчерпаны, невозможно продолжить")
+            raise QuotaExhausted("Лимиты всех моделей исчерпаны, невозможно получить модель")
+        if model != primary:
+            self.row_log.log(log, "fallback", f"{reason}, переключаемся на {model}",
+                             level=logging.WARNING, model=model)
+        return model
+
+    def has_quota(self, model):
+        """Зарезервировать слот модели, если он есть прямо сейчас (эскалация в каскаде)"""
+        return self.pacer.try_acquire(model)
+
+    def generate(self, stage, model_name, api_key, contents, generation_config=None, template=None):
+        """generate_content с дедлайном; если ответ дольше p95 этапа и у модели
+        есть запас квоты - дубликат с другого ключа, берётся первый ответ.
+        В режиме record запрос и ответ пишутся в лог трафика, в replay - берутся из него"""
+        traffic = self.traffic
+        if traffic is not None and traffic.mode == "replay":
+            return traffic.call(stage, model_name, contents, generation_config, template, None)
+
+        request_options = {"timeout": self.config.api.request_timeout}
+        model = get_model(model_name, api_key, generation_config, template)
+
+        def primary():
+            return model.generate_content(contents, request_options=request_options)
+
+        def backup_factory():
+            if len(self.keys) < 2:
+                return None
+            if not self.pacer.try_acquire(model_name):
+                return None
+            backup_key = self.next_key()
+            if backup_key == api_key:
+                backup_key = self.next_key()
+            backup_model = get_model(model_name, backup_key, generation_config, template)
+
+            def backup():
+                # Дубликат - отдельный вызов в метриках (повторная попытка, hedged)
+                with metrics.track(stage, model_name, self.key_index(backup_key), retries=1, hedged=True) as call:
+                    response = backup_model.generate_content(contents, request_options=request_options)
+                    call.set_response(response)
+                    return response
+            return backup
+
+        try:
+            if traffic is not None:
+                return traffic.call(stage, model_name, contents, generation_config, template,
+                                    lambda: self.hedger.run(stage, primary, backup_factory))
+            return self.hedger.run(stage, primary, backup_factory)
+        except Exception as e:
+            # 429 от самого API: пейсер не выдаёт слоты модели COOLDOWN_429 секунд
+            if "429" in str(e) or "quota" in str(e).lower():
+                self.pacer.penalize(model_name)
+            raise
+
+    # ============ СУММАРАЙЗ ============
+    def is_low_signal(self, description):
+        """Профиль для локального суммарайза (пороги summarize.local_*)"""
+        settings = self.config.summarize
+        return is_low_signal(description, settings.local_max_length, settings.local_min_words)
+
+    def summarize_profile(self, row, api_key, model_name=None):
+        """Создаёт суммарное описание деятельности (model_name - модель с уже
+        зарезервированным слотом; None - слот с fallback логикой)"""
+        name = str(row.get('Имя', '') or '').strip()
+        surname = str(row.get('Фамилия', '') or '').strip()
+        description = str(row.get('Описание профиля', '') or '').strip()
+
+        info_parts = []
+        if not is_empty_value(name):
+            info_parts.append(f"Имя: {name}")
+        if not is_empty_value(surname):
+            info_parts.append(f"Фамилия: {surname}")
+        if not is_empty_value(description):
+            info_parts.append(f"Описание: {description}")
+        if not info_parts:
+            return NOT_SPECIFIED
+
+        # Короткий/бедный профиль - шаблонный суммарайз без запроса к API
+        if self.is_low_signal(description):
+            return summarize_locally(name, surname, description)
+
+        settings = self.config.summarize
+        prompt = get_prompt(settings.prompt)
+        generation_config = {"temperature": settings.temperature, "max_output_tokens": settings.max_output_tokens}
+
+        try:
+            current_model = model_name or self.get_model_with_fallback()
+
+            with metrics.track("summarize", current_model, self.key_index(api_key)) as call:
+                # Правила - в system_instruction, модель переиспользуется между строками
+                response = self.generate("summarize", current_model, api_key,
+                                         prompt.contents_for(current_model, info="\n".join(info_parts)),
+                                         generation_config, prompt)
+                call.set_response(response)
+
+                result = clean_summary(getattr(response, 'text', None))
+                if result != UNDEFINED_SUMMARY:
+                    return result
+                call.outcome = "empty"
+            return UNDEFINED_SUMMARY
+        except Exception as e:
+            self.errors.record("summarize_api", e)
+            return API_ERROR
+
+    # ============ БАТЧ ОЦЕНКА ============
+    def score_prompt(self):
+        return get_prompt(self.config.score.prompt, self.config.score.variant)
+
+    def score_batch(self, batch_data, api_key, batch_num, model_name=None):
+        """Оценивает батч пользователей: {отн. индекс: скор} | None (model_name -
+        модель с уже зарезервированным слотом; None - слот с fallback логикой)"""
+        batch_size = len(batch_data)
+        prompt = self.score_prompt()
+        users_text = format_users(batch_data)
+        errors = self.errors
+
+        try:
+            current_model = model_name or self.get_model_with_fallback()
+
+            with metrics.track("score", current_model, self.key_index(api_key)) as call:
+                response = self.generate("score", current_model, api_key,
+                                         prompt.contents_for(current_model, count=batch_size, users=users_text),
+                                         template=prompt)
+                call.set_response(response)
+
+                if not (hasattr(response, 'text') and response.text):
+                    call.outcome = "empty"
+                    errors.record("score_empty_response", f"батч #{batch_num}", batch=batch_num)
+                    return None
+
+                # Нежадное выражение: первый JSON-массив в ответе
+                json_match = re.search(r'\[.*?\]', response.text.strip(), re.DOTALL)
+                if not json_match:
+                    call.outcome = "parse_fail"
+                    errors.record("score_no_json", f"батч #{batch_num}", batch=batch_num)
+                    return None
+                try:
+                    scores_array = json.loads(json_match.group(0))
+                except json.JSONDecodeError as e:
+                    call.outcome = "parse_fail"
+                    errors.record("score_json", e, batch=batch_num)
+                    return None
+                if not isinstance(scores_array, list):
+                    call.outcome = "parse_fail"
+                    errors.record("score_not_array", f"батч #{batch_num}", batch=batch_num)
+                    return None
+
+            scores_dict = {}
+            for item in scores_array:
+                if not isinstance(item, dict):
+                    continue
+                idx = item.get('index')
+                score = item.get('score')
+                if idx is None or score is None:
+                    continue
+                try:
+                    score_int = int(float(score))
+                    if not 0 <= score_int <= 100:
+                        continue
+                    # idx - 1 потому что индексы в JSON начинаются с 1
+                    if 0 <= idx - 1 < batch_size:
+                        scores_dict[idx - 1] = score_int
+                    else:
+                        errors.record("score_index_range", f"индекс {idx} вне батча ({batch_size})", batch=batch_num)
+                except (ValueError, TypeError, OverflowError) as e:
+                    errors.record("score_value", f"'{score}': {str(e)[:30]}", batch=batch_num)
+
+            # Пустой результат - валидное состояние (может быть пустой батч)
+            if scores_dict:
+                self.row_log.log(log, "score_batch", "Батч оценён", batch=batch_num, scores=len(scores_dict))
+            else:
+                errors.record("score_empty_result", f"батч #{batch_num}", batch=batch_num)
+            return scores_dict
+        except Exception as e:
+            errors.record("score_api", e, batch=batch_num)
+            return None
+
+    # ============ ГЕНЕРАЦИЯ СООБЩЕНИЙ ============
+    def generate_messages(self, row, api_key):
+        """Два сообщения для лида: приветствие по имени и персонализированное"""
+        name = str(row.get('Имя', '') or '').strip()
+        summary = str(row.get('Суммарное описание', '') or '').strip()
+        if name.lower() in ['nan', 'none']:
+            name = ""
+
+        # Сообщение 1: приветственное ТОЛЬКО с именем (без фамилии), имя по-русски
+        name = russify_name(name)
+        greeting = f"Добрый день, {name}!" if name else "Добрый день!"
+        msg1 = f"{greeting}\n\nМы - веб-агентство CodexAI. Посмотрите наши кейсы: codexai.pro"
+
+        # Сообщение 2: персонализированное по суммарайзу
+        settings = self.config.messages
+        generation_config = {"temperature": settings.temperature, "max_output_tokens": settings.max_output_tokens}
+        prompt = MESSAGE_PROMPT.format(summary=summary or 'Информация о деятельности не указана')
+        msg2 = FALLBACK_MESSAGE
+        try:
+            current_model = self.get_model_with_fallback()
+
+            with metrics.track("messages", current_model, self.key_index(api_key)) as call:
+                resp = self.generate("messages", current_model, api_key, prompt, generation_config)
+                call.set_response(resp)
+
+                if hasattr(resp, 'text') and resp.text:
+                    msg2 = resp.text.strip()
+                    # Удаляем возможные префиксы
+                    for prefix in ["Ответ:", "Сообщение:"]:
+                        if msg2.lower().startswith(prefix.lower()):
+                            msg2 = msg2[len(prefix):].strip()
+                    if len(msg2) > MESSAGE_MAX_LENGTH:
+                        msg2 = msg2[:MESSAGE_MAX_LENGTH].rsplit(' ', 1)[0] + "..."
+                else:
+                    call.outcome = "empty"
+        except Exception as e:
+            self.errors.record("messages_api", e)
+
+        return msg1, msg2
+
+    # ============ ПАРАЛЛЕЛЬНАЯ ОБРАБОТКА ============
+    def run_parallel(self, stage, records, work, on_error):
+        """work(record, api_key) по всем records в self.workers потоках; результаты -
+        массив в порядке records (каждый воркер пишет только в свою ячейку)"""
+        results = result_slots(len(records))
+
+        def process_one(slot):
+            record = records[slot]
+            try:
+                api_key = self.next_key()
+                self.progress.begin(stage)
+                results[slot] = work(record, api_key)
+            except Exception as e:
+                self.errors.record(f"{stage}_row", e, row=record.position)
+                results[slot] = on_error
+
+        self.progress.start_stage(stage, len(records))
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(process_one, slot) for slot in range(len(records))]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    self.errors.record("worker_thread", e)
+                self.progress.advance(stage)
+        self.progress.finish_stage(stage)
+        return results
+
+
+# ============ ЭТАПЫ ============
+def _header(title):
+    print("=" * 70)
+    print(title)
+    print("=" * 70)
+
+
+def summarize_stage(pipe, df, store):
+    """Суммарайз строк без него (с summarize.start_index); бедные профили - локально"""
+    _header("СУММАРАЙЗ")
+    start_index = pipe.config.summarize.start_index
+    needs_summary = [idx for idx, val in enumerate(df['Суммарное описание'].tolist())
+                     if idx >= start_index and is_empty_value(val)]
+    print(f"Требуется суммарайз: {len(needs_summary)} из {len(df)}")
+    if not needs_summary:
+        print("Все суммарайзы уже есть\n")
+        return 0
+
+    # Вероятно горячие лиды - первыми, пока не кончилась квота
+    records = extract_records(df, rank_indices(df, needs_summary))
+    # Профили с малым количеством данных суммаризуются локально, в API - остальные
+    low_signal = [pipe.is_low_signal(r.description) for r in records]
+    local = [r for r, low in zip(records, low_signal) if low]
+    remote = [r for r, low in zip(records, low_signal) if not low]
+    print(f"Локально (мало данных): {len(local)} | через API: {len(remote)}")
+    written = write_back(df, [r.position for r in local], 'Суммарное описание',
+                         [summarize_locally(r.name, r.surname, r.description) for r in local])
+
+    if pipe.cascade is not None:
+        def work(record, api_key):
+            return pipe.cascade.summarize(record, api_key, pipe.summarize_profile)
+    else:
+        work = pipe.summarize_profile
+    results = pipe.run_parallel("summarize", remote, work, "Ошибка обработки")
+    written += write_back(df, [r.position for r in remote], 'Суммарное описание', results)
+    # В хранилище пишутся только изменённые строки
+    store.upsert_frame(df.iloc[written])
+    print(f"Суммарайз завершён: {len(written)}\n")
+    return len(written)
+
+
+def _stamp_by_model(df, positions, models, prompt_key):
+    """Провенанс по моделям: часть строк могла оцениваться другой моделью"""
+    positions_by_model = {}
+    for position, model_name in zip(positions, models):
+        if model_name is not None:
+            positions_by_model.setdefault(model_name, []).append(position)
+    for model_name, model_positions in positions_by_model.items():
+        stamp_provenance(df, model_positions, prompt_key, model_name)
+
+
+def score_stage(pipe, df, store):
+    """Оценка неоценённых (в режиме incremental - и устаревших) строк батчами"""
+    _header("ОЦЕНКА ЛИДОВ")
+    settings = pipe.config.score
+    prompt = pipe.score_prompt()
+    prompt_key = prompt.key
+    ensure_provenance_columns(df)
+    band = tuple(settings.rescore_band) or None
+    needs_score = rows_to_score(df, settings.rescore_mode, prompt_key, settings.rescore_model or None, band)
+    print(f"Требуется оценка: {len(needs_score)} из {len(df)} (режим {settings.rescore_mode}, промпт {prompt_key})")
+    if settings.local_scoring and needs_score:
+        # Далёкие от порогов 50/80 строки - локальной моделью, в LLM - только неуверенные
+        local_positions, local_scores, needs_score = local_scorer.route(
+            df, needs_score, prompt_key, settings.local_min_spearman, settings.local_min_agreement,
+            settings.local_margin or None)
+        if local_positions:
+            written = write_back(df, local_positions, 'Интерес', local_scores)
+            stamp_provenance(df, written, prompt_key, local_scorer.LOCAL_MODEL_NAME)
+            store.upsert_frame(df.iloc[written])
+            print(f"Локальная модель: {len(written)} оценено | в LLM: {len(needs_score)}")
+    if not needs_score:
+        print("Все оценки уже есть\n")
+        return 0
+
+    needs_score = rank_indices(df, needs_score)
+    batch_size = settings.batch_size
+    progress = pipe.progress
+
+    if settings.k > 1:
+        # k прогонов в перемешанных батчах, калибровка по якорям, медиана
+        progress.start_stage("score", len(needs_score) * settings.k)
+
+        # Якоря своей рубрики: config.validate не пускает k > 1 без них
+        anchors = anchor_records(prompt.name)
+        exhausted = []
+
+        def score_calibrated(batch, batch_num):
+            # Дневная квота кончилась - остальные батчи пропускаются, медиана по тому, что есть
+            if exhausted:
+                return None, None
+            try:
+                score_model = pipe.get_model_with_fallback()
+            except QuotaExhausted as e:
+                exhausted.append(batch_num)
+                pipe.errors.record("score_quota", e, batch=batch_num)
+                print(f"⚠️  {e}: оценка остановлена на батче #{batch_num}")
+                return None, None
+            progress.begin("score")
+            scores = pipe.score_batch(batch, pipe.next_key(), batch_num, score_model)
+            # В прогрессе - только лиды: якоря в len(needs_score) * k не входят
+            progress.advance("score", len(batch) - len(anchors))
+            return scores, score_model
+
+        consistent = score_consistent(extract_records(df, needs_score), score_calibrated, batch_size,
+                                      anchors, settings.k, settings.seed)
+        scored_positions = write_back(df, needs_score, 'Интерес', np.round(consistent["scores"]))
+        _stamp_by_model(df, needs_score, consistent["models"], prompt_key)
+        store.upsert_frame(df.iloc[scored_positions])
+        progress.finish_stage("score")
+        print_consistency_report(consistent["stats"])
+        print("Оценка завершена\n")
+        return len(scored_positions)
+
+    total_batches = (len(needs_score) + batch_size - 1) // batch_size
+    print(f"Батчей: {total_batches}")
+    progress.start_stage("score", len(needs_score))
+    scored = 0
+
+    for batch_num in range(1, total_batches + 1):
+        batch_indices = needs_score[(batch_num - 1) * batch_size:batch_num * batch_size]
+        batch_data = extract_records(df, batch_indices)
+        api_key = pipe.next_key()
+
+        try:
+            # Слот модели - до begin: батч без квоты не уходит и "в полёте" не считается
+            score_model = (pipe.cascade.first_model() if pipe.cascade is not None
+                           else pipe.get_model_with_fallback())
+        except QuotaExhausted as e:
+            # Дневная квота кончилась - оценённое уже в хранилище, остальное - в следующий прогон
+            pipe.errors.record("score_quota", e, batch=batch_num)
+            print(f"⚠️  {e}: оценка остановлена на батче #{batch_num} из {total_batches}")
+            break
+        progress.begin("score")
+        if pipe.cascade is not None:
+            # {отн. индекс: модель} - часть строк могла быть перепроверена сильной моделью
+            scores, score_models = pipe.cascade.score(batch_data, api_key, batch_num, pipe.score_batch,
+                                                      score_model)
+        else:
+            scores = pipe.score_batch(batch_data, api_key, batch_num, score_model)
+            score_models = dict.fromkeys(scores or (), score_model)
+        progress.advance("score", len(batch_indices))
+        if not scores:
+            continue
+
+        rel_indices = np.fromiter(scores.keys(), dtype=np.int64, count=len(scores))
+        in_batch = (rel_indices >= 0) & (rel_indices < len(batch_indices))
+        if not in_batch.all():
+            pipe.errors.record("score_write_index", f"{int((~in_batch).sum())} индексов вне батча "
+                               f"({len(batch_indices)})", batch=batch_num)
+        score_values = np.fromiter(scores.values(), dtype=float, count=len(scores))
+        # Одно векторное присваивание вместо df.at по ячейке
+        scored_positions = write_back(df, np.asarray(batch_indices)[rel_indices[in_batch]],
+                                      'Интерес', score_values[in_batch])
+        # Чем получен скор: версия промпта, модель, хэш входа
+        _stamp_by_model(df, scored_positions, [score_models[i] for i in rel_indices[in_batch]], prompt_key)
+        # Сохраняем только что оценённые строки - прогон можно прервать в любой момент
+        store.upsert_frame(df.iloc[scored_positions])
+        scored += len(scored_positions)
+        log.info("Распределение после батча", extra={"fields": {
+            "batch": batch_num, **distribution(df['Интерес'])}})
+
+    progress.finish_stage("score")
+    print("Оценка завершена\n")
+    return scored
+
+
+def messages_stage(pipe, df, store):
+    """Сообщения для интересных лидов (скор >= messages.min_score) без сообщений"""
+    _header("ГЕНЕРАЦИЯ СООБЩЕНИЙ")
+    min_score = pipe.config.messages.min_score
+    # Выборка по индексу (status, score) хранилища, от горячих к тёплым
+    positions = pd.Series(range(len(df)), index=lead_keys(df))
+    positions = positions[positions.index.notna() & ~positions.index.duplicated()]
+    hot_keys = lead_keys(store.hot_without_messages(min_score=min_score))
+    needs_messages = [int(p) for p in positions.reindex(hot_keys).dropna()]
+    print(f"Генерация сообщений для лидов (скор >= {min_score}): {len(needs_messages)}")
+    if not needs_messages:
+        print("Все сообщения уже есть\n")
+        return 0
+
+    results = pipe.run_parallel("messages", extract_records(df, needs_messages),
+                                pipe.generate_messages, ("Ошибка", "Ошибка"))
+    written = write_back(df, needs_messages, 'Сообщение 1', [pair[0] for pair in results])
+    write_back(df, needs_messages, 'Сообщение 2', [pair[1] for pair in results])
+    store.upsert_frame(df.iloc[written])
+    print(f"Сообщения сгенерированы: {len(written)}\n")
+    return len(written)
+
+
+# Этапы в порядке пайплайна: {имя: функция(pipe, df, store) -> строк записано}
+STAGES = {
+    "summarize": summarize_stage,
+    "score": score_stage,
+    "messages": messages_stage,
+}
+
+
+# ============ ЗАГРУЗКА И ВЫГРУЗКА ============
+def load_leads(config):
+    """Хранилище и DataFrame лидов с колонками результатов; (None, None) - нечего обрабатывать"""
+    print(f"Загрузка {config.store.file}...")
+    try:
+        store = open_store(config.store.file, config.store.seed_files)
+        df = store.load_frame()
+    except MemoryError:
+        print("❌ КРИТИЧЕСКАЯ ОШИБКА: недостаточно памяти для загрузки данных!")
+        return None, None
+    except Exception as e:
+        print(f"❌ Ошибка при чтении хранилища: {str(e)}")
+        return None, None
+    if len(df) == 0:
+        files = " / ".join(f"'{seed}'" for seed in config.store.seed_files)
+        print(f"❌ Ошибка: хранилище пустое и нет файлов {files}!")
+        store.close()
+        return None, None
+    if len(df) > 100000:
+        print(f"⚠️  ВНИМАНИЕ: большая база ({len(df)} строк). Обработка может быть медленной.")
+    print(f"Загружено: {len(df)} пользователей {store.count_by_status()}\n")
+    for column in OUTPUT_COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+    return store, df
+
+
+def export_results(config, store, metadata=None):
+    """Excel / JSON / NDJSON / CSV из export.* - за один потоковый проход по хранилищу
+    (от горячих к холодным); возвращает список записанных файлов"""
+    settings = config.export
+    writers = []
+    if settings.excel:
+        writers.append(XlsxWriter(settings.excel))
+    if settings.json:
+        writers.append(JsonWriter(settings.json, metadata or {}))
+    if settings.ndjson:
+        writers.append(NdjsonWriter(settings.ndjson))
+    if settings.csv:
+        writers.append(CsvWriter(settings.csv, settings.csv_columns))
+    if writers:
+        export(store.iter_frames(order_by="score DESC", chunk_size=settings.chunk_size),
+               writers, parallel=settings.parallel)
+    return [path for path in (settings.excel, settings.json, settings.ndjson, settings.csv) if path]
+
+
+def export_metadata(config, report, elapsed=None, api_requests=None):
+    """Шапка JSON-выгрузки"""
+    metadata = {
+        "total_users": report["distribution"]["total"],
+        "generated_at": datetime.now().isoformat(),
+        "model": config.models.primary,
+        "batch_size": config.score.batch_size,
+        "prompt": get_prompt(config.score.prompt, config.score.variant).key,
+        "distribution": {bucket: report["distribution"][bucket] for bucket in BUCKETS[::-1]},
+    }
+    if elapsed is not None:
+        metadata["processing_time_seconds"] = elapsed
+    if api_requests is not None:
+        metadata["api_requests"] = api_requests
+    return metadata
+
+
+# ============ ОТЧЁТ ============
+def print_run_report(pipe, df, elapsed):
+    """Распределение, API, метрики, трафик, каскад, хеджирование, ошибки, топ лидов (report.*)"""
+    report = build_report(df)
+    _header("СТАТИСТИКА")
+    print(f"Время: {elapsed/60:.1f} мин")
+    print(f"Обработано: {report['distribution']['total']}\n")
+    if report["distribution"]["total"] > 0:
+        print_report(report)
+
+    if pipe.pacer is not None:
+        api_stats = pipe.pacer.status()
+        print()
+        _header("СТАТИСТИКА ИСПОЛЬЗОВАНИЯ API")
+        for model, stats in api_stats["models"].items():
+            print(f"{model}:")
+            print(f"  Запросов сегодня: {stats['requests_today']}")
+            print(f"  Запросов за минуту: {stats['minute_requests']}")
+        print(f"Ожидание слотов квоты (все потоки): {api_stats['waited_seconds']} с")
+
+        print()
+        _header("МЕТРИКИ ВЫЗОВОВ API")
+        print_summary(metrics)
+
+        hedge_stats = pipe.hedger.summary()
+        print(f"Хеджирование: {hedge_stats['hedged']} дубликатов из {hedge_stats['calls']} вызовов, "
+              f"дубликат быстрее: {hedge_stats['hedge_won']}, нет квоты: {hedge_stats['hedge_skipped']}, "
+              f"дедлайн истёк: {hedge_stats['timeouts']}")
+
+    if pipe.traffic is not None:
+        traffic_stats = pipe.traffic.summary()
+        if pipe.traffic.mode == "record":
+            print(f"Трафик записан: {traffic_stats['recorded']} вызовов -> {pipe.config.traffic.log}")
+        else:
+            print(f"Воспроизведено: {traffic_stats['replayed']} ответов, ошибок из лога: {traffic_stats['errors']}, "
+                  f"нет в логе: {traffic_stats['misses']}")
+
+    if pipe.cascade is not None:
+        print("\nКаскад моделей:")
+        print_cascade_report(pipe.cascade)
+
+    error_summary = pipe.errors.log_summary()
+    if error_summary:
+        print("\nОшибки по категориям:")
+        for category, entry in error_summary.items():
+            print(f"  {category}: {entry['count']}")
+
+    top = pipe.config.report
+    if top.top:
+        print()
+        _header(f"ТОП-{top.top} ЛИДОВ (скор >= {top.min_score})")
+        ranked = df.assign(Интерес=pd.to_numeric(df['Интерес'], errors='coerce'))
+        ranked = ranked[ranked['Интерес'] >= top.min_score].sort_values('Интерес', ascending=False)
+        print_leads(ranked.head(top.top))
+    return report
+
+
+# ============ КОМАНДЫ ============
+def run(config, stages=None, export=True):
+    """Этапы stages (по умолчанию run.stages) по очереди, затем выгрузка
+    (export=False - результаты только в хранилище) и отчёт"""
+    stages = list(stages or config.run.stages)
+    pipe = Pipeline(config).start()
+    models = config.models
+    _header(f"ПАЙПЛАЙН ЛИДОВ: {' + '.join(stages).upper()}" + (f" (пресет {config.preset})" if config.preset else ""))
+    print(f"API ключей: {len(pipe.keys)} | Параллельных потоков: {pipe.workers}")
+    print(f"  Основная: {models.primary} (RPM: {models.primary_rpm}, RPD: {models.primary_rpd or '-'})")
+    if models.fallback:
+        print(f"  Fallback: {models.fallback} (RPM: {models.fallback_rpm}, RPD: {models.fallback_rpd or '-'})")
+    print("=" * 70 + "\n")
+
+    store, df = load_leads(config)
+    if store is None:
+        pipe.close()
+        return None
+
+    start_time = datetime.now()
+    try:
+        for stage in stages:
+            STAGES[stage](pipe, df, store)
+    finally:
+        # Всё уже в хранилище; выгрузка, отчёт и сброс метрик/логов/трафика -
+        # в том числе после ошибки или прерывания этапа
+        elapsed = (datetime.now() - start_time).total_seconds()
+        try:
+            _header("СОХРАНЕНИЕ")
+            outputs = []
+            try:
+                if export:
+                    api_requests = sum(m["requests_total"] for m in pipe.pacer.status()["models"].values())
+                    metadata = export_metadata(config, build_report(df), elapsed, api_requests)
+                    outputs = export_results(config, store, metadata)
+            finally:
+                store.close()
+            print(f"Хранилище: {config.store.file}" + "".join(f" | {path}" for path in outputs))
+            print()
+            print_run_report(pipe, df, elapsed)
+        finally:
+            pipe.close()
+    print("\nГотово!")
+    return df
+
+
+def export_only(config):
+    """Выгрузка из хранилища без обращений к API"""
+    pipe = Pipeline(config).start(api=False)
+    store, df = load_leads(config)
+    if store is None:
+        pipe.close()
+        return []
+    outputs = export_results(config, store, export_metadata(config, build_report(df)))
+    store.close()
+    for path in outputs:
+        print(f"✅ {path}")
+    if not outputs:
+        print("⚠️  В export.* не задано ни одного файла")
+    pipe.close()
+    return outputs
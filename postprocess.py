@@ -0,0 +1,81 @@
+# ПОСТОБРАБОТКА СУММАРАЙЗОВ
+# Одна и та же очистка ответа модели для ai.py и lead_processor: служебные
+# префиксы, фразы-связки ("что указывает на ..."), лишние пробелы, ответы
+# "недостаточно данных" и слишком длинные тексты. Все шаблоны собраны в
+# заранее скомпилированные регулярки-альтернации - один проход на текст.
+
+import re
+
+import pandas as pd
+
+UNDEFINED = "Деятельность не определена"
+NOT_SPECIFIED = "Деятельность не указана"
+API_ERROR = "Ошибка API"
+
+MIN_LENGTH = 20  # Короче - считаем, что модель ничего не определила
+MAX_LENGTH = 1500  # Длиннее - обрезаем по последней точке
+MIN_CUT = 500  # ...если она не раньше этого символа
+
+PREFIXES = [
+    "Ответ:", "Описание:", "Деятельность:",
+    "На основе данных:", "Судя по информации:",
+    "Этот человек", "Данный человек",
+]
+FILLER_PHRASES = [
+    "что указывает на", "что указывает", "что говорит",
+    "что свидетельствует", "что означает",
+]
+UNCLEAR_PHRASES = [
+    "недостаточно данных", "не определена", "информации недостаточно",
+    "нет информации", "не указано",
+]
+
+
+def _alternation(phrases):
+    # Длинные варианты первыми: "что указывает на" раньше "что указывает"
+    return "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+
+
+# Префиксы в начале (могут идти подряд: "Ответ: Описание: ...")
+PREFIX_RE = re.compile(rf"^(?:\s*(?:{_alternation(PREFIXES)}))+\s*", re.IGNORECASE)
+# Фразы-связки и любые пробельные последовательности -> один пробел; запятая
+# перед связкой остаётся ("мебель, что указывает на бизнес" -> "мебель, бизнес")
+SPACING_RE = re.compile(rf"\s+(?:{_alternation(FILLER_PHRASES)})\s+|\s+", re.IGNORECASE)
+UNCLEAR_RE = re.compile(_alternation(UNCLEAR_PHRASES), re.IGNORECASE)
+QUOTES = "\"' \t\r\n"
+
+
+def _truncate(text):
+    text = text[:MAX_LENGTH]
+    last_period = text.rfind('.')
+    if last_period > MIN_CUT:
+        text = text[:last_period + 1].strip()
+    return text
+
+
+def clean_summary(text):
+    """Очистить один ответ модели; UNDEFINED, если осмысленного текста нет"""
+    if text is None or (isinstance(text, float) and pd.isna(text)):
+        return UNDEFINED
+    text = PREFIX_RE.sub("", str(text).strip(QUOTES))
+    text = SPACING_RE.sub(" ", text).strip()
+    if len(text) < MIN_LENGTH or UNCLEAR_RE.search(text):
+        return UNDEFINED
+    if len(text) > MAX_LENGTH:
+        text = _truncate(text)
+    return text
+
+
+def clean_summaries(texts):
+    """То же для Series ответов (батч): строковые операции pandas по всей колонке"""
+    texts = pd.Series(texts)
+    missing = texts.isna()
+    cleaned = (texts.fillna("").astype(str).str.strip(QUOTES)
+               .str.replace(PREFIX_RE, "", regex=True)
+               .str.replace(SPACING_RE, " ", regex=True)
+               .str.strip())
+    too_long = cleaned.str.len() > MAX_LENGTH
+    if too_long.any():
+        cleaned[too_long] = cleaned[too_long].map(_truncate)
+    undefined = missing | (cleaned.str.len() < MIN_LENGTH) | cleaned.str.contains(UNCLEAR_RE, regex=True)
+    return cleaned.mask(undefined, UNDEFINED)
@@ -0,0 +1,77 @@
+# ПРИОРИТЕТ ОБРАБОТКИ СТРОК
+# Дешёвые локальные сигналы (Премиум, длина описания, бизнес-ключевые слова,
+# свежесть "Дата сбора") - чтобы при нехватке квоты горячие лиды были
+# обработаны первыми. Всё считается векторно по pandas-колонкам.
+
+import re
+
+import numpy as np
+import pandas as pd
+
+PRIORITY_ENABLED = True
+
+# Веса сигналов (в сумме 100)
+WEIGHT_PREMIUM = 20
+WEIGHT_LENGTH = 20
+WEIGHT_KEYWORDS = 45
+WEIGHT_RECENCY = 15
+
+LENGTH_CAP = 300  # Описание длиннее не даёт дополнительных баллов
+KEYWORDS_CAP = 3  # Совпадений ключевых слов для максимума
+RECENCY_DAYS = 90  # Сбор старше этого срока не даёт баллов за свежесть
+
+# Корни слов, указывающих на бизнес / владельца / нужду в сайте
+BUSINESS_KEYWORDS = [
+    "владел", "основател", "сооснов", "директор", "руководител", "собственник",
+    "предпринимател", r"\bип\b", "ceo", "founder", "owner", "co-founder",
+    "бизнес", "компани", "магазин", "салон", "клиник", "ресторан", "кафе",
+    "студи", "агентств", "услуг", "продаж", "производств", "доставк",
+    "недвижимост", "ремонт", "строител", "школ", "курс", "эксперт",
+    "консалт", "коуч", "психолог", "юрист", "бухгалт", "сайт", "лендинг",
+    "заявк", "клиент", "опт", "шоп", "shop", "store",
+]
+# Без IGNORECASE: текст приводится к нижнему регистру один раз, так в разы быстрее
+BUSINESS_KEYWORDS_RE = re.compile("|".join(BUSINESS_KEYWORDS))
+
+
+def _text_column(df, column):
+    if column not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[column].fillna("").astype(str)
+
+
+def priority_scores(df):
+    """Приоритет 0-100 для каждой строки df (выше - раньше в очередь)"""
+    if df.empty:
+        return pd.Series(dtype=float, index=df.index)
+
+    # В "Полное имя" часто пишут род занятий: "Женя | Репетитор английского"
+    text = _text_column(df, 'Описание профиля') + " " + _text_column(df, 'Полное имя')
+    if 'Суммарное описание' in df.columns:
+        text = text + " " + _text_column(df, 'Суммарное описание')
+
+    premium = _text_column(df, 'Премиум').str.strip().eq('Да').astype(float)
+    length = text.str.len().clip(upper=LENGTH_CAP) / LENGTH_CAP
+    keywords = text.str.lower().str.count(BUSINESS_KEYWORDS_RE).clip(upper=KEYWORDS_CAP) / KEYWORDS_CAP
+
+    if 'Дата сбора' in df.columns:
+        dates = pd.to_datetime(df['Дата сбора'], errors='coerce')
+        newest = dates.max()
+        age_days = (newest - dates).dt.total_seconds() / 86400
+        recency = (1 - age_days / RECENCY_DAYS).clip(lower=0, upper=1).fillna(0)
+    else:
+        recency = pd.Series(0.0, index=df.index)
+
+    return (WEIGHT_PREMIUM * premium + WEIGHT_LENGTH * length
+            + WEIGHT_KEYWORDS * keywords + WEIGHT_RECENCY * recency)
+
+
+def rank_indices(df, indices):
+    """Позиционные индексы строк df, отсортированные по убыванию приоритета
+    (при равном приоритете сохраняется исходный порядок)"""
+    indices = list(indices)
+    if not PRIORITY_ENABLED or not indices:
+        return indices
+    scores = priority_scores(df.iloc[indices]).to_numpy()
+    order = np.argsort(-scores, kind='stable')
+    return [indices[i] for i in order]
@@ -0,0 +1,313 @@
+# ПРОФИЛИРОВАНИЕ ПАЙПЛАЙНОВ
+# Куда уходит время медленного прогона: ожидание квоты, фиксированные паузы,
+# сеть, разбор ответов, операции с DataFrame или файлы? Режим --profile
+# оборачивает известные точки (time.sleep, generate_content, хранилище и
+# Excel, функции records/priority/provenance/reporting, постобработку) и
+# раскладывает время по категориям и этапам (этап - из ProgressTracker).
+# Время считается исключительно: сеть внутри score_batch не попадает в разбор.
+# Плюс cProfile (и pyinstrument, если установлен) для основного потока.
+#
+#   python cli.py run --profile
+#   python profiling.py ai.py              # любой скрипт целиком
+#   python profiling.py --out prof batch_universal_scoring.py
+
+import argparse
+import cProfile
+import functools
+import inspect
+import io
+import json
+import os
+import pstats
+import runpy
+import sys
+import threading
+import time
+from datetime import datetime
+
+PROFILE_DIR = 'profiles'
+TOP_FUNCTIONS = 25  # Строк cProfile в консоли
+
+# Категории (порядок - для отчёта)
+CATEGORIES = ["quota_wait", "sleep", "network", "parsing", "dataframe", "file_io"]
+CATEGORY_TITLES = {
+    "quota_wait": "ожидание квоты",
+    "sleep": "фиксированные паузы",
+    "network": "сеть (запрос в полёте)",
+    "parsing": "промпты и разбор ответов",
+    "dataframe": "операции с DataFrame",
+    "file_io": "файлы и хранилище",
+}
+# time.sleep внутри этих функций - ожидание квоты, а не фиксированная пауза
+QUOTA_WAIT_FUNCTIONS = {"get_model_with_fallback"}
+
+# Что оборачивать: (модуль, "Класс.метод" или "функция", категория)
+INSTRUMENTED = [
+    ("pacing", "Pacer.acquire", "quota_wait"),
+    ("google.generativeai.generative_models", "GenerativeModel.generate_content", "network"),
+    ("pandas", "read_excel", "file_io"),
+    ("pandas", "DataFrame.to_excel", "file_io"),
+    ("leadstore", "LeadStore.load_frame", "file_io"),
+    ("leadstore", "LeadStore.iter_frames", "file_io"),
+    ("leadstore", "LeadStore.upsert_frame", "file_io"),
+    ("leadstore", "LeadStore.import_excel", "file_io"),
+    ("leadstore", "LeadStore.export_excel", "file_io"),
+    ("leadstore", "LeadStore.query", "file_io"),
+    ("leadstore", "LeadStore.hot_without_messages", "file_io"),
+    ("exporters", "JsonWriter.write", "file_io"),
+    ("exporters", "CsvWriter.write", "file_io"),
+    ("exporters", "XlsxWriter.write", "file_io"),
+    ("exporters", "XlsxWriter.close", "file_io"),
+    ("records", "extract_records", "dataframe"),
+    ("records", "write_back", "dataframe"),
+    ("priority", "rank_indices", "dataframe"),
+    ("provenance", "rows_to_score", "dataframe"),
+    ("provenance", "stamp", "dataframe"),
+    ("reporting", "build_report", "dataframe"),
+    ("reporting", "distribution", "dataframe"),
+    ("prompts", "format_users", "parsing"),
+    ("postprocess", "clean_summary", "parsing"),
+    ("json", "loads", "parsing"),
+]
+
+
+class Profiler:
+    """Исключительное время по (этап, категория) во всех потоках"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.totals = {}  # {(stage, category): [секунд, вызовов]}
+        self.stage = "до этапов"
+        self.stage_started = time.perf_counter()
+        self.stage_wall = {}  # {stage: секунд}
+        self.patched = []  # [(объект, имя, оригинал)]
+
+    # ============ УЧЁТ ============
+    def _stack(self):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def enter(self, category):
+        self._stack().append([category, time.perf_counter(), 0.0])
+
+    def exit(self):
+        stack = self._stack()
+        category, started, children = stack.pop()
+        elapsed = time.perf_counter() - started
+        if stack:
+            stack[-1][2] += elapsed
+        with self.lock:
+            entry = self.totals.setdefault((self.stage, category), [0.0, 0])
+            entry[0] += elapsed - children
+            entry[1] += 1
+
+    def current_category(self):
+        stack = self._stack()
+        return stack[-1][0] if stack else None
+
+    def set_stage(self, name):
+        """Закрыть текущий этап (стеночное время) и начать новый"""
+        now = time.perf_counter()
+        with self.lock:
+            self.stage_wall[self.stage] = self.stage_wall.get(self.stage, 0.0) + now - self.stage_started
+            self.stage = name
+            self.stage_started = now
+
+    # ============ ОБЁРТКИ ============
+    def wrap(self, fn, category):
+        profiler = self
+
+        if inspect.isgeneratorfunction(fn):
+            # Генератор: время каждого шага, а не только создания
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                iterator = fn(*args, **kwargs)
+                while True:
+                    profiler.enter(category)
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        profiler.exit()
+                    yield item
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profiler.enter(category)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profiler.exit()
+        return wrapper
+
+    def _sleep(self, original):
+        profiler = self
+
+        @functools.wraps(original)
+        def sleep(seconds):
+            caller = sys._getframe(1).f_code.co_name
+            quota = caller in QUOTA_WAIT_FUNCTIONS or profiler.current_category() == "quota_wait"
+            profiler.enter("quota_wait" if quota else "sleep")
+            try:
+                original(seconds)
+            finally:
+                profiler.exit()
+        return sleep
+
+    def _replace(self, owner, name, replacement):
+        self.patched.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, replacement)
+
+    def _replace_everywhere(self, original, replacement):
+        """Функцию могли импортировать через from x import f - подменяем и там"""
+        for module in list(sys.modules.values()):
+            namespace = getattr(module, "__dict__", None)
+            if not namespace:
+                continue
+            for name, value in list(namespace.items()):
+                if value is original:
+                    self._replace(module, name, replacement)
+
+    def install(self):
+        """Обернуть точки из INSTRUMENTED, time.sleep и этапы ProgressTracker"""
+        import importlib
+
+        self._replace(time, "sleep", self._sleep(time.sleep))
+
+        for module_name, path, category in INSTRUMENTED:
+            try:
+                owner = importlib.import_module(module_name)
+            except ImportError:
+                continue
+            *classes, name = path.split(".")
+            for class_name in classes:
+                owner = getattr(owner, class_name)
+            original = owner.__dict__.get(name) if isinstance(owner, type) else getattr(owner, name, None)
+            if original is None:
+                continue
+            wrapped = self.wrap(original, category)
+            if isinstance(owner, type):
+                self._replace(owner, name, wrapped)
+            else:
+                self._replace_everywhere(original, wrapped)
+
+        # Этап берётся из трекера прогресса (summarize / score / messages)
+        from progress import ProgressTracker
+        start_stage, finish_stage = ProgressTracker.start_stage, ProgressTracker.finish_stage
+        profiler = self
+
+        def start(tracker, name, total):
+            profiler.set_stage(name)
+            return start_stage(tracker, name, total)
+
+        def finish(tracker, name):
+            result = finish_stage(tracker, name)
+            profiler.set_stage(f"после {name}")
+            return result
+
+        self._replace(ProgressTracker, "start_stage", start)
+        self._replace(ProgressTracker, "finish_stage", finish)
+
+    def uninstall(self):
+        for owner, name, original in reversed(self.patched):
+            setattr(owner, name, original)
+        self.patched = []
+
+    # ============ ОТЧЁТ ============
+    def summary(self):
+        self.set_stage(self.stage)
+        with self.lock:
+            stages = {}
+            for (stage, category), (seconds, calls) in self.totals.items():
+                entry = stages.setdefault(stage, {"wall": round(self.stage_wall.get(stage, 0.0), 3),
+                                                  "categories": {}})
+                entry["categories"][category] = {"seconds": round(seconds, 3), "calls": calls}
+            for stage, wall in self.stage_wall.items():
+                stages.setdefault(stage, {"wall": round(wall, 3), "categories": {}})
+            return stages
+
+
+def print_profile(stages):
+    """Время по этапам и категориям; паузы и ожидание квоты - отдельной строкой"""
+    print("\n" + "=" * 70)
+    print("ПРОФИЛЬ: КУДА УШЛО ВРЕМЯ")
+    print("=" * 70)
+    print("Секунды - сумма по всем потокам (при параллельной работе больше стеночного времени)\n")
+    totals = {category: 0.0 for category in CATEGORIES}
+    for stage, entry in stages.items():
+        if entry["wall"] < 0.001 and not entry["categories"]:
+            continue
+        print(f"{stage}: {entry['wall']:.1f} с стеночного времени")
+        for category in CATEGORIES:
+            item = entry["categories"].get(category)
+            if item:
+                totals[category] += item["seconds"]
+                print(f"  {CATEGORY_TITLES[category]:28} {item['seconds']:9.2f} с  ({item['calls']} вызовов)")
+    idle = totals["sleep"] + totals["quota_wait"]
+    busy = sum(totals.values())
+    print(f"\n⏸️  Простой (паузы + ожидание квоты): {idle:.1f} с из {busy:.1f} с учтённого времени"
+          f" ({idle * 100 / busy if busy else 0:.0f}%)")
+
+
+def profile_call(fn, name, out_dir=PROFILE_DIR):
+    """Выполнить fn() под профилировщиком: категории по этапам, cProfile, pyinstrument"""
+    profiler = Profiler()
+    profiler.install()
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+    try:
+        from pyinstrument import Profiler as Instrument  # необязательная зависимость
+    except ImportError:
+        Instrument = None
+    instrument = Instrument() if Instrument is not None else None
+
+    cprofile = cProfile.Profile()
+    if instrument is not None:
+        instrument.start()
+    cprofile.enable()
+    try:
+        return fn()
+    finally:
+        cprofile.disable()
+        if instrument is not None:
+            instrument.stop()
+        profiler.uninstall()
+
+        stages = profiler.summary()
+        print_profile(stages)
+        with open(base + "_categories.json", 'w', encoding='utf-8') as f:
+            json.dump(stages, f, ensure_ascii=False, indent=2)
+
+        cprofile.dump_stats(base + ".pstats")
+        stream = io.StringIO()
+        pstats.Stats(cprofile, stream=stream).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        print(f"\ncProfile (основной поток), топ-{TOP_FUNCTIONS} по cumulative:")
+        print(stream.getvalue())
+        if instrument is not None:
+            with open(base + ".html", 'w', encoding='utf-8') as f:
+                f.write(instrument.output_html())
+
+        outputs = [base + "_categories.json", base + ".pstats"] + ([base + ".html"] if instrument else [])
+        print("📁 Профиль: " + ", ".join(outputs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запустить скрипт пайплайна под профилировщиком")
+    parser.add_argument("--out", default=PROFILE_DIR, help=f"Папка для профилей (по умолчанию {PROFILE_DIR})")
+    parser.add_argument("script", help="Скрипт: cli.py, lead_processor.py, ai.py, batch_universal_scoring.py")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Аргументы скрипта")
+    args = parser.parse_args()
+
+    sys.argv = [args.script] + args.args
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    name = os.path.splitext(os.path.basename(args.script))[0]
+    profile_call(lambda: runpy.run_path(args.script, run_name="__main__"), name, args.out)
+
+
+if __name__ == "__main__":
+    main()
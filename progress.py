@@ -0,0 +1,206 @@
+# ПРОГРЕСС И ТЕЛЕМЕТРИЯ ПАЙПЛАЙНОВ
+# Строк/сек по этапам (скользящее среднее), запросы в полёте, запас квоты, ETA
+# Вывод в терминал + машиночитаемый статус-файл для сайдкара. Фоновый поток
+# (heartbeat) обновляет их и когда ничего не завершается - иначе файл
+# замирал бы ровно тогда, когда прогон завис, и "stalled" не выставлялся бы
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+class StageProgress:
+    """Состояние одного этапа (суммарайз, оценка, сообщения)"""
+    def __init__(self, name, total, window):
+        self.name = name
+        self.total = total
+        self.done = 0
+        self.in_flight = 0
+        self.started = time.time()
+        self.last_progress = self.started
+        self.finished = None
+        self.completions = deque(maxlen=window)  # (timestamp, количество)
+
+    def rate(self, now):
+        """Строк/сек по последним завершениям (до текущего момента, чтобы был виден простой)"""
+        if not self.completions:
+            return 0.0
+        first_ts = self.completions[0][0]
+        count = sum(n for _, n in self.completions)
+        if len(self.completions) < self.completions.maxlen:
+            # Окно ещё не заполнено - считаем от начала этапа
+            first_ts = self.started
+        elapsed = now - first_ts
+        return count / elapsed if elapsed > 0 else 0.0
+
+    def eta(self, now):
+        """Оставшееся время в секундах (None если скорость неизвестна)"""
+        rate = self.rate(now)
+        if rate <= 0:
+            return None
+        return max(self.total - self.done, 0) / rate
+
+    def to_dict(self, now, stall_seconds):
+        if self.finished is not None:
+            now = self.finished
+        eta = self.eta(now)
+        return {
+            "stage": self.name,
+            "total": self.total,
+            "done": self.done,
+            "in_flight": self.in_flight,
+            "rows_per_sec": round(self.rate(now), 3),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "elapsed_seconds": round(now - self.started, 1),
+            "seconds_since_progress": round(now - self.last_progress, 1),
+            "stalled": self.finished is None and now - self.last_progress > stall_seconds,
+            "finished": self.finished is not None,
+        }
+
+
+def format_duration(seconds):
+    """Секунды -> '1ч 02мин' / '3мин 15сек'"""
+    if seconds is None:
+        return "?"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}ч {seconds % 3600 // 60:02d}мин"
+    return f"{seconds // 60}мин {seconds % 60:02d}сек"
+
+
+class ProgressTracker:
+    """Общий трекер прогресса для всех пайплайнов (потокобезопасный)"""
+    def __init__(self, status_file=None, window=50, report_interval=5.0,
+                 stall_seconds=120, headroom_fn=None):
+        self.status_file = status_file
+        self.window = window
+        self.report_interval = report_interval
+        self.stall_seconds = stall_seconds
+        self.headroom_fn = headroom_fn  # () -> {модель/ключ: {"rpm_left": .., "rpd_left": ..}}
+        self.stages = {}
+        self.current = None
+        self.lock = threading.Lock()
+        self.last_report = 0.0
+        self.is_tty = sys.stdout.isatty()
+        self.stopped = threading.Event()
+        self.heartbeat = None
+
+    def start_stage(self, name, total):
+        """Начать этап с известным числом строк"""
+        with self.lock:
+            self.stages[name] = StageProgress(name, total, self.window)
+            self.current = name
+            if self.heartbeat is None:
+                self.heartbeat = threading.Thread(target=self._heartbeat, name="progress-heartbeat", daemon=True)
+                self.heartbeat.start()
+        self.report(force=True)
+
+    def _heartbeat(self):
+        """Раз в report_interval - статус, пока есть незавершённый этап (stalled считается здесь)"""
+        while not self.stopped.wait(self.report_interval):
+            with self.lock:
+                active = any(stage.finished is None for stage in self.stages.values())
+            if active:
+                self.report()
+
+    def close(self):
+        """Остановить heartbeat (статус-файл остаётся с последним состоянием)"""
+        self.stopped.set()
+        if self.heartbeat is not None:
+            self.heartbeat.join(timeout=self.report_interval + 1)
+
+    def begin(self, name):
+        """Запрос ушёл в API (+1 в полёте)"""
+        with self.lock:
+            self.stages[name].in_flight += 1
+
+    def advance(self, name, n=1, in_flight_done=True):
+        """Обработано n строк"""
+        now = time.time()
+        with self.lock:
+            stage = self.stages[name]
+            stage.done += n
+            if in_flight_done and stage.in_flight > 0:
+                stage.in_flight -= 1
+            stage.completions.append((now, n))
+            stage.last_progress = now
+        self.report()
+
+    def finish_stage(self, name):
+        """Завершить этап"""
+        with self.lock:
+            self.stages[name].finished = time.time()
+            self.stages[name].in_flight = 0
+        self.report(force=True)
+        if self.is_tty:
+            print()
+
+    # ============ ВЫВОД ============
+    def snapshot(self):
+        """Машиночитаемый статус всех этапов"""
+        now = time.time()
+        with self.lock:
+            stages = [stage.to_dict(now, self.stall_seconds) for stage in self.stages.values()]
+            current = self.current
+        status = {
+            "timestamp": datetime.now().isoformat(),
+            "pid": os.getpid(),
+            "current_stage": current,
+            "stages": stages,
+        }
+        if self.headroom_fn is not None:
+            try:
+                status["quota_headroom"] = self.headroom_fn()
+            except Exception as e:
+                status["quota_headroom"] = {"error": str(e)[:100]}
+        return status
+
+    def render(self, status):
+        """Одна строка для терминала по текущему этапу"""
+        stage = next((s for s in status["stages"] if s["stage"] == status["current_stage"]), None)
+        if stage is None:
+            return ""
+        percentage = stage["done"] * 100 // stage["total"] if stage["total"] else 100
+        line = (f"  {stage['stage']}: {stage['done']}/{stage['total']} ({percentage}%) | "
+                f"{stage['rows_per_sec']:.2f} стр/с | в полёте: {stage['in_flight']} | "
+                f"осталось: ~{format_duration(stage['eta_seconds'])}")
+        headroom = status.get("quota_headroom")
+        if headroom and "error" not in headroom:
+            parts = [f"{name}: {left.get('rpm_left', '?')}/мин" for name, left in headroom.items()]
+            line += " | квота: " + ", ".join(parts)
+        if stage["stalled"]:
+            line += f" | ⚠️  нет прогресса {format_duration(stage['seconds_since_progress'])}"
+        return line
+
+    def write_status(self, status):
+        """Атомарно записать статус-файл (tmp + rename)"""
+        if not self.status_file:
+            return
+        tmp_path = self.status_file + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(status, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.status_file)
+
+    def report(self, force=False):
+        """Обновить терминал и статус-файл не чаще report_interval"""
+        now = time.time()
+        with self.lock:
+            if not force and now - self.last_report < self.report_interval:
+                return
+            self.last_report = now
+        status = self.snapshot()
+        line = self.render(status)
+        if line:
+            if self.is_tty:
+                sys.stdout.write("\r" + line.ljust(120)[:200])
+                sys.stdout.flush()
+            else:
+                print(line)
+        try:
+            self.write_status(status)
+        except OSError as e:
+            print(f"  ⚠️  Не удалось записать статус-файл: {str(e)[:50]}")
@@ -0,0 +1,235 @@
+# РЕЕСТР ПРОМПТОВ
+# Версионированные шаблоны, общие для всех скриптов. Каждый шаблон делится на
+# фиксированную инструкцию (system) и переменную часть (template): инструкция
+# уходит в system_instruction (clients.get_model), а каждый запрос платит
+# только за переменную часть (профиль, список пользователей). Кэш контекста
+# провайдера не используется: инструкции (до ~760 токенов) короче его
+# минимального размера (1024).
+# Запуск `python prompts.py` печатает версии и оценку токенов.
+
+import math
+
+# Вариант по умолчанию: "full" - развёрнутые рубрики исходных скриптов,
+# "compact" - сжатые (меньше токенов), только если выбран явно
+DEFAULT_VARIANT = "full"
+
+PROMPTS = {}  # {(name, variant): PromptTemplate}
+
+
+class PromptTemplate:
+    """Шаблон промпта: фиксированная инструкция + переменная часть"""
+    __slots__ = ("name", "version", "variant", "system", "template")
+
+    def __init__(self, name, version, variant, system, template):
+        self.name = name
+        self.version = version
+        self.variant = variant
+        self.system = system.strip()
+        self.template = template.strip()
+
+    @property
+    def key(self):
+        """Идентификатор для логов и провенанса: name@version/variant"""
+        return f"{self.name}@{self.version}/{self.variant}"
+
+    def render(self, **values):
+        """Только переменная часть (то, что меняется от запроса к запросу)"""
+        return self.template.format(**values)
+
+    def full_text(self, **values):
+        """Инструкция и переменная часть одним текстом"""
+        return f"{self.system}\n\n{self.render(**values)}"
+
+    def contents_for(self, model_name, **values):
+        """Текст запроса для модели: без инструкции, если она уйдёт в system_instruction"""
+        if supports_system_instruction(model_name):
+            return self.render(**values)
+        return self.full_text(**values)
+
+
+def register(name, version, system, template, variant="full"):
+    PROMPTS[(name, variant)] = PromptTemplate(name, version, variant, system, template)
+    return PROMPTS[(name, variant)]
+
+
+def get_prompt(name, variant=None):
+    """Шаблон по имени; если нужного варианта нет - берётся full"""
+    variant = variant or DEFAULT_VARIANT
+    template = PROMPTS.get((name, variant)) or PROMPTS.get((name, "full"))
+    if template is None:
+        raise KeyError(f"Промпт '{name}' не зарегистрирован")
+    return template
+
+
+# ============ ТОКЕНЫ ============
+def estimate_tokens(text):
+    """Быстрая локальная оценка: ~3 символа на токен для смешанного RU/EN текста"""
+    return math.ceil(len(text or "") / 3)
+
+
+# ============ ИНСТРУКЦИИ МОДЕЛЕЙ ============
+def supports_system_instruction(model_name):
+    """Gemma через Gemini API не принимает system_instruction"""
+    return not model_name.startswith("gemma")
+
+
+# ============ ОБЩИЕ ФРАГМЕНТЫ ============
+def format_users(batch_data):
+    """Нумерованный список пользователей для батч-оценки"""
+    lines = []
+    for i, user in enumerate(batch_data, 1):
+        name = str(user.get('Имя', '') or '').strip()
+        surname = str(user.get('Фамилия', '') or '').strip()
+        desc = str(user.get('Суммарное описание', '') or '').strip()
+        if not desc or desc.lower() in ['nan', 'none', '']:
+            desc = "Нет описания"
+        lines.append(f"{i}. {name} {surname}\n   {desc}")
+    return "\n".join(lines)
+
+
+SCORE_OUTPUT_RULE = """ОТВЕТ: только JSON-массив с index и score для каждого пользователя, без текста и комментариев:
+[{"index": 1, "score": 85}, {"index": 2, "score": 72}]"""
+
+SCORE_USERS_TEMPLATE = """СПИСОК ПОЛЬЗОВАТЕЛЕЙ ({count}):
+{users}"""
+
+
+# ============ ОЦЕНКА: ДМ ЛИДС (batch_universal_scoring) ============
+# v1 - исходный промпт: требовал "ТОЛЬКО одно число", а затем JSON-массив
+# v2 - противоречие убрано, инструкция вынесена из переменной части
+register("score_dmleads", "v2", variant="full", system="""
+Присвой каждому пользователю Telegram скор интереса от 1 до 100 для веб-агентства ДМ Лидс (разработка сайтов, лендинги, лидогенерация, маркетинг).
+
+Оценивай по 5 факторам:
+
+1) Тип бизнеса и ниша (0–30)
+- 25–30: цифровой бизнес, сильно завязанный на онлайне (IT, SaaS, маркетинг/реклама, продюсирование, e‑commerce, онлайн‑курсы, студии дизайна).
+- 15–24: эксперты и услуги B2B/B2C (юристы, бухгалтера, коучи, консалтинг, репетиторы, мед/образование и т.п.).
+- 5–14: локальные офлайн‑услуги, где сайт — второстепенный канал.
+- 0–4: хобби, личные блоги, мемы, политика, серые/нелегальные темы.
+
+2) Роль человека (0–25)
+- 20–25: владелец, сооснователь, директор, ИП, самозанятый, руководитель агентства/студии/бизнеса.
+- 10–19: маркетолог, продукт, менеджер, руководитель направления.
+- 5–9: рядовой специалист (дизайнер, разработчик, таргетолог и т.п.).
+- 0–4: студент, личный аккаунт без явной связи с бизнесом.
+
+3) Цифровая зрелость и явная нужда (0–25)
+- 20–25: в описании есть упоминания сайта, лендингов, заявок, трафика, рекламы, воронок, масштабирования онлайн‑продаж.
+- 12–19: активные онлайн‑каналы (Telegram‑канал бизнеса, онлайн‑курсы, вебинары, регулярный контент).
+- 5–11: просто сухое описание деятельности, без акцента на онлайне.
+- 0–4: описание пустое или вообще не связано с деятельностью.
+
+4) Потенциал бюджета / размера (0–15)
+- 12–15: заметно, что бизнес с деньгами (агентство с командой, e‑commerce, b2b‑услуги с высоким чеком).
+- 7–11: нормальный малый бизнес/эксперт, который реалистично может заплатить за сайт/лидген.
+- 3–6: очень маленький или совсем начинающий проект.
+- 0–2: хобби, некоммерческая активность.
+
+5) Гео и язык (0–5)
+- 4–5: видно, что это RU / СНГ (русский язык, города РФ/СНГ, рубли).
+- 2–3: язык русский, но гео неочевидно.
+- 0–1: другой рынок и язык, с которым агентство, скорее всего, не работает.
+
+Штрафы:
+- Если профиль про политику, ставки, казино, откровенный скам или нет осмысленного описания — вычти 20 баллов.
+- Если это чисто развлекательный/личный блог без связи с бизнесом — вычти 10 баллов.
+
+Сложи все факторы, примени штрафы. Если итог <1 — сделай 1. Если >100 — сделай 100.
+
+""" + SCORE_OUTPUT_RULE, template=SCORE_USERS_TEMPLATE)
+
+register("score_dmleads", "v2", variant="compact", system="""
+Скор интереса 1–100 для веб-агентства ДМ Лидс (сайты, лендинги, лидген, маркетинг) = сумма факторов:
+1) Ниша 0–30: онлайн-бизнес (IT, SaaS, маркетинг, e-com, онлайн-курсы, студии) 25–30; эксперты/услуги B2B/B2C 15–24; локальный офлайн 5–14; хобби/блог/политика/серое 0–4.
+2) Роль 0–25: владелец/основатель/директор/ИП 20–25; маркетолог/продукт/менеджер 10–19; рядовой специалист 5–9; студент/личный 0–4.
+3) Цифровая нужда 0–25: сайт/лендинги/заявки/трафик/реклама/воронки 20–25; активные онлайн-каналы 12–19; сухое описание 5–11; пусто 0–4.
+4) Бюджет 0–15: бизнес с деньгами 12–15; малый бизнес 7–11; начинающий 3–6; хобби 0–2.
+5) Гео 0–5: RU/СНГ 4–5; русский без гео 2–3; другой рынок 0–1.
+Штрафы: политика/ставки/казино/скам/пусто −20; развлекательный блог −10. Итог ограничь 1–100.
+
+""" + SCORE_OUTPUT_RULE, template=SCORE_USERS_TEMPLATE)
+
+
+# ============ ОЦЕНКА: CODEXAI (lead_processor) ============
+register("score_codexai", "v2", variant="full", system="""
+Присвой каждому пользователю скор интереса от 1 до 100 для веб-агентства CodexAI.
+
+МЫ ИЩЕМ: владельцев бизнеса, предпринимателей, экспертов которым НУЖЕН сайт или улучшение сайта.
+
+ВЫСОКИЙ СКОР (70-100):
+- Владельцы бизнеса, предприниматели, директора компаний
+- Офлайн-бизнесы: рестораны, салоны, клиники, магазины, услуги
+- Эксперты, коучи, консультанты без упоминания своего сайта
+- Начинающие бизнесы которым нужен первый сайт
+- Компании со старым/плохим сайтом
+
+СРЕДНИЙ СКОР (30-69):
+- Маркетологи, SMM-специалисты (могут рекомендовать нас клиентам)
+- Менеджеры в компаниях
+- Фрилансеры не из IT сферы
+
+НИЗКИЙ СКОР (1-29):
+- РАЗРАБОТЧИКИ, программисты, веб-дизайнеры = 5-15 (наши конкуренты!)
+- IT-специалисты, DevOps, тестировщики = 5-15
+- Веб-агентства, digital-студии = 1-10 (прямые конкуренты)
+- Студенты, безработные = 5-20
+- Личные аккаунты без бизнеса = 10-25
+
+КЛЮЧЕВОЕ: Если человек сам делает сайты или работает в IT = НИЗКИЙ СКОР!
+
+""" + SCORE_OUTPUT_RULE, template=SCORE_USERS_TEMPLATE)
+
+register("score_codexai", "v2", variant="compact", system="""
+Скор 1–100 для веб-агентства CodexAI: ищем тех, кому НУЖЕН сайт или его улучшение.
+70–100: владельцы бизнеса, предприниматели, директора; офлайн-бизнес (рестораны, салоны, клиники, магазины, услуги); эксперты/коучи/консультанты без сайта; новые бизнесы; компании со слабым сайтом.
+30–69: маркетологи, SMM, менеджеры, фрилансеры не из IT.
+1–29: разработчики, веб-дизайнеры, IT/DevOps/QA 5–15; веб-агентства и digital-студии 1–10; студенты, безработные 5–20; личные аккаунты 10–25.
+Кто сам делает сайты или работает в IT — низкий скор.
+
+""" + SCORE_OUTPUT_RULE, template=SCORE_USERS_TEMPLATE)
+
+
+# ============ СУММАРАЙЗ ПРОФИЛЯ ============
+SUMMARY_INFO_TEMPLATE = """{info}
+
+Ответ:"""
+
+# lead_processor: 2-3 предложения
+register("summarize_short", "v2", variant="full", system="""
+Проанализируй информацию о человеке и создай краткое описание деятельности.
+
+Напиши сухое и лаконичное описание (2-3 предложения) в формате: имя, фамилия, чем занимается, название компании/бизнеса.
+
+Правила:
+- Пиши факты напрямую, без фраз "что указывает", "что говорит о"
+- Используй прямой стиль: "Имя Фамилия занимается [деятельность]. Компания [название] специализируется на [услуги]"
+- Будь конкретным и информативным
+""", template=SUMMARY_INFO_TEMPLATE)
+
+# ai.py: 3-5 предложений
+register("summarize_detailed", "v2", variant="full", system="""
+Проанализируй информацию о человеке и создай краткое описание деятельности.
+
+Напиши сухое и лаконичное описание (3-5 предложений) в формате: имя, фамилия, чем занимается, название компании/бизнеса.
+
+Правила:
+- Пиши факты напрямую, без фраз "что указывает", "что говорит о", "что свидетельствует", "что означает"
+- Используй прямой стиль: "Имя Фамилия занимается [деятельность]. Компания [название] специализируется на [услуги]"
+- Избегай лишних вводных слов и объяснений
+- Будь конкретным и информативным
+""", template=SUMMARY_INFO_TEMPLATE)
+
+
+def describe():
+    """Таблица зарегистрированных шаблонов с оценкой токенов инструкции"""
+    rows = []
+    for (name, variant), template in sorted(PROMPTS.items()):
+        rows.append((template.key, estimate_tokens(template.system)))
+    return rows
+
+
+if __name__ == "__main__":
+    print(f"{'Шаблон':45} {'~токенов инструкции':>20}")
+    for key, tokens in describe():
+        print(f"{key:45} {tokens:>20}")
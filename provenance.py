@@ -0,0 +1,95 @@
+# ПРОВЕНАНС ОЦЕНОК И ИНКРЕМЕНТАЛЬНАЯ ПЕРЕОЦЕНКА
+# Рядом с 'Интерес' хранится, чем он получен: версия промпта, модель и хэш
+# входа (имя, фамилия, суммарное описание). После смены рубрики или модели
+# переоцениваются только строки с изменившимся входом или устаревшим
+# провенансом - при желании только в полосе скоров (например 40-90).
+
+import hashlib
+
+import pandas as pd
+
+PROMPT_COLUMN = 'Промпт оценки'
+MODEL_COLUMN = 'Модель оценки'
+HASH_COLUMN = 'Хэш оценки'
+PROVENANCE_COLUMNS = (PROMPT_COLUMN, MODEL_COLUMN, HASH_COLUMN)
+
+# Режимы выбора строк для оценки:
+# "missing" - только строки без скора (как раньше)
+# "incremental" - ещё и строки с изменившимся входом или устаревшим провенансом
+RESCORE_MODES = ("missing", "incremental")
+
+
+def _clean(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    text = str(value).strip()
+    return "" if text.lower() in ("nan", "none", "null") else text
+
+
+def input_hash(name, surname, summary):
+    """Хэш того, что видит модель при оценке"""
+    payload = "\x1f".join((_clean(name), _clean(surname), _clean(summary)))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def input_hashes(df):
+    """Хэши входа для всех строк df"""
+    columns = [df[c] if c in df.columns else pd.Series("", index=df.index)
+               for c in ('Имя', 'Фамилия', 'Суммарное описание')]
+    return pd.Series(
+        [input_hash(n, s, d) for n, s, d in zip(*columns)],
+        index=df.index, dtype=object,
+    )
+
+
+def ensure_columns(df):
+    """Добавить колонки провенанса, если их нет"""
+    for column in PROVENANCE_COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+    return df
+
+
+def stale_mask(df, prompt_key, model=None, band=None):
+    """Строки со скором, которые надо переоценить:
+    - вход изменился (хэш не совпадает) - всегда;
+    - провенанс устарел (другая версия промпта или, если задана, другая модель;
+      строки без провенанса тоже считаются устаревшими) - только если скор
+      попадает в band = (low, high), когда он задан"""
+    ensure_columns(df)
+    score = pd.to_numeric(df['Интерес'], errors='coerce')
+    has_score = score.notna()
+
+    stored_hash = df[HASH_COLUMN].fillna("").astype(str)
+    input_changed = stored_hash.ne("") & stored_hash.ne(input_hashes(df))
+
+    outdated = df[PROMPT_COLUMN].fillna("").astype(str).ne(prompt_key)
+    if model is not None:
+        outdated |= df[MODEL_COLUMN].fillna("").astype(str).ne(model)
+    if band is not None:
+        low, high = band
+        outdated &= score.between(low, high)
+
+    return has_score & (input_changed | outdated)
+
+
+def rows_to_score(df, mode, prompt_key, model=None, band=None):
+    """Позиционные индексы строк для оценки в выбранном режиме"""
+    if mode not in RESCORE_MODES:
+        raise ValueError(f"Неизвестный режим переоценки: {mode} (ожидается один из {RESCORE_MODES})")
+    missing = pd.to_numeric(df['Интерес'], errors='coerce').isna()
+    if mode == "incremental":
+        missing |= stale_mask(df, prompt_key, model, band)
+    return [int(i) for i in missing.to_numpy().nonzero()[0]]
+
+
+def stamp(df, positions, prompt_key, model):
+    """Записать провенанс для только что оценённых строк (позиционные индексы)"""
+    if not positions:
+        return
+    ensure_columns(df)
+    rows = df.iloc[positions]
+    labels = df.index[positions]
+    df.loc[labels, PROMPT_COLUMN] = prompt_key
+    df.loc[labels, MODEL_COLUMN] = model
+    df.loc[labels, HASH_COLUMN] = input_hashes(rows).to_numpy()
@@ -0,0 +1,101 @@
+# ЗАПРОСЫ К ОБРАБОТАННЫМ ЛИДАМ
+# Быстрые выборки из хранилища (SQLite с индексами по скору/статусу и
+# полнотекстовым индексом) - без загрузки всего xlsx. Заменяет show_results.py.
+#
+# Примеры:
+#   python query.py --min-score 80 --not-messaged
+#   python query.py --keyword "салон красоты" --premium --top 50 --page 2
+#   python query.py --preset batch --min-score 50 --summary
+#
+# Хранилище - store.file из pipeline.toml (с учётом пресета) или --store.
+
+import argparse
+import time
+
+import pandas as pd
+
+from config import CONFIG_FILE, ConfigError, load_config
+from leadstore import LeadStore
+
+# ============ НАСТРОЙКИ ============
+DEFAULT_TOP = 20
+SUMMARY_WIDTH = 150  # Символов суммарайза в выводе
+
+
+def _column(df, column):
+    return df[column].fillna("").astype(str).str.strip()
+
+
+def format_leads(df, start=1, summary=False):
+    """Строки отчёта для лидов df (без iterrows: колонки форматируются целиком)"""
+    if df.empty:
+        return []
+    scores = pd.to_numeric(df['Интерес'], errors='coerce')
+    score_text = scores.map(lambda s: f"{s:3.0f}" if pd.notna(s) else "  -")
+    usernames = "@" + _column(df, 'Юзернейм').str.replace('@', '', regex=False)
+    premium = _column(df, 'Премиум').eq('Да').map({True: " ⭐", False: ""})
+
+    lines = [
+        f"{i:2d}. [{score}] {name:15} {surname:15} {username}{star}"
+        for i, score, name, surname, username, star in zip(
+            range(start, start + len(df)), score_text,
+            _column(df, 'Имя'), _column(df, 'Фамилия'), usernames, premium,
+        )
+    ]
+    if summary:
+        summaries = _column(df, 'Суммарное описание').str.slice(0, SUMMARY_WIDTH)
+        lines = [f"{line}\n      {text}" for line, text in zip(lines, summaries)]
+    return lines
+
+
+def print_leads(df, start=1, summary=False, empty_message="Лидов не найдено"):
+    """Напечатать лидов df или сообщение, если их нет"""
+    lines = format_leads(df, start, summary)
+    print("\n".join(lines) if lines else empty_message)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запросы к хранилищу обработанных лидов")
+    parser.add_argument("--config", default=CONFIG_FILE, help=f"Файл конфигурации (по умолчанию {CONFIG_FILE})")
+    parser.add_argument("--preset", help="Пресет из [presets.*] конфигурации (ai, batch, ...)")
+    parser.add_argument("--store", help="Хранилище (по умолчанию store.file из конфигурации)")
+    parser.add_argument("--min-score", type=float, help="Скор не ниже N")
+    parser.add_argument("--premium", action="store_true", help="Только премиум")
+    parser.add_argument("--keyword", help="Слова в суммарайзе или описании (по началу слова)")
+    parser.add_argument("--not-messaged", action="store_true", help="Без сгенерированных сообщений")
+    parser.add_argument("--status", choices=["new", "summarized", "scored", "messaged"], help="Статус обработки")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help=f"Сколько лидов на странице (по умолчанию {DEFAULT_TOP})")
+    parser.add_argument("--page", type=int, default=1, help="Номер страницы")
+    parser.add_argument("--summary", action="store_true", help="Показать суммарайз")
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config, args.preset,
+                             overrides={"store": {"file": args.store}} if args.store else None)
+    except ConfigError as e:
+        print(f"❌ {e}")
+        return
+
+    filters = {
+        "min_score": args.min_score,
+        "premium": args.premium,
+        "keyword": args.keyword,
+        "not_messaged": args.not_messaged,
+        "status": args.status,
+    }
+    offset = (max(args.page, 1) - 1) * args.top
+
+    store = LeadStore(config.store.file)
+    started = time.perf_counter()
+    total = store.count(*store.filters(**filters))
+    df = store.query(limit=args.top, offset=offset, **filters)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    store.close()
+
+    pages = max((total + args.top - 1) // args.top, 1)
+    print(f"Найдено: {total} | страница {max(args.page, 1)} из {pages} | {elapsed_ms:.1f} мс\n")
+    print_leads(df, start=offset + 1, summary=args.summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# КОМПАКТНЫЕ ЗАПИСИ ДЛЯ ВОРКЕРОВ
+# Вместо df.iloc[idx] (новый pandas Series на каждую строку) нужные поля
+# извлекаются один раз по колонкам в записи со __slots__. Воркеры получают
+# только их, результаты собираются в заранее выделенный массив и пишутся
+# обратно одним векторным присваиванием колонки, без df.at под блокировкой.
+
+import numpy as np
+import pandas as pd
+
+# Колонка DataFrame -> поле записи
+RECORD_FIELDS = {
+    'Имя': 'name',
+    'Фамилия': 'surname',
+    'Описание профиля': 'description',
+    'Суммарное описание': 'summary',
+}
+
+
+class LeadRecord:
+    """Поля одной строки, нужные этапам пайплайна (строки уже очищены от NaN)"""
+    __slots__ = ("position",) + tuple(RECORD_FIELDS.values())
+
+    def __init__(self, position, name="", surname="", description="", summary=""):
+        self.position = position
+        self.name = name
+        self.surname = surname
+        self.description = description
+        self.summary = summary
+
+    def get(self, column, default=None):
+        """Доступ по имени колонки, как у строки DataFrame (row.get('Имя', ''))"""
+        field = RECORD_FIELDS.get(column)
+        return getattr(self, field) if field is not None else default
+
+
+def _column(df, column, positions):
+    if column not in df.columns:
+        return [""] * len(positions)
+    return df[column].iloc[positions].fillna("").astype(str).str.strip().tolist()
+
+
+def extract_records(df, positions):
+    """Записи для позиционных индексов df (по колонкам, без построчного iloc)"""
+    positions = list(positions)
+    columns = [_column(df, column, positions) for column in RECORD_FIELDS]
+    return [LeadRecord(position, *values) for position, *values in zip(positions, *columns)]
+
+
+def result_slots(size):
+    """Предвыделенный массив результатов (None - строка не обработана)"""
+    return np.full(size, None, dtype=object)
+
+
+def write_back(df, positions, column, values):
+    """Записать готовые значения одной операцией; возвращает записанные позиции"""
+    positions = np.asarray(positions, dtype=np.int64)
+    values = np.asarray(values, dtype=object)
+    done = pd.notna(values)
+    if not done.any():
+        return []
+    if column not in df.columns:
+        df[column] = None
+    labels = df.index[positions[done]]
+    # Series из списка сам выводит dtype (float для скоров, str для текстов)
+    df.loc[labels, column] = pd.Series(values[done].tolist(), index=labels)
+    return positions[done].tolist()
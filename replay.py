@@ -0,0 +1,141 @@
+# ЗАПИСЬ И ВОСПРОИЗВЕДЕНИЕ ТРАФИКА API
+# Разбор неудачного прогона раньше стоил квоты ещё раз. В режиме "record"
+# каждый запрос и ответ (хэш промпта, модель, конфиг, сырой текст, латентность,
+# токены, ошибка) пишется в сжатый JSONL. В режиме "replay" те же ответы
+# отдаются из лога без сети: парсеры и пайплайн можно гонять на реальных
+# исторических ответах с полной скоростью, а заодно замерить всё, кроме сети.
+#
+# Ключ поиска - хэш (этап, текст запроса, generation_config, шаблон); API ключ
+# в него не входит. Одинаковые запросы отдаются в порядке записи.
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+TRAFFIC_MODES = ("", "record", "replay")
+
+
+class ReplayMiss(RuntimeError):
+    """Запроса нет в логе (промпт или конфиг изменились с момента записи)"""
+
+
+def prompt_hash(stage, contents, generation_config=None, template=None):
+    """Хэш запроса без API ключа и модели"""
+    payload = json.dumps({
+        "stage": stage,
+        "contents": contents,
+        "config": generation_config,
+        "template": template.key if template is not None else None,
+    }, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class _Usage:
+    __slots__ = ("prompt_token_count", "candidates_token_count")
+
+    def __init__(self, prompt_tokens, output_tokens):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+
+
+class ReplayResponse:
+    """Ответ из лога с тем же интерфейсом, что читают скрипты (.text, .usage_metadata)"""
+    prompt_feedback = None
+    candidates = ()
+
+    def __init__(self, entry):
+        self.text = entry.get("text") or ""
+        self.usage_metadata = _Usage(entry.get("prompt_tokens", 0), entry.get("output_tokens", 0))
+
+
+class TrafficLog:
+    """Сжатый лог трафика: mode="record" - дописывать, mode="replay" - отдавать ответы"""
+    def __init__(self, path, mode):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Неизвестный режим трафика: {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0, "errors": 0}
+        self.entries = {}  # {prompt_hash: deque(записей)} - только для replay
+        self.file = None
+        if mode == "record":
+            # Дозапись: новый gzip-член в конце файла читается как продолжение
+            self.file = gzip.open(path, 'at', encoding='utf-8')
+        else:
+            self._load()
+
+    def _load(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                self.entries.setdefault(entry["prompt_hash"], deque()).append(entry)
+
+    def _count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def call(self, stage, model_name, contents, generation_config, template, send):
+        """send() - настоящий вызов (record); в replay он не выполняется"""
+        key = prompt_hash(stage, contents, generation_config, template)
+        if self.mode == "replay":
+            return self._replay(key)
+
+        started = time.perf_counter()
+        entry = {"ts": datetime.now().isoformat(), "stage": stage, "model": model_name,
+                 "prompt_hash": key, "config": generation_config,
+                 "template": template.key if template is not None else None}
+        try:
+            response = send()
+        except Exception as e:
+            entry.update(latency=round(time.perf_counter() - started, 4), error=str(e))
+            self._write(entry)
+            raise
+        usage = getattr(response, 'usage_metadata', None)
+        try:
+            text = response.text
+        except Exception:
+            # Заблокированный/пустой ответ: .text бросает исключение
+            text = None
+        entry.update(
+            latency=round(time.perf_counter() - started, 4),
+            text=text,
+            prompt_tokens=getattr(usage, 'prompt_token_count', 0) or 0,
+            output_tokens=getattr(usage, 'candidates_token_count', 0) or 0,
+        )
+        self._write(entry)
+        return response
+
+    def _write(self, entry):
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.stats["recorded"] += 1
+
+    def _replay(self, key):
+        with self.lock:
+            queue = self.entries.get(key)
+            if not queue:
+                self.stats["misses"] += 1
+                raise ReplayMiss(f"нет записи для запроса {key[:12]}")
+            # Последняя запись остаётся: повторный такой же запрос получит её снова
+            entry = queue.popleft() if len(queue) > 1 else queue[0]
+        if entry.get("error"):
+            self._count("errors")
+            raise RuntimeError(entry["error"])
+        self._count("replayed")
+        return ReplayResponse(entry)
+
+    def summary(self):
+        with self.lock:
+            return dict(self.stats)
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
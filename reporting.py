@@ -0,0 +1,91 @@
+# ОТЧЁТЫ ПО РАСПРЕДЕЛЕНИЮ СКОРОВ
+# Все бакеты (горячие / тёплые / холодные / неинтересные) считаются за один
+# проход np.histogram, разбивки по модели оценки и источнику - одним
+# pd.cut + crosstab. Достаточно дёшево, чтобы считать после каждого батча.
+
+import numpy as np
+import pandas as pd
+
+# Границы бакетов: [0, 20) [20, 50) [50, 80) [80, 100]
+BUCKET_EDGES = [0, 20, 50, 80, 101]
+BUCKETS = ["not_interested", "cold", "warm", "hot"]
+BUCKET_TITLES = {
+    "hot": "🔥 ГОРЯЧИЕ (80-100):",
+    "warm": "🟡 ТЕПЛЫЕ (50-79):",
+    "cold": "❄️  ХОЛОДНЫЕ (20-49):",
+    "not_interested": "❌ НЕИНТЕРЕСНЫЕ (0-19):",
+}
+UNKNOWN_GROUP = "не указан"
+
+
+def _scores(values):
+    scores = pd.to_numeric(pd.Series(values), errors='coerce').dropna()
+    return scores.clip(lower=0, upper=100).to_numpy()
+
+
+def distribution(values):
+    """{'hot': n, 'warm': n, 'cold': n, 'not_interested': n, 'total': n} по скорам"""
+    counts, _ = np.histogram(_scores(values), bins=BUCKET_EDGES)
+    result = {bucket: int(count) for bucket, count in zip(BUCKETS, counts)}
+    result["total"] = int(counts.sum())
+    return result
+
+
+def breakdown(df, by):
+    """Бакеты по группам колонки by: DataFrame (группа x бакет) с колонкой total"""
+    if by not in df.columns:
+        return pd.DataFrame(columns=BUCKETS + ["total"])
+    scores = pd.to_numeric(df['Интерес'], errors='coerce')
+    scored = scores.notna()
+    groups = df.loc[scored, by].fillna(UNKNOWN_GROUP).astype(str).replace("", UNKNOWN_GROUP)
+    buckets = pd.cut(scores[scored].clip(lower=0, upper=100), bins=BUCKET_EDGES,
+                     labels=BUCKETS, right=False)
+    table = pd.crosstab(groups, buckets).reindex(columns=BUCKETS, fill_value=0)
+    table.columns = list(BUCKETS)
+    table["total"] = table.sum(axis=1)
+    return table.sort_values("total", ascending=False)
+
+
+def build_report(df):
+    """Распределение скоров + разбивки по модели оценки и источнику"""
+    scores = pd.to_numeric(df['Интерес'], errors='coerce')
+    return {
+        "rows": len(df),
+        "not_scored": int(scores.isna().sum()),
+        "distribution": distribution(scores),
+        "by_model": breakdown(df, 'Модель оценки'),
+        "by_source": breakdown(df, 'Источник'),
+    }
+
+
+# ============ ВЫВОД ============
+def print_distribution(dist):
+    """Бакеты с процентами от числа оценённых"""
+    total = dist["total"]
+    for bucket in reversed(BUCKETS):
+        count = dist[bucket]
+        share = count * 100 // total if total else 0
+        print(f"{BUCKET_TITLES[bucket]:24} {count:5d} ({share:2d}%)")
+    print(f"\n{'─' * 75}")
+    print(f"📈 ВСЕГО: {total}\n")
+
+
+def print_breakdown(title, table):
+    """Таблица группа x бакет (ничего не печатает, если групп нет)"""
+    if table.empty:
+        return
+    print(title)
+    print(f"  {'':30} {'hot':>6} {'warm':>6} {'cold':>6} {'<20':>6} {'всего':>7}")
+    for group, row in zip(table.index, table[BUCKETS[::-1] + ["total"]].to_numpy()):
+        hot, warm, cold, low, total = row
+        print(f"  {str(group)[:30]:30} {hot:6d} {warm:6d} {cold:6d} {low:6d} {total:7d}")
+    print()
+
+
+def print_report(report):
+    """Полный отчёт: распределение и разбивки"""
+    print_distribution(report["distribution"])
+    if len(report["by_model"]) > 1 or UNKNOWN_GROUP not in report["by_model"].index:
+        print_breakdown("По модели оценки:", report["by_model"])
+    if len(report["by_source"]) > 1 or UNKNOWN_GROUP not in report["by_source"].index:
+        print_breakdown("По источнику:", report["by_source"])
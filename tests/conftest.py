@@ -0,0 +1,6 @@
+# Модули пайплайна лежат в корне репозитория (плоская структура)
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
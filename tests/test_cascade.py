@@ -0,0 +1,63 @@
+from cascade import Cascade, scores_to_escalate, summary_needs_escalation
+from postprocess import UNDEFINED
+
+CHEAP, STRONG = "gemma-3-27b-it", "gemini-2.5-flash"
+
+
+def cascade(has_quota=True, **kwargs):
+    return Cascade(lambda: CHEAP, STRONG, lambda model: has_quota, **kwargs)
+
+
+def test_what_escalates():
+    # Без скора (не распарсился) и рядом с порогами 50/80
+    assert scores_to_escalate({0: 10, 1: 52, 2: 79, 4: 95}, 5) == [1, 2, 3]
+    assert scores_to_escalate({0: 10, 1: 52}, 2, margin=1) == []
+    assert scores_to_escalate(None, 2) == [0, 1]
+    assert summary_needs_escalation(UNDEFINED)
+    assert summary_needs_escalation("Коротко.")
+    assert not summary_needs_escalation("Коротко.", min_length=5)
+
+
+def test_score_escalates_uncertain_rows_only():
+    calls = []
+
+    def score_fn(batch, api_key, batch_num, model):
+        calls.append((model, list(batch)))
+        if model == CHEAP:
+            return {0: 10, 1: 48, 3: 81}
+        return {0: 55, 1: 78}
+
+    c = cascade()
+    scores, models = c.score(["a", "b", "c", "d"], "key", 1, score_fn)
+    assert calls == [(CHEAP, ["a", "b", "c", "d"]), (STRONG, ["b", "c", "d"])]
+    assert scores == {0: 10, 1: 55, 2: 78, 3: 81}
+    assert models == {0: CHEAP, 1: STRONG, 2: STRONG, 3: CHEAP}
+    stats = c.summary()["score"]
+    # b перешла порог 50, у c скора не было; d сильная модель не оценила
+    assert stats["rows"] == 4 and stats["escalated"] == 3 and stats["changed"] == 2
+    assert stats["calls"] == {CHEAP: 1, STRONG: 1}
+
+
+def test_score_keeps_cheap_answer_without_strong_quota():
+    c = cascade(has_quota=False, score_margin=3)
+    scores, models = c.score(["a", "b"], "key", 1, lambda batch, key, num, model: {0: 49, 1: 20})
+    assert scores == {0: 49, 1: 20} and set(models.values()) == {CHEAP}
+    assert c.summary()["score"]["no_quota"] == 1
+
+
+def test_score_uses_reserved_model():
+    def first_model():
+        raise AssertionError("слот уже зарезервирован - второй не нужен")
+
+    c = Cascade(first_model, STRONG, lambda model: True)
+    scores, models = c.score(["a"], "key", 1, lambda batch, key, num, model: {0: 95}, model=STRONG)
+    assert scores == {0: 95} and models == {0: STRONG}
+
+
+def test_summarize_takes_strong_only_if_better():
+    long_text = "Анна Ким - владелица салона красоты в Казани, ведёт запись через директ."
+    c = cascade()
+    assert c.summarize("r", "key", lambda record, key, model: UNDEFINED if model == CHEAP else long_text) == long_text
+    assert c.summarize("r", "key", lambda record, key, model: "Коротко." if model == CHEAP else UNDEFINED) == "Коротко."
+    stats = c.summary()["summarize"]
+    assert stats["escalated"] == 2 and stats["changed"] == 1
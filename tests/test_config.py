@@ -0,0 +1,98 @@
+import pytest
+
+from config import DEFAULTS, ConfigError, load_config, validate
+
+
+def write(tmp_path, text):
+    path = tmp_path / "pipeline.toml"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_defaults_without_file(tmp_path):
+    config = load_config(str(tmp_path / "missing.toml"), env={})
+    assert config.settings == DEFAULTS
+    assert config.score.batch_size == DEFAULTS["score"]["batch_size"]
+    assert config.preset is None
+
+
+def test_file_preset_env_and_overrides_in_order(tmp_path):
+    path = write(tmp_path, """
+[score]
+batch_size = 100
+[presets.batch]
+score.batch_size = 180
+score.prompt = "score_dmleads"
+models.primary_rpd = 0
+""")
+    config = load_config(path, env={})
+    assert config.score.batch_size == 100
+    config = load_config(path, "batch", env={"RESCORE_MODE": "incremental"},
+                         overrides={"score": {"batch_size": 5}})
+    assert config.score.prompt == "score_dmleads"
+    assert config.models.primary_rpd == 0
+    assert config.score.rescore_mode == "incremental"
+    assert config.score.batch_size == 5
+
+
+def test_int_accepted_for_float(tmp_path):
+    config = load_config(write(tmp_path, "[api]\nhedge_min_delay = 3\n"), env={})
+    assert config.api.hedge_min_delay == 3.0
+
+
+@pytest.mark.parametrize("text, message", [
+    ("[score]\nbatchsize = 10\n", "Неизвестный параметр: score.batchsize"),
+    ("[score]\nbatch_size = \"10\"\n", "score.batch_size: ожидается int"),
+    ("[score]\ncascade = 1\n", "score.cascade: ожидается bool"),
+    ("score = 1\n", "score должен быть секцией"),
+    ("[score\n", "pipeline.toml"),
+])
+def test_file_errors(tmp_path, text, message):
+    with pytest.raises(ConfigError, match=message):
+        load_config(write(tmp_path, text), env={})
+
+
+def test_missing_preset(tmp_path):
+    with pytest.raises(ConfigError, match="Пресет 'nope' не найден"):
+        load_config(write(tmp_path, "[presets.ai]\nsummarize.start_index = 1\n"), "nope", env={})
+
+
+def test_bad_env_value(tmp_path):
+    with pytest.raises(ConfigError, match="SCORE_K"):
+        load_config(str(tmp_path / "missing.toml"), env={"SCORE_K": "три"})
+
+
+def test_validate_collects_all_problems(tmp_path):
+    with pytest.raises(ConfigError) as error:
+        load_config(str(tmp_path / "missing.toml"), env={},
+                    overrides={"score": {"batch_size": 0, "rescore_mode": "all"},
+                               "run": {"stages": ["score", "upload"]}})
+    text = str(error.value)
+    assert "score.batch_size" in text
+    assert "score.rescore_mode" in text
+    assert "upload" in text
+
+
+def test_k_requires_anchors_for_rubric(tmp_path):
+    missing = str(tmp_path / "missing.toml")
+    assert load_config(missing, env={"SCORE_K": "3"}).score.k == 3
+    with pytest.raises(ConfigError, match="нет якорей"):
+        load_config(missing, env={"SCORE_K": "3"}, overrides={"score": {"prompt": "score_dmleads"}})
+
+
+def test_cascade_requires_fallback():
+    import copy
+    settings = copy.deepcopy(DEFAULTS)
+    settings["score"]["cascade"] = True
+    settings["models"]["fallback"] = ""
+    with pytest.raises(ConfigError, match="score.cascade требует models.fallback"):
+        validate(settings)
+
+
+def test_repo_config_and_presets_are_valid():
+    from conftest import ROOT
+    import os
+    from config import presets
+    path = os.path.join(ROOT, "pipeline.toml")
+    for preset in [None] + presets(path):
+        load_config(path, preset, env={})
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from consistency import AnchorRecord, anchor_records, has_anchors, score_consistent
+from records import LeadRecord
+
+TRUE_SCORES = [90, 75, 55, 40, 20, 10, 65]
+
+
+def leads():
+    return [LeadRecord(i, f"Лид{i}", "", "", f"Описание {i}.") for i in range(len(TRUE_SCORES))]
+
+
+def true_score(record):
+    if isinstance(record, AnchorRecord):
+        return record.expected
+    return TRUE_SCORES[record.position]
+
+
+def biased_model(shift, calls):
+    """Модель, которая завышает все скоры батча на shift"""
+    def score_fn(batch, batch_num):
+        calls.append([record.name for record in batch])
+        return {pos: min(true_score(record) + shift, 100) for pos, record in enumerate(batch)}, "gemma"
+    return score_fn
+
+
+def test_anchor_shift_is_removed():
+    calls = []
+    result = score_consistent(leads(), biased_model(8, calls), batch_size=7,
+                              anchors=anchor_records("score_codexai"), k=3, seed=1)
+    assert np.allclose(result["scores"], TRUE_SCORES)
+    assert all(len(samples) == 3 for samples in result["samples"])
+    assert result["models"] == ["gemma"] * len(TRUE_SCORES)
+    stats = result["stats"]
+    # 3 лида на батч (7 - 4 якоря): 3 батча на прогон
+    assert stats["calls"] == 9 and stats["mean_shift"] == 8.0
+    assert stats["anchor_share"] == pytest.approx(36 / 57, abs=1e-3)
+
+
+def test_same_seed_same_batches():
+    first, second, other = [], [], []
+    anchors = anchor_records("score_codexai")
+    score_consistent(leads(), biased_model(0, first), 6, anchors, k=2, seed=7)
+    score_consistent(leads(), biased_model(0, second), 6, anchors, k=2, seed=7)
+    score_consistent(leads(), biased_model(0, other), 6, anchors, k=2, seed=8)
+    assert first == second
+    assert first != other
+
+
+def test_skipped_batches_are_not_counted():
+    def quota_after_two(batch, batch_num):
+        if batch_num > 2:
+            return None, None
+        return {pos: true_score(record) for pos, record in enumerate(batch)}, "gemma"
+
+    result = score_consistent(leads(), quota_after_two, 6, anchor_records("score_codexai"), k=2, seed=0)
+    assert result["stats"]["calls"] == 2
+    scored = [s for s in result["samples"] if s]
+    assert len(scored) == result["stats"]["scored"] == 4
+    assert np.isnan(result["scores"]).sum() == 3
+
+
+def test_anchors_per_rubric():
+    assert has_anchors("score_codexai")
+    assert not has_anchors("score_dmleads")
+    with pytest.raises(KeyError):
+        anchor_records("score_dmleads")
@@ -0,0 +1,76 @@
+import csv
+import json
+
+import pandas as pd
+import pytest
+
+from exporters import CsvWriter, JsonWriter, NdjsonWriter, XlsxWriter, export
+
+
+def chunks():
+    yield pd.DataFrame({
+        "ID": [101, None], "Имя": ["Анна", "Олег"], "Юзернейм": ["anna", None],
+        "Интерес": [92.4, None], "Премиум": ["Да", "Нет"],
+        "Суммарное описание": ["Анна - владелица салона." * 10, None],
+    })
+    yield pd.DataFrame({
+        "ID": [102], "Имя": ["Зоя"], "Юзернейм": ["zoya"], "Интерес": [55.0], "Премиум": [None],
+        "Суммарное описание": ["Зоя - дизайнер."],
+    })
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_one_pass_to_all_writers(tmp_path, parallel):
+    paths = {name: tmp_path / f"leads.{name}" for name in ("json", "ndjson", "csv", "xlsx")}
+    export(chunks(), [
+        JsonWriter(str(paths["json"]), {"source": "test"}),
+        NdjsonWriter(str(paths["ndjson"])),
+        CsvWriter(str(paths["csv"]), ["Имя", "Интерес", "Нет такой"]),
+        XlsxWriter(str(paths["xlsx"])),
+    ], parallel=parallel)
+
+    data = json.loads(paths["json"].read_text(encoding="utf-8"))
+    assert data["metadata"] == {"source": "test"}
+    # Только оценённые, ранги сквозные между кусками
+    assert [(u["rank"], u["id"], u["score"]) for u in data["users"]] == [(1, "101", 92), (2, "102", 55)]
+    assert data["users"][0]["is_premium"] and len(data["users"][0]["description"]) == 150
+
+    lines = [json.loads(line) for line in paths["ndjson"].read_text(encoding="utf-8").splitlines()]
+    assert lines == data["users"]
+
+    with open(paths["csv"], encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows == [["Имя", "Интерес", "Нет такой"], ["Анна", "92.4", ""], ["Олег", "", ""], ["Зоя", "55.0", ""]]
+
+    xlsx = pd.read_excel(paths["xlsx"])
+    assert xlsx["Имя"].tolist() == ["Анна", "Олег", "Зоя"]
+    assert xlsx["Интерес"].isna().tolist() == [False, True, False]
+
+
+def test_writers_closed_on_error(tmp_path):
+    def broken():
+        yield from chunks()
+        raise RuntimeError("хранилище недоступно")
+
+    path = tmp_path / "leads.json"
+    with pytest.raises(RuntimeError):
+        export(broken(), [JsonWriter(str(path), {})])
+    # Файл закрыт и остаётся корректным JSON с тем, что успело записаться
+    assert len(json.loads(path.read_text(encoding="utf-8"))["users"]) == 2
+
+
+def test_parallel_writer_error_is_raised(tmp_path):
+    class Broken:
+        closed = False
+
+        def write(self, chunk):
+            raise ValueError("диск переполнен")
+
+        def close(self):
+            Broken.closed = True
+
+    path = tmp_path / "leads.ndjson"
+    with pytest.raises(ValueError):
+        export(chunks(), [Broken(), NdjsonWriter(str(path))], parallel=True)
+    assert Broken.closed
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 2
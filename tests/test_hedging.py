@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from hedging import Hedger
+
+
+def sleeper(seconds, value):
+    def call():
+        time.sleep(seconds)
+        return value
+    return call
+
+
+def warmed(hedger, stage="score", latency=0.01, count=5):
+    for _ in range(count):
+        hedger.latencies.add(stage, latency)
+    return hedger
+
+
+def test_no_hedge_until_enough_samples():
+    hedger = Hedger(max_workers=2, timeout=2, min_samples=5, min_delay=0.01)
+    assert hedger.hedge_delay("score") is None
+    warmed(hedger)
+    assert hedger.hedge_delay("score") == pytest.approx(0.01)
+
+
+def test_disabled_hedger_never_hedges():
+    hedger = warmed(Hedger(max_workers=2, timeout=2, enabled=False, min_samples=5))
+    assert hedger.hedge_delay("score") is None
+
+
+def test_slow_primary_loses_to_backup():
+    hedger = warmed(Hedger(max_workers=4, timeout=2, min_samples=5, min_delay=0.02))
+    result = hedger.run("score", sleeper(0.5, "primary"), lambda: sleeper(0.0, "backup"))
+    assert result == "backup"
+    stats = hedger.summary()
+    assert stats["hedged"] == 1 and stats["hedge_won"] == 1
+
+
+def test_fast_primary_sends_no_backup():
+    hedger = warmed(Hedger(max_workers=4, timeout=2, min_samples=5, min_delay=0.2))
+    backups = []
+    result = hedger.run("score", sleeper(0.0, "primary"), lambda: backups.append(1))
+    assert result == "primary"
+    assert backups == []
+
+
+def test_no_quota_for_backup_waits_for_primary():
+    hedger = warmed(Hedger(max_workers=4, timeout=2, min_samples=5, min_delay=0.02))
+    assert hedger.run("score", sleeper(0.1, "primary"), lambda: None) == "primary"
+    assert hedger.summary()["hedge_skipped"] == 1
+
+
+def test_deadline():
+    hedger = Hedger(max_workers=2, timeout=0.05)
+    with pytest.raises(TimeoutError):
+        hedger.run("score", sleeper(0.3, "late"))
+    assert hedger.summary()["timeouts"] == 1
+
+
+def test_primary_error_propagates():
+    hedger = Hedger(max_workers=2, timeout=1)
+
+    def fail():
+        raise ValueError("429 quota")
+
+    with pytest.raises(ValueError, match="429"):
+        hedger.run("score", fail)
@@ -0,0 +1,65 @@
+import pandas as pd
+
+from ingest import HASH_COLUMN, SOURCE_COLUMN, merge_export, prepare_master
+
+
+def master_frame():
+    return prepare_master(pd.DataFrame({
+        "ID": [1, 2, None],
+        "Юзернейм": ["anna", "oleg", "zoya"],
+        "Имя": ["Анна", "Олег", "Зоя"],
+        "Описание профиля": ["Юрист", "Маркетолог", "Дизайнер"],
+        "Премиум": ["Нет", "Нет", "Нет"],
+        "Суммарное описание": ["Анна - юрист.", "Олег - маркетолог.", "Зоя - дизайнер."],
+        "Интерес": [60.0, 55.0, 20.0],
+    }))
+
+
+def test_merge_new_changed_unchanged():
+    export = pd.DataFrame({
+        "ID": [1, 2, 3, None, None],
+        "Юзернейм": ["anna", "oleg", "ivan", "@Zoya", None],
+        "Имя": ["Анна", "Олег", "Иван", "Зоя", None],
+        "Описание профиля": ["Юрист", "Владелец кафе", "Фотограф", "Дизайнер", None],
+        "Премиум": ["Да", "Нет", "Нет", "Нет", None],
+    })
+    master, stats = merge_export(master_frame(), export, "chat_users_1.xlsx")
+    assert stats == {"rows": 5, "new": 1, "changed": 1, "unchanged": 2, "no_key": 1}
+
+    anna, oleg, zoya, ivan = (master.iloc[i] for i in range(4))
+    # Неизменённый профиль: поля профиля обновлены, результаты пайплайна на месте
+    assert anna["Премиум"] == "Да" and anna["Интерес"] == 60.0
+    assert zoya["Суммарное описание"] == "Зоя - дизайнер."
+    # Изменилось описание - профиль снова в очереди
+    assert oleg["Описание профиля"] == "Владелец кафе"
+    assert pd.isna(oleg["Суммарное описание"]) and pd.isna(oleg["Интерес"])
+    # Новый лид - без результатов, с источником и хэшем
+    assert ivan["Имя"] == "Иван" and ivan[SOURCE_COLUMN] == "chat_users_1.xlsx"
+    assert ivan[HASH_COLUMN] and pd.isna(ivan["Интерес"])
+
+
+def test_duplicate_rows_in_export_take_last():
+    export = pd.DataFrame({"ID": [5, 5], "Имя": ["Старое", "Новое"], "Описание профиля": ["a", "b"]})
+    master, stats = merge_export(master_frame(), export)
+    assert stats["new"] == 1
+    assert master.iloc[-1]["Имя"] == "Новое"
+
+
+def test_reimport_is_noop():
+    master, _ = merge_export(master_frame(), pd.DataFrame({"ID": [9], "Имя": ["Иван"]}))
+    export = master[["ID", "Юзернейм", "Имя", "Описание профиля"]].copy()
+    again, stats = merge_export(master.copy(), export)
+    assert stats["new"] == 0 and stats["changed"] == 0
+    assert len(again) == len(master)
+
+
+def test_changed_description_without_id_or_username():
+    master = prepare_master(pd.DataFrame({
+        "Имя": ["Зоя"], "Фамилия": ["Ким"], "Описание профиля": ["Дизайнер"],
+        "Суммарное описание": ["Зоя - дизайнер."], "Интерес": [20.0],
+    }))
+    export = pd.DataFrame({"Имя": ["Зоя"], "Фамилия": ["Ким"], "Описание профиля": ["Владелица студии"]})
+    master, stats = merge_export(master, export)
+    # Тот же лид (ключ по имени), но изменился - снова в очереди
+    assert stats["new"] == 0 and stats["changed"] == 1
+    assert len(master) == 1 and pd.isna(master.iloc[0]["Интерес"])
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from leadstore import (LeadStore, STATUS_MESSAGED, STATUS_NEW, STATUS_SCORED, STATUS_SUMMARIZED,
+                       lead_keys, lead_statuses)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LeadStore(str(tmp_path / "leads.db"))
+    yield store
+    store.close()
+
+
+def test_lead_keys_priority():
+    df = pd.DataFrame({
+        "ID": [101, None, None, None, None, None],
+        "Юзернейм": ["first", "@Second", None, "nan", None, None],
+        "Имя": ["A", "B", "Зоя", "Пётр", "Зоя", None],
+        "Описание профиля": [None, None, "Дизайн интерьеров", None, "Архитектор", "Юрист"],
+    })
+    keys = lead_keys(df).tolist()
+    assert keys[0] == "id:101"
+    assert keys[1] == "u:second"
+    assert keys[2].startswith("p:") and keys[3].startswith("p:") and keys[2] != keys[3]
+    # Ключ - по имени: новое описание не делает профиль другим лидом
+    assert keys[4] == keys[2]
+    # Одного описания для ключа мало
+    assert keys[5] is None
+
+
+def test_upsert_keeps_rows_without_id_and_username(store):
+    df = pd.DataFrame({
+        "ID": [1, None, None],
+        "Юзернейм": ["a", None, None],
+        "Имя": ["Анна", "Зоя", None],
+        "Описание профиля": ["Юрист", "Дизайн интерьеров", None],
+    })
+    assert store.upsert_frame(df) == 2
+    loaded = store.load_frame()
+    assert loaded["Имя"].tolist() == ["Анна", "Зоя"]
+
+    # Тот же профиль после загрузки из хранилища - тот же ключ, а не новая строка
+    loaded.loc[1, "Суммарное описание"] = "Зоя занимается дизайном интерьеров."
+    assert store.upsert_frame(loaded.iloc[[1]]) == 1
+    assert store.count() == 2
+    assert store.count_by_status() == {STATUS_NEW: 1, STATUS_SUMMARIZED: 1}
+
+
+def test_upsert_updates_only_given_columns(store):
+    store.upsert_frame(pd.DataFrame({"ID": [7], "Имя": ["Олег"], "Описание профиля": ["Маркетолог"]}))
+    store.upsert_frame(pd.DataFrame({"ID": [7], "Интерес": [85.0]}))
+    row = store.load_frame().iloc[0]
+    assert row["Имя"] == "Олег" and row["Описание профиля"] == "Маркетолог"
+    assert row["Интерес"] == 85.0
+    assert store.hot_without_messages(min_score=80)["ID"].tolist() == [7]
+
+
+def test_statuses():
+    df = pd.DataFrame({
+        "Суммарное описание": [None, "текст", "текст", "текст"],
+        "Интерес": [None, None, 40, 90],
+        "Сообщение 1": [None, None, None, "Добрый день!"],
+    })
+    assert lead_statuses(df).tolist() == [STATUS_NEW, STATUS_SUMMARIZED, STATUS_SCORED, STATUS_MESSAGED]
+
+
+def test_iter_frames_streams_in_order(store):
+    store.upsert_frame(pd.DataFrame({"ID": range(1, 8), "Интерес": [10, 70, 30, 90, 50, 20, 80]}))
+    chunks = list(store.iter_frames(order_by="score DESC", chunk_size=3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    assert pd.concat(chunks)["Интерес"].tolist() == [90, 80, 70, 50, 30, 20, 10]
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import local_scorer
+from local_scorer import (LOCAL_MODEL_NAME, evaluate, load_training_rows, rejection_reason, route,
+                          rubric_name, train, uncertain_mask)
+from provenance import MODEL_COLUMN, PROMPT_COLUMN
+
+PROMPT = "score_codexai@v2/full"
+
+
+class FixedModel:
+    """Вместо sklearn-пайплайна: скор - число из суммарайза"""
+    def predict(self, texts):
+        return np.array([float(text.rsplit("|", 1)[1]) for text in texts])
+
+
+def bundle(prompt=PROMPT, spearman=0.8, agreement=0.95, margin=12):
+    thresholds = {50: {"confident_agreement": agreement}, 80: {"confident_agreement": agreement}}
+    return {"model": FixedModel(), "prompt": prompt, "margin": margin,
+            "report": {"spearman": spearman, "thresholds": thresholds}}
+
+
+def test_rubric_name_and_uncertain_mask():
+    assert rubric_name("score_dmleads@v2/compact") == "score_dmleads"
+    assert rubric_name(None) == ""
+    assert uncertain_mask([10, 45, 62, 75, 95], margin=6).tolist() == [False, True, False, True, False]
+
+
+def test_evaluate_perfect_predictions():
+    scores = np.array([5, 30, 55, 70, 85, 95])
+    report = evaluate(scores, scores, margin=0)
+    assert report["mae"] == 0 and report["spearman"] == 1
+    assert report["bucket_agreement"] == 1 and report["confident_share"] == 1
+    assert report["thresholds"][50]["agreement"] == 1
+
+
+def test_rejection_reason():
+    assert rejection_reason(bundle(), PROMPT) is None
+    assert "score_dmleads" in rejection_reason(bundle(prompt="score_dmleads@v2/full"), PROMPT)
+    assert "ключа рубрики" in rejection_reason(bundle(prompt=None), PROMPT)
+    assert "Спирмен" in rejection_reason(bundle(spearman=0.4), PROMPT)
+    assert "порог" in rejection_reason(bundle(agreement=0.7), PROMPT)
+
+
+def test_route_splits_confident_and_uncertain(monkeypatch):
+    df = pd.DataFrame({"Имя": ["А", "Б", "В", "Г"], "Суммарное описание": ["10", "48", "95", "70"]})
+    monkeypatch.setattr(local_scorer, "load_model", lambda path: bundle())
+    assert route(df, [0, 1, 2, 3], PROMPT) == ([0, 2], [10.0, 95.0], [1, 3])
+    # Уже зона неуверенности - больше строк оценивается локально
+    assert route(df, [0, 1, 2, 3], PROMPT, margin=5) == ([0, 2, 3], [10.0, 95.0, 70.0], [1])
+    # Другая рубрика - всё в LLM
+    assert route(df, [0, 1, 2, 3], "score_dmleads@v2/full") == ([], [], [0, 1, 2, 3])
+    monkeypatch.setattr(local_scorer, "load_model", lambda path: None)
+    assert route(df, [3, 1], PROMPT) == ([], [], [3, 1])
+
+
+def test_training_rows_by_rubric(tmp_path):
+    path = tmp_path / "leads_processed.xlsx"
+    pd.DataFrame({
+        "Имя": ["А", "Б", "В", "Г", "Д"],
+        "Суммарное описание": ["юрист", "дизайнер", "маркетолог", "фотограф", "бухгалтер"],
+        "Интерес": [60, 30, 80, 20, 50],
+        PROMPT_COLUMN: [PROMPT, "score_dmleads@v2/full", None, PROMPT, PROMPT],
+        MODEL_COLUMN: ["gemma", "gemma", None, LOCAL_MODEL_NAME, "gemma"],
+    }).to_excel(path, index=False)
+    rows = load_training_rows(PROMPT, [str(path)])
+    # Без провенанса - по рубрике источника (leads_processed.xlsx - CodexAI); локальные скоры - нет
+    assert rows["Имя"].tolist() == ["А", "В", "Д"]
+    assert load_training_rows("score_dmleads@v2/full", [str(path)])["Имя"].tolist() == ["Б"]
+    with pytest.raises(ValueError):
+        load_training_rows("", [str(path)])
+
+
+def test_train_needs_rubric_and_rows():
+    pytest.importorskip("sklearn")
+    words = ["юрист", "дизайнер", "владелец салона", "студент", "маркетолог", "разработчик"]
+    scores = [60, 45, 90, 10, 70, 15]
+    rng = np.random.default_rng(0)
+    picks = rng.integers(0, len(words), 400)
+    df = pd.DataFrame({"Имя": [f"Имя{i}" for i in range(400)],
+                       "Суммарное описание": [words[p] for p in picks],
+                       "Интерес": [float(scores[p]) for p in picks]})
+    with pytest.raises(ValueError):
+        train(df, "")
+    with pytest.raises(ValueError):
+        train(df.head(50), PROMPT)
+    trained, report = train(df, PROMPT)
+    assert trained["prompt"] == PROMPT and report["train_rows"] == 400
+    assert report["spearman"] > 0.9
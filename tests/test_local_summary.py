@@ -0,0 +1,42 @@
+import pytest
+
+import local_summary
+from local_summary import activities, is_low_signal, summarize_locally
+from postprocess import NOT_SPECIFIED, UNDEFINED
+
+
+@pytest.mark.parametrize("description, low", [
+    ("Логистика", True),
+    ("Founder MRNET", True),
+    ("🚜", True),
+    ("https://t.me/some_channel_with_a_long_name", True),
+    ("Владелица салона красоты в Казани, запись через директ", False),
+])
+def test_is_low_signal(description, low):
+    assert is_low_signal(description) is low
+
+
+def test_thresholds_are_arguments(monkeypatch):
+    text = "Юрист по банкротству"
+    assert is_low_signal(text)
+    assert not is_low_signal(text, max_length=10, min_words=2)
+    assert is_low_signal(text, max_length=10, min_words=3)
+    monkeypatch.setattr(local_summary, "LOCAL_SUMMARY_ENABLED", False)
+    assert not is_low_signal("")
+
+
+def test_activities_order_and_cap():
+    assert activities("Founder, SMM и таргет") == ["SMM-продвижение", "таргетированная реклама",
+                                                    "собственник бизнеса"]
+    assert activities("маркетинг, дизайн, сайты, юрист, бухгалтер") == ["маркетинг", "создание сайтов", "дизайн"]
+    assert activities("Путешествую") == ["туризм"]
+    assert activities("") == []
+
+
+def test_summarize_locally():
+    assert summarize_locally("Дарья", "", "HR | Собираю команды") == \
+        "Дарья: подбор персонала. В профиле: «HR | Собираю команды»."
+    assert summarize_locally("Олег", "Ким", "") == UNDEFINED
+    assert summarize_locally("", None, "Живу у моря") == \
+        "Пользователь. В профиле: «Живу у моря». Сфера деятельности не определена."
+    assert summarize_locally(None, "nan", "") == NOT_SPECIFIED
@@ -0,0 +1,60 @@
+import json
+import types
+
+import pytest
+
+from metrics import ApiMetrics, classify_error
+
+
+def response(prompt_tokens, output_tokens):
+    return types.SimpleNamespace(usage_metadata=types.SimpleNamespace(
+        prompt_token_count=prompt_tokens, candidates_token_count=output_tokens))
+
+
+def test_classify_error():
+    assert classify_error(TimeoutError()) == "timeout"
+    assert classify_error(Exception("504 Deadline Exceeded")) == "timeout"
+    assert classify_error(Exception("429 RESOURCE_EXHAUSTED")) == "429"
+    assert classify_error(Exception("Quota exceeded for metric")) == "429"
+    assert classify_error(Exception("403 API key not valid")) == "403"
+    assert classify_error(ValueError("bad json")) == "error"
+
+
+def test_track_outcomes_tokens_and_jsonl(tmp_path):
+    metrics = ApiMetrics()
+    path = tmp_path / "calls.jsonl"
+    metrics.open_jsonl(str(path))
+    with metrics.track("score", "gemma", key_index=1) as call:
+        call.set_response(response(100, 20))
+    with metrics.track("score", "gemma", key_index=2, retries=1, hedged=True) as call:
+        call.set_response(response(100, 18))
+    with pytest.raises(RuntimeError):
+        with metrics.track("score", "gemma", key_index=1):
+            raise RuntimeError("429 quota")
+    with metrics.track("summarize", "flash") as call:
+        call.outcome = "empty"
+    metrics.close()
+
+    summary = metrics.summary()
+    assert summary["score"]["calls"] == 3
+    assert summary["score"]["outcomes"] == {"ok": 2, "429": 1}
+    assert (summary["score"]["prompt_tokens"], summary["score"]["output_tokens"]) == (200, 38)
+    assert summary["summarize"]["outcomes"] == {"empty": 1}
+
+    rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [row["outcome"] for row in rows] == ["ok", "ok", "429", "empty"]
+    assert [row["hedged"] for row in rows] == [False, True, False, False]
+    assert rows[1]["retries"] == 1 and rows[1]["key_index"] == 2
+
+
+def test_prometheus_text():
+    metrics = ApiMetrics()
+    with metrics.track("score", "gemma", key_index=1, retries=1, hedged=True) as call:
+        call.set_response(response(10, 5))
+    text = metrics.to_prometheus()
+    assert 'genai_request_latency_seconds_bucket{stage="score",model="gemma",le="+Inf"} 1' in text
+    assert 'genai_request_latency_seconds_count{stage="score",model="gemma"} 1' in text
+    assert 'genai_requests_total{stage="score",model="gemma",key="1",outcome="ok"} 1' in text
+    assert 'genai_tokens_total{stage="score",model="gemma",kind="prompt"} 10' in text
+    assert 'genai_retries_total{stage="score",model="gemma"} 1' in text
+    assert 'genai_hedged_requests_total{stage="score",model="gemma"} 1' in text
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+import pacing
+from pacing import Pacer, QuotaExhausted
+
+
+@pytest.fixture
+def short_minute(monkeypatch):
+    # Минутное окно 0.2 с - чтобы ожидание слота укладывалось в тест
+    monkeypatch.setattr(pacing, "MINUTE", 0.2)
+
+
+def test_rpm_window_waits_until_oldest_slot_expires(short_minute):
+    pacer = Pacer({"m": (2, None)})
+    started = time.monotonic()
+    assert pacer.acquire(["m"]) == "m"
+    assert pacer.acquire(["m"]) == "m"
+    assert time.monotonic() - started < 0.1
+    assert pacer.acquire(["m"]) == "m"
+    assert 0.15 < time.monotonic() - started < 1.0
+    assert pacer.status()["models"]["m"]["requests_total"] == 3
+
+
+def test_fallback_when_primary_has_no_slot():
+    pacer = Pacer({"primary": (1, None), "fallback": (5, None)})
+    assert pacer.acquire(["primary", "fallback"]) == "primary"
+    assert pacer.acquire(["primary", "fallback"]) == "fallback"
+    ok, reason = pacer.can_use("primary")
+    assert not ok and "RPM" in reason
+
+
+def test_daily_limit_raises():
+    pacer = Pacer({"m": (10, 2)})
+    pacer.acquire(["m"])
+    pacer.acquire(["m"])
+    assert pacer.headroom()["m"]["rpd_left"] == 0
+    with pytest.raises(QuotaExhausted):
+        pacer.acquire(["m"])
+    assert pacer.can_use("m") == (False, "Превышен лимит RPD (2)")
+
+
+def test_timeout_and_try_acquire():
+    pacer = Pacer({"m": (1, None)})
+    assert pacer.try_acquire("m")
+    assert not pacer.try_acquire("m")
+    with pytest.raises(TimeoutError):
+        pacer.acquire(["m"], timeout=0.05)
+
+
+def test_penalize_blocks_model_for_cooldown():
+    pacer = Pacer({"m": (10, None)})
+    pacer.penalize("m", seconds=0.1)
+    assert not pacer.try_acquire("m")
+    time.sleep(0.12)
+    assert pacer.try_acquire("m")
+
+
+def test_disabled_pacer_never_waits():
+    pacer = Pacer({"m": (1, 1)}, enabled=False)
+    for _ in range(5):
+        assert pacer.acquire(["m"], timeout=0.01) == "m"
+
+
+def test_threads_share_window(short_minute):
+    pacer = Pacer({"m": (3, None)})
+    times = []
+    lock = threading.Lock()
+
+    def worker():
+        pacer.acquire(["m"])
+        with lock:
+            times.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    times.sort()
+    # Не больше 3 запросов в любом окне 0.2 с
+    assert all(times[i + 3] - times[i] >= 0.19 for i in range(len(times) - 3))
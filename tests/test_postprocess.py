@@ -0,0 +1,100 @@
+# Регрессия общей постобработки суммарайзов относительно исходной очистки ai.py
+import os
+import re
+
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+from postprocess import UNDEFINED, clean_summaries, clean_summary
+
+
+def baseline_clean(result):
+    """Очистка из исходного ai.py (summarize_profile_with_nlp) без изменений"""
+    result = result.strip().strip('"').strip("'").strip()
+    prefixes_to_remove = [
+        "Ответ:", "Описание:", "Деятельность:",
+        "На основе данных:", "Судя по информации:",
+        "Этот человек", "Данный человек"
+    ]
+    for prefix in prefixes_to_remove:
+        if result.lower().startswith(prefix.lower()):
+            result = result[len(prefix):].strip()
+    phrases_to_remove = [
+        " что указывает на ",
+        " что указывает ",
+        " что говорит ",
+        " что свидетельствует ",
+        ", что указывает на ",
+        ", что означает "
+    ]
+    for phrase in phrases_to_remove:
+        result = result.replace(phrase, " ")
+        result = result.replace(phrase.capitalize(), " ")
+    result = re.sub(r'\s+', ' ', result).strip()
+    if not result or len(result) < 20:
+        return "Деятельность не определена"
+    unclear_responses = ["недостаточно данных", "не определена", "информации недостаточно",
+                         "нет информации", "не указано"]
+    if any(phrase in result.lower() for phrase in unclear_responses):
+        return "Деятельность не определена"
+    if len(result) > 1500:
+        result = result[:1500]
+        last_period = result.rfind('.')
+        if last_period > 500:
+            result = result[:last_period + 1].strip()
+    return result
+
+
+CASES = [
+    "Иван Петров делает мебель на заказ, что указывает на собственный бизнес.",
+    "Ответ: Анна Смирнова - владелица салона красоты в Казани.",
+    '"Описание: Олег   занимается\nлогистикой и грузоперевозками по России."',
+    "Мария ведёт блог о путешествиях что говорит о интересе к туризму.",
+    "Сергей - юрист, что свидетельствует о работе с договорами и судами.",
+    "Этот человек занимается продажей недвижимости в Сочи.",
+    "Недостаточно данных для определения деятельности.",
+    "Коротко.",
+    "Дмитрий основал студию. " * 100,
+]
+
+
+@pytest.mark.parametrize("text", CASES)
+def test_same_as_baseline(text):
+    assert clean_summary(text) == baseline_clean(text)
+
+
+def test_comma_before_filler_is_kept():
+    text = "Иван делает мебель, что указывает на бизнес в сфере интерьера."
+    assert clean_summary(text) == "Иван делает мебель, бизнес в сфере интерьера."
+    assert clean_summary(text) == baseline_clean(text)
+
+
+def test_chained_prefixes_and_empty():
+    assert clean_summary("Ответ: Описание: Павел Орлов - фотограф, снимает свадьбы.") == \
+        "Павел Орлов - фотограф, снимает свадьбы."
+    assert clean_summary(None) == UNDEFINED
+    assert clean_summary(float("nan")) == UNDEFINED
+
+
+def test_series_same_as_single():
+    texts = pd.Series(CASES + [None, float("nan"), "", "  '\"Деятельность: Ольга - бухгалтер на аутсорсе.\"' "])
+    assert clean_summaries(texts).tolist() == [clean_summary(text) for text in texts]
+
+
+@pytest.mark.parametrize("name", ["users_copy.xlsx", "leads_processed.xlsx", "batch_results_scored.xlsx"])
+def test_real_summaries_match_baseline(name):
+    path = os.path.join(ROOT, name)
+    if not os.path.exists(path):
+        pytest.skip(f"нет {name}")
+    summaries = pd.read_excel(path)['Суммарное описание'].dropna().astype(str)
+    mismatched = [text for text in summaries if clean_summary(text) != baseline_clean(text)]
+    assert mismatched == []
+
+
+def test_real_summaries_series_same_as_single():
+    path = os.path.join(ROOT, "users_copy.xlsx")
+    if not os.path.exists(path):
+        pytest.skip("нет users_copy.xlsx")
+    summaries = pd.read_excel(path)['Суммарное описание']
+    assert clean_summaries(summaries).tolist() == summaries.map(clean_summary).tolist()
@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+import priority
+from priority import priority_scores, rank_indices
+
+
+def leads():
+    return pd.DataFrame({
+        "Описание профиля": ["", "Путешествия и фото", "Владелец салона красоты, запись через директ",
+                             "Основатель студии дизайна, клиенты по всей России", None],
+        "Полное имя": ["Анна", "Олег", "Ирина", "Женя | Дизайн интерьеров", "Пётр"],
+        "Премиум": ["Нет", "Да", "Нет", "Да", None],
+        "Дата сбора": ["2025-12-01", "2025-12-10", "2025-09-01", "2025-12-10", None],
+    })
+
+
+def test_scores_in_range_and_signals():
+    scores = priority_scores(leads())
+    assert scores.between(0, 100).all()
+    # Бизнес-ключевые слова и премиум - выше
+    assert scores[3] > scores[2] > scores[0]
+    assert scores[1] > scores[0]
+    # Сбор старше 90 дней от самого свежего - без баллов за свежесть
+    fresh = priority_scores(leads().assign(**{"Дата сбора": "2025-12-10"}))
+    assert fresh[2] - scores[2] == pytest.approx(priority.WEIGHT_RECENCY)
+
+
+def test_rank_indices_keeps_order_on_ties():
+    df = leads()
+    assert rank_indices(df, [0, 1, 2, 3, 4])[0] == 3
+    ties = pd.DataFrame({"Описание профиля": ["", "", ""]})
+    assert rank_indices(ties, [2, 0, 1]) == [2, 0, 1]
+    assert rank_indices(df, []) == []
+
+
+def test_disabled(monkeypatch):
+    monkeypatch.setattr(priority, "PRIORITY_ENABLED", False)
+    assert rank_indices(leads(), [0, 1, 2, 3]) == [0, 1, 2, 3]
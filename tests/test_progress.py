@@ -0,0 +1,57 @@
+import json
+import time
+
+from progress import ProgressTracker, format_duration
+
+
+def read(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def test_stall_is_reported_while_nothing_advances(tmp_path):
+    status_file = tmp_path / "status.json"
+    tracker = ProgressTracker(status_file=str(status_file), report_interval=0.05, stall_seconds=0.2)
+    tracker.start_stage("score", 10)
+    tracker.advance("score", 2)
+    assert read(status_file)["stages"][0]["stalled"] is False
+    # Ничего не завершается - файл обновляет heartbeat
+    time.sleep(0.5)
+    stage = read(status_file)["stages"][0]
+    assert stage["stalled"] is True
+    assert stage["seconds_since_progress"] >= 0.2
+    assert "нет прогресса" in tracker.render(tracker.snapshot())
+
+    tracker.advance("score", 1)
+    assert tracker.snapshot()["stages"][0]["stalled"] is False
+    tracker.finish_stage("score")
+    tracker.close()
+    assert not tracker.heartbeat.is_alive()
+    stage = read(status_file)["stages"][0]
+    assert stage["finished"] is True and stage["stalled"] is False
+
+
+def test_rate_eta_and_in_flight():
+    tracker = ProgressTracker(report_interval=60)
+    tracker.start_stage("summarize", 4)
+    tracker.begin("summarize")
+    tracker.begin("summarize")
+    assert tracker.snapshot()["stages"][0]["in_flight"] == 2
+    time.sleep(0.05)
+    tracker.advance("summarize")
+    stage = tracker.snapshot()["stages"][0]
+    assert stage["done"] == 1 and stage["in_flight"] == 1
+    assert stage["rows_per_sec"] > 0 and stage["eta_seconds"] is not None
+    tracker.close()
+
+
+def test_headroom_in_status():
+    tracker = ProgressTracker(headroom_fn=lambda: {"m": {"rpm_left": 3}})
+    tracker.start_stage("score", 1)
+    assert tracker.snapshot()["quota_headroom"] == {"m": {"rpm_left": 3}}
+    tracker.close()
+
+
+def test_format_duration():
+    assert format_duration(None) == "?"
+    assert format_duration(75) == "1мин 15сек"
+    assert format_duration(3720) == "1ч 02мин"
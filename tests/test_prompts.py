@@ -0,0 +1,36 @@
+import pytest
+
+from prompts import DEFAULT_VARIANT, PROMPTS, format_users, get_prompt
+from records import LeadRecord
+
+
+def test_registry_keys_and_default_variant():
+    assert DEFAULT_VARIANT == "full"
+    assert get_prompt("score_codexai").key == "score_codexai@v2/full"
+    assert get_prompt("score_dmleads", "compact").key == "score_dmleads@v2/compact"
+    # Варианта нет - берётся full
+    assert get_prompt("summarize_short", "compact").key == "summarize_short@v2/full"
+    with pytest.raises(KeyError):
+        get_prompt("нет_такого")
+
+
+def test_all_templates_render():
+    for (name, _variant), template in PROMPTS.items():
+        values = {"count": 1, "users": "1. Анна Ким\n   Юрист"} if name.startswith("score") else {"info": "Имя: Анна"}
+        text = template.render(**values)
+        assert "{" not in text.replace('{"index"', "")
+        assert template.system and template.system not in text
+
+
+def test_system_instruction_only_for_gemini():
+    prompt = get_prompt("score_codexai")
+    users = format_users([LeadRecord(0, "Анна", "Ким", "", "Юрист.")])
+    gemini = prompt.contents_for("gemini-2.5-flash-lite", count=1, users=users)
+    gemma = prompt.contents_for("gemma-3-27b-it", count=1, users=users)
+    assert not gemini.startswith(prompt.system)
+    assert gemma == f"{prompt.system}\n\n{gemini}"
+
+
+def test_format_users_placeholder_for_missing_summary():
+    users = [LeadRecord(0, "Анна", "Ким", "", "Юрист."), {"Имя": "Олег", "Суммарное описание": "nan"}]
+    assert format_users(users) == "1. Анна Ким\n   Юрист.\n2. Олег \n   Нет описания"
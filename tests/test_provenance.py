@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from provenance import HASH_COLUMN, MODEL_COLUMN, PROMPT_COLUMN, rows_to_score, stamp
+
+PROMPT = "score_codexai@v2/full"
+
+
+def scored_frame():
+    df = pd.DataFrame({
+        "Имя": ["Анна", "Олег", "Зоя", "Иван"],
+        "Фамилия": ["Ким", "Лис", "Бор", "Рыжов"],
+        "Суммарное описание": ["Юрист.", "Маркетолог.", "Дизайнер.", "Фотограф."],
+        "Интерес": [60.0, 85.0, 30.0, None],
+    })
+    stamp(df, [0, 1, 2], PROMPT, "gemma-3-27b-it")
+    return df
+
+
+def test_missing_mode_takes_only_unscored():
+    df = scored_frame()
+    df.loc[0, "Суммарное описание"] = "Владелица юридической фирмы."
+    assert rows_to_score(df, "missing", "другой@v3/full") == [3]
+
+
+def test_incremental_rescores_changed_input():
+    df = scored_frame()
+    assert rows_to_score(df, "incremental", PROMPT) == [3]
+    df.loc[1, "Суммарное описание"] = "Владелец кафе."
+    assert rows_to_score(df, "incremental", PROMPT) == [1, 3]
+
+
+def test_incremental_outdated_prompt_and_model():
+    df = scored_frame()
+    assert rows_to_score(df, "incremental", "score_codexai@v3/full") == [0, 1, 2, 3]
+    assert rows_to_score(df, "incremental", PROMPT, model="gemini-2.5-flash-lite") == [0, 1, 2, 3]
+    assert rows_to_score(df, "incremental", PROMPT, model="gemma-3-27b-it") == [3]
+
+
+def test_band_limits_outdated_but_not_changed_input():
+    df = scored_frame()
+    df.loc[2, "Суммарное описание"] = "Дизайнер интерьеров."
+    # Устаревший промпт - только в полосе 40-90; изменившийся вход - всегда
+    assert rows_to_score(df, "incremental", "score_codexai@v3/full", band=(40, 90)) == [0, 1, 2, 3]
+    assert rows_to_score(df, "incremental", "score_codexai@v3/full", band=(70, 90)) == [1, 2, 3]
+
+
+def test_rows_without_provenance_are_outdated():
+    df = pd.DataFrame({"Имя": ["Анна"], "Суммарное описание": ["Юрист."], "Интерес": [50.0]})
+    assert rows_to_score(df, "incremental", PROMPT) == [0]
+    stamp(df, [0], PROMPT, "gemma-3-27b-it")
+    assert df.loc[0, PROMPT_COLUMN] == PROMPT and df.loc[0, MODEL_COLUMN] == "gemma-3-27b-it"
+    assert df.loc[0, HASH_COLUMN]
+    assert rows_to_score(df, "incremental", PROMPT) == []
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        rows_to_score(scored_frame(), "all", PROMPT)
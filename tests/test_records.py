@@ -0,0 +1,39 @@
+import pandas as pd
+
+from records import extract_records, result_slots, write_back
+
+
+def frame():
+    return pd.DataFrame({
+        "Имя": [" Анна ", "Олег", None],
+        "Фамилия": ["Ким", float("nan"), "Бор"],
+        "Описание профиля": ["Юрист", "Маркетолог", "Дизайнер"],
+    }, index=[10, 11, 12])
+
+
+def test_extract_records_same_as_row_access():
+    df = frame()
+    records = extract_records(df, [2, 0])
+    assert [r.position for r in records] == [2, 0]
+    for record, position in zip(records, [2, 0]):
+        row = df.iloc[position]
+        assert record.get("Имя") == ("" if pd.isna(row["Имя"]) else row["Имя"].strip())
+        assert record.get("Описание профиля") == row["Описание профиля"]
+    # Колонки нет в df - пустая строка; неизвестная колонка - default
+    assert records[0].summary == "" and records[1].get("Премиум", "Нет") == "Нет"
+    assert records[1].name == "Анна" and extract_records(df, [1])[0].surname == ""
+
+
+def test_write_back_skips_missing_results():
+    df = frame()
+    results = result_slots(3)
+    results[0] = 85.0
+    results[2] = 40.0
+    written = write_back(df, [0, 1, 2], "Интерес", results)
+    assert written == [0, 2]
+    assert df.loc[10, "Интерес"] == 85.0 and pd.isna(df.loc[11, "Интерес"])
+    assert df.loc[12, "Интерес"] == 40.0
+
+    written = write_back(df, [1], "Суммарное описание", ["Олег - маркетолог."])
+    assert written == [1] and df.loc[11, "Суммарное описание"] == "Олег - маркетолог."
+    assert write_back(df, [0, 1], "Интерес", result_slots(2)) == []
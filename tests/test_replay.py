@@ -0,0 +1,70 @@
+import types
+
+import pytest
+
+from replay import ReplayMiss, TrafficLog
+
+
+def response(text, prompt_tokens=10, output_tokens=5):
+    return types.SimpleNamespace(text=text, usage_metadata=types.SimpleNamespace(
+        prompt_token_count=prompt_tokens, candidates_token_count=output_tokens))
+
+
+def record(path, calls):
+    log = TrafficLog(str(path), "record")
+    for stage, contents, send in calls:
+        try:
+            log.call(stage, "gemma-3-27b-it", contents, {"temperature": 0.7}, None, send)
+        except RuntimeError:
+            pass
+    log.close()
+    return log.summary()
+
+
+def failing():
+    raise RuntimeError("429 quota")
+
+
+def test_record_then_replay(tmp_path):
+    path = tmp_path / "traffic.jsonl.gz"
+    stats = record(path, [
+        ("score", "батч 1", lambda: response('[{"index": 1, "score": 70}]', 120, 8)),
+        ("summarize", "Анна", lambda: response("Анна - юрист.")),
+        ("summarize", "Олег", failing),
+    ])
+    assert stats["recorded"] == 3
+
+    log = TrafficLog(str(path), "replay")
+    sent = []
+    replayed = log.call("score", "другая модель", "батч 1", {"temperature": 0.7}, None, lambda: sent.append(1))
+    assert replayed.text == '[{"index": 1, "score": 70}]'
+    assert replayed.usage_metadata.prompt_token_count == 120
+    assert replayed.usage_metadata.candidates_token_count == 8
+    assert log.call("summarize", "gemma-3-27b-it", "Анна", {"temperature": 0.7}, None, None).text == "Анна - юрист."
+    # Ошибка из лога воспроизводится, сеть не трогается
+    with pytest.raises(RuntimeError, match="429 quota"):
+        log.call("summarize", "gemma-3-27b-it", "Олег", {"temperature": 0.7}, None, None)
+    assert sent == []
+    assert log.summary() == {"recorded": 0, "replayed": 2, "misses": 0, "errors": 1}
+
+
+def test_replay_miss_on_changed_request(tmp_path):
+    path = tmp_path / "traffic.jsonl.gz"
+    record(path, [("summarize", "Анна", lambda: response("Анна - юрист."))])
+    log = TrafficLog(str(path), "replay")
+    with pytest.raises(ReplayMiss):
+        log.call("summarize", "gemma-3-27b-it", "Анна", {"temperature": 0.9}, None, None)
+    with pytest.raises(ReplayMiss):
+        log.call("score", "gemma-3-27b-it", "Анна", {"temperature": 0.7}, None, None)
+    assert log.summary()["misses"] == 2
+
+
+def test_identical_requests_replay_in_order(tmp_path):
+    path = tmp_path / "traffic.jsonl.gz"
+    record(path, [("summarize", "Анна", lambda: response("первый")),
+                  ("summarize", "Анна", lambda: response("второй"))])
+    # Дозапись в тот же файл
+    record(path, [("summarize", "Анна", lambda: response("третий"))])
+    log = TrafficLog(str(path), "replay")
+    texts = [log.call("summarize", "m", "Анна", {"temperature": 0.7}, None, None).text for _ in range(4)]
+    assert texts == ["первый", "второй", "третий", "третий"]
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from reporting import UNKNOWN_GROUP, breakdown, build_report, distribution
+
+
+def naive_distribution(values):
+    """Подсчёт по бакетам условиями, как в исходных отчётах"""
+    scores = [min(max(float(v), 0), 100) for v in pd.to_numeric(pd.Series(values), errors='coerce').dropna()]
+    return {
+        "not_interested": sum(1 for s in scores if s < 20),
+        "cold": sum(1 for s in scores if 20 <= s < 50),
+        "warm": sum(1 for s in scores if 50 <= s < 80),
+        "hot": sum(1 for s in scores if s >= 80),
+        "total": len(scores),
+    }
+
+
+def test_bucket_edges():
+    values = [0, 19, 19.9, 20, 49, 50, 79, 79.5, 80, 100]
+    assert distribution(values) == {"not_interested": 3, "cold": 2, "warm": 3, "hot": 2, "total": 10}
+
+
+def test_out_of_range_and_missing():
+    assert distribution([-5, 150, None, float("nan"), "abc", "85"]) == \
+        {"not_interested": 1, "cold": 0, "warm": 0, "hot": 2, "total": 3}
+    assert distribution([]) == {"not_interested": 0, "cold": 0, "warm": 0, "hot": 0, "total": 0}
+
+
+def test_same_as_naive_counting():
+    values = np.random.default_rng(0).uniform(-10, 110, 2000).round(1)
+    assert distribution(values) == naive_distribution(values)
+
+
+def test_breakdown_and_report():
+    df = pd.DataFrame({
+        "Интерес": [90, 85, 60, 10, None, 55],
+        "Модель оценки": ["flash", "flash", "gemma", "gemma", "gemma", None],
+    })
+    table = breakdown(df, "Модель оценки")
+    assert table.loc["flash", "hot"] == 2 and table.loc["flash", "total"] == 2
+    assert table.loc["gemma"].tolist() == [1, 0, 1, 0, 2]
+    assert table.loc[UNKNOWN_GROUP, "warm"] == 1
+    assert breakdown(df, "Источник").empty
+
+    report = build_report(df)
+    assert report["rows"] == 6 and report["not_scored"] == 1
+    assert report["distribution"]["total"] == 5